@@ -4,6 +4,12 @@ from .get_bibtex_from_dblp import DBLPBibTeX
 from .get_bibtex_from_google_scholar import GoogleScholarBibTeX
 from .workflow.make_workflow import WorkflowBuilder
 from .workflow.crossref2dblp import CrossRefToDBLP
+from .offline import CrossRefIndex, DBLPIndex
+from .utils.cache import SQLiteCache
+from .utils.circuit_breaker import CircuitBreaker
+from .utils.rate_limit import RateLimiter
+from .utils.retry import RetryPolicy
+from .utils.session import SessionPool
 
 __version__ = "1.1.0"
 
@@ -14,4 +20,11 @@ __all__ = [
     "GoogleScholarBibTeX",
     "WorkflowBuilder",
     "CrossRefToDBLP",
+    "SessionPool",
+    "RateLimiter",
+    "RetryPolicy",
+    "SQLiteCache",
+    "CircuitBreaker",
+    "DBLPIndex",
+    "CrossRefIndex",
 ]
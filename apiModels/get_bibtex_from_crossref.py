@@ -1,48 +1,136 @@
-import requests
-from typing import Dict, List, Optional
+import asyncio
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from tqdm import tqdm
 from .meta_class import BibTexFetcher
+from .offline.crossref_index import CrossRefIndex
+from .utils.bibtex import CROSSREF_FIELDS, crossref_to_bibtex, iter_bibtex
+from .utils.metrics import ENDPOINT_TRANSFORM
+from .utils.paging import iter_pages
+from .utils.query import QUERY_DOI, QUERY_TITLE, classify_query, coalesce_queries
 
 class CrossRefBibTeX(BibTexFetcher):
     """
     Fetch BibTeX citations from CrossRef.
     """
 
-    def __init__(self, email: str):
+    direct_identifiers = frozenset({QUERY_DOI})
+
+    def __init__(
+        self,
+        email: str,
+        snapshot_index: Optional[Union[str, CrossRefIndex]] = None,
+        render_locally: bool = False,
+        **kwargs
+    ):
         """
         Initialize CrossRef fetcher.
 
         Args:
             email: Email address for polite pool
+            snapshot_index: Optional local index (or its path) built from a
+                CrossRef metadata snapshot with ``CrossRefIndex.ingest``; if
+                given, DOIs and titles are resolved locally without network
+                requests
+            render_locally: If True, title lookups render BibTeX from the
+                ``/works`` search response instead of making a second request
+                to the transform endpoint, so they cost one round trip
+            **kwargs: Options forwarded to BibTexFetcher (session_pool,
+                max_concurrency, ...)
         """
-        super().__init__()
+        super().__init__(**kwargs)
+        if isinstance(snapshot_index, str):
+            snapshot_index = CrossRefIndex(snapshot_index)
+        self.snapshot_index = snapshot_index
+        self.render_locally = render_locally
         self.base_url = "https://api.crossref.org"
         self.headers = {
             'User-Agent': f'GetBibTeX/1.0 (mailto:{email})'
         }
 
-    def get_multiple_bibtex(self, queries: List[str]) -> Dict[str, Optional[str]]:
+    def get_multiple_bibtex(
+        self,
+        queries: List[str],
+        batch_size: int = 50
+    ) -> Dict[str, Optional[str]]:
         """
         Fetch multiple BibTeX citations from CrossRef.
 
+        DOIs are looked up in groups of ``batch_size`` with a single
+        ``/works?filter=doi:...`` request per group and rendered locally; DOIs
+        missing from the batch response and title queries are fetched one by
+        one. Queries that differ only in case, whitespace or a DOI prefix are
+        fetched once.
+
         Args:
             queries: List of DOIs or search queries
+            batch_size: Maximum number of DOIs per batched request
 
         Returns:
             Dict[str, Optional[str]]: Dictionary mapping queries to their BibTeX citations
         """
+        representatives = coalesce_queries(queries)
+        unique = list(dict.fromkeys(representatives.values()))
         results = {}
-        
-        for query in tqdm(queries, desc="Fetching from CrossRef"):
-            bibtex = self.get_bibtex(query)
-            results[query] = bibtex
-            
-            # Add small delay to be nice to the API
-            if len(queries) > 10:
-                import time
-                time.sleep(1)
-        
-        return results
+
+        if self.snapshot_index is None and batch_size > 1:
+            dois = [
+                query for query in unique
+                if self._is_doi(query) and not self._lookup_cached('bibtex', query)[0]
+            ]
+            for start in tqdm(
+                range(0, len(dois), batch_size), desc="Fetching DOI batches from CrossRef"
+            ):
+                results.update(self._get_bibtex_by_dois(dois[start:start + batch_size]))
+
+        for query in tqdm(unique, desc="Fetching from CrossRef"):
+            if results.get(query) is None:
+                results[query] = self.get_bibtex(query)
+
+        return {query: results[representatives[query]] for query in queries}
+
+    def _get_bibtex_by_dois(self, dois: List[str]) -> Dict[str, str]:
+        """
+        Get BibTeX citations for several DOIs with one filtered /works request.
+
+        Args:
+            dois: DOIs to look up
+
+        Returns:
+            Dict[str, str]: Dictionary mapping the DOIs found to their BibTeX
+        """
+        try:
+            params = {
+                'filter': ','.join(f'doi:{doi.strip()}' for doi in dois),
+                'rows': str(len(dois)),
+                'select': ','.join(CROSSREF_FIELDS)
+            }
+            response = self._get(
+                f"{self.base_url}/works",
+                params=params,
+                headers=self.headers
+            )
+
+            if response.status_code != 200:
+                self.logger.error(f"Failed to batch DOIs. Status code: {response.status_code}")
+                return {}
+
+            items = response.json().get('message', {}).get('items', [])
+            by_doi = {item.get('DOI', '').lower(): item for item in items}
+
+            found = {}
+            for doi in dois:
+                item = by_doi.get(doi.strip().lower())
+                bibtex = crossref_to_bibtex(item) if item else None
+                if bibtex and self._validate_bibtex(bibtex):
+                    self._store_cached('bibtex', doi, bibtex)
+                    self.metrics.record_lookup(True)
+                    found[doi] = bibtex
+            return found
+
+        except Exception as e:
+            self.logger.error(f"Error batching DOIs: {str(e)}")
+            return {}
 
     def get_bibtex(self, query: str) -> Optional[str]:
         """
@@ -54,15 +142,36 @@ class CrossRefBibTeX(BibTexFetcher):
         Returns:
             Optional[str]: BibTeX citation if found, None otherwise
         """
+        return self._cached('bibtex', query, lambda: self._fetch_bibtex(query))
+
+    def _fetch_bibtex(self, query: str) -> Optional[str]:
+        """Get BibTeX citation from CrossRef without consulting the cache."""
+        if self.snapshot_index is not None:
+            return self._snapshot_bibtex(query)
+
         try:
+            kind, identifier = classify_query(query)
             # 如果是 DOI，直接获取
-            if self._is_doi(query):
-                bibtex = self._get_bibtex_by_doi(query)
+            if kind == QUERY_DOI:
+                bibtex = self._get_bibtex_by_doi(identifier)
                 # 验证 BibTeX 是否包含必要字段
                 if bibtex and self._validate_bibtex(bibtex):
                     return bibtex
                 return None
 
+            # DBLP key 和 arXiv 编号无法在 CrossRef 中查找，不做无用的搜索
+            if kind != QUERY_TITLE:
+                self.logger.debug(f"Skipping {kind} query on CrossRef: {query}")
+                return None
+
+            # 单次请求：直接用搜索结果的元数据渲染 BibTeX
+            if self.render_locally:
+                items = self._search_items(query, 1, ','.join(CROSSREF_FIELDS))
+                bibtex = crossref_to_bibtex(items[0]) if items else None
+                if bibtex and self._validate_bibtex(bibtex):
+                    return bibtex
+                return None
+
             # 否则通过搜索 API 查找
             results = self.search_works(query, limit=1)
             if not results:
@@ -93,17 +202,104 @@ class CrossRefBibTeX(BibTexFetcher):
         Returns:
             List[Dict]: List of work metadata
         """
+        return self._cached(
+            'search', f"{limit}|{query}", lambda: self._search_works(query, limit)
+        )
+
+    def _search_works(self, query: str, limit: int) -> List[Dict]:
+        """Search for works in CrossRef without consulting the cache."""
+        if self.snapshot_index is not None:
+            return [
+                self._to_work(item)
+                for item in self.snapshot_index.search_title(query, limit)
+            ]
+
+        return [
+            self._to_work(item)
+            for item in self._search_items(
+                query, limit, 'DOI,title,author,published,type,container-title'
+            )
+        ]
+
+    def iter_works(
+        self,
+        query: Optional[str] = None,
+        filters: Optional[Dict[str, str]] = None,
+        page_size: int = 100,
+        max_results: Optional[int] = None,
+        prefetch: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Lazily iterate over all CrossRef works matching a query.
+
+        Pages are requested with CrossRef's deep-paging cursor while the caller
+        consumes the previous page; iteration stops as soon as the caller
+        stops consuming or ``max_results`` works have been yielded.
+
+        Args:
+            query: Optional bibliographic search query
+            filters: Optional CrossRef filters, e.g.
+                ``{'container-title': 'Sensors', 'from-pub-date': '2022'}``
+            page_size: Number of works per request (CrossRef allows up to 1000)
+            max_results: Maximum number of works to yield, None for all
+            prefetch: If True, fetch the next page in the background
+
+        Yields:
+            Dict: Work metadata in the same format as ``search_works``
+        """
+        def fetch_page(cursor: str) -> Tuple[List[Dict], Optional[str]]:
+            params = {
+                'rows': str(page_size),
+                'cursor': cursor,
+                'select': 'DOI,title,author,published,type,container-title'
+            }
+            if query:
+                params['query.bibliographic'] = query
+            if filters:
+                params['filter'] = ','.join(f"{k}:{v}" for k, v in filters.items())
+
+            try:
+                response = self._get(f"{self.base_url}/works", params=params, headers=self.headers)
+                if response.status_code != 200:
+                    self.logger.error(f"Failed to page CrossRef. Status code: {response.status_code}")
+                    return [], None
+
+                message = response.json().get('message', {})
+                items = message.get('items', [])
+                next_cursor = message.get('next-cursor')
+                if len(items) < page_size or next_cursor == cursor:
+                    next_cursor = None
+                return [self._to_work(item) for item in items], next_cursor
+
+            except Exception as e:
+                self.logger.error(f"Error paging CrossRef: {str(e)}")
+                return [], None
+
+        return islice(iter_pages(fetch_page, '*', prefetch), max_results)
+
+    def _search_items(self, query: str, limit: int, select: str) -> List[Dict]:
+        """
+        Search CrossRef and return the raw work records.
+
+        Args:
+            query: Search query
+            limit: Maximum number of results to return
+            select: Comma-separated fields to request
+
+        Returns:
+            List[Dict]: Work records in CrossRef's format
+        """
         try:
             # 构建查询参数
             params = {
                 'query.bibliographic': query,  # 使用书目字段搜索
                 'rows': str(limit),
-                'select': 'DOI,title,author,published,type,container-title',  # 只获取需要的字段
+                'select': select,  # 只获取需要的字段
                 'sort': 'relevance',  # 按相关性排序
                 'order': 'desc'
             }
 
-            response = requests.get(
+            response = self._get(
                 f"{self.base_url}/works",
                 params=params,
                 headers=self.headers
@@ -114,31 +310,54 @@ class CrossRefBibTeX(BibTexFetcher):
                 return []
 
             data = response.json()
-            items = data.get('message', {}).get('items', [])
-
-            works = []
-            for item in items:
-                work = {
-                    'DOI': item.get('DOI'),
-                    'title': self._get_first(item.get('title', [])),
-                    'authors': self._extract_authors(item.get('author', [])),
-                    'year': self._extract_year(item.get('published')),
-                    'type': item.get('type'),
-                    'container-title': self._get_first(item.get('container-title', []))
-                }
-                works.append(work)
-
-            return works
+            return data.get('message', {}).get('items', [])
 
         except Exception as e:
             self.logger.error(f"Error searching CrossRef: {str(e)}")
             return []
 
+    def _snapshot_bibtex(self, query: str) -> Optional[str]:
+        """Get BibTeX citation from the local CrossRef snapshot index."""
+        try:
+            kind, identifier = classify_query(query)
+            if kind == QUERY_DOI:
+                item = self.snapshot_index.get(identifier)
+            elif kind != QUERY_TITLE:
+                return None
+            else:
+                items = self.snapshot_index.search_title(query, limit=1)
+                item = items[0] if items else None
+            if item is None:
+                return None
+
+            bibtex = self.snapshot_index.to_bibtex(item)
+            if bibtex and self._validate_bibtex(bibtex):
+                return bibtex
+            return None
+
+        except Exception as e:
+            self.logger.error(f"Error reading local CrossRef snapshot: {str(e)}")
+            return None
+
+    async def async_search_works(self, query: str, limit: int = 5) -> List[Dict]:
+        """
+        Asynchronously search for works in CrossRef.
+
+        Args:
+            query: Search query
+            limit: Maximum number of results to return
+
+        Returns:
+            List[Dict]: List of work metadata
+        """
+        return await asyncio.to_thread(self.search_works, query, limit)
+
     def _get_bibtex_by_doi(self, doi: str) -> Optional[str]:
         """Get BibTeX citation for a DOI."""
         try:
-            response = requests.get(
+            response = self._get(
                 f"{self.base_url}/works/{doi}/transform/application/x-bibtex",
+                endpoint=ENDPOINT_TRANSFORM,
                 headers=self.headers
             )
 
@@ -152,6 +371,17 @@ class CrossRefBibTeX(BibTexFetcher):
             self.logger.error(f"Error getting BibTeX: {str(e)}")
             return None
 
+    def _to_work(self, item: Dict) -> Dict:
+        """Convert a CrossRef work record to the search result format."""
+        return {
+            'DOI': item.get('DOI'),
+            'title': self._get_first(item.get('title', [])),
+            'authors': self._extract_authors(item.get('author', [])),
+            'year': self._extract_year(item.get('published')),
+            'type': item.get('type'),
+            'container-title': self._get_first(item.get('container-title', []))
+        }
+
     def _extract_year(self, date_info: Dict) -> Optional[str]:
         """Extract year from CrossRef date information."""
         if not date_info:
@@ -173,18 +403,8 @@ class CrossRefBibTeX(BibTexFetcher):
         return items[0] if items else None
 
     def _is_doi(self, query: str) -> bool:
-        """Check if a query is a DOI."""
-        try:
-            query = query.strip().lower()
-            # 更严格的 DOI 验证
-            parts = query.split('/')
-            return (
-                len(parts) == 2 
-                and parts[0].startswith('10.') 
-                and all(p.strip() for p in parts)
-            )
-        except:
-            return False
+        """Check if a query is a DOI, with or without a doi.org/doi: prefix."""
+        return classify_query(query)[0] == QUERY_DOI
 
     def _validate_bibtex(self, bibtex: str) -> bool:
         """
@@ -196,6 +416,8 @@ class CrossRefBibTeX(BibTexFetcher):
         Returns:
             bool: True 如果包含所有必要字段，否则 False
         """
-        bibtex = bibtex.lower()
+        entry = next(iter_bibtex(bibtex), None)
+        if entry is None:
+            return False
         required_fields = ['title', 'author', 'year']
-        return all(field in bibtex for field in required_fields)
+        return all(entry.get(field) for field in required_fields)
@@ -1,7 +1,14 @@
-import requests
-from typing import Dict, List, Optional
+import asyncio
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from tqdm import tqdm
 from .meta_class import BibTexFetcher
+from .offline.dblp_index import DBLPIndex
+from .utils.metrics import ENDPOINT_TRANSFORM
+from .utils.paging import iter_pages
+from .utils.query import (
+    QUERY_ARXIV, QUERY_DBLP_KEY, QUERY_DOI, arxiv_to_dblp_key, classify_query, coalesce_queries
+)
 
 class DBLPBibTeX(BibTexFetcher):
     """
@@ -11,9 +18,23 @@ class DBLPBibTeX(BibTexFetcher):
     DBLP is a comprehensive computer science bibliography database.
     """
 
-    def __init__(self):
-        """Initialize DBLP fetcher."""
-        super().__init__()
+    direct_identifiers = frozenset({QUERY_DBLP_KEY, QUERY_ARXIV})
+
+    def __init__(self, offline_index: Optional[Union[str, DBLPIndex]] = None, **kwargs):
+        """
+        Initialize DBLP fetcher.
+
+        Args:
+            offline_index: Optional local DBLP index (or its path) built from
+                the dblp.xml dump with ``DBLPIndex.ingest``; if given, lookups
+                and searches are answered locally without network requests
+            **kwargs: Options forwarded to BibTexFetcher (session_pool,
+                max_concurrency, ...)
+        """
+        super().__init__(**kwargs)
+        if isinstance(offline_index, str):
+            offline_index = DBLPIndex(offline_index)
+        self.offline_index = offline_index
         self.base_url = "https://dblp.org/search/publ/api"  # 论文搜索 API
         self.bibtex_url = "https://dblp.org/rec/{}.bib"  # BibTeX 获取 API
         self.headers = {
@@ -25,20 +46,23 @@ class DBLPBibTeX(BibTexFetcher):
         Get BibTeX citation from DBLP.
 
         Args:
-            query: Search query (title or DBLP key)
+            query: Search query (title, DBLP key or arXiv ID); DOIs are
+                not searchable on DBLP and return None without a request
 
         Returns:
             Optional[str]: BibTeX citation if found, None otherwise
         """
+        return self._cached('bibtex', query, lambda: self._fetch_bibtex(query))
+
+    def _fetch_bibtex(self, query: str) -> Optional[str]:
+        """Get BibTeX citation from DBLP without consulting the cache."""
+        if self.offline_index is not None:
+            return self._offline_bibtex(query)
+
         try:
-            # 如果是 DBLP key，直接获取 BibTeX
-            if '/' in query:  # DBLP key 格式如 'conf/naacl/DevlinCLT19'
-                url = self.bibtex_url.format(query)
-                response = requests.get(url)
-                if response.status_code == 200:
-                    return response.text.strip()
-                self.logger.error(f"Failed to fetch BibTeX. Status code: {response.status_code}")
-                return None
+            key = self._direct_key(query)
+            if key is not None:
+                return self._get_bibtex_by_key(key) if key else None
 
             # 否则通过搜索 API 查找
             params = {
@@ -48,7 +72,7 @@ class DBLPBibTeX(BibTexFetcher):
                 'c': 0   # 不需要自动补全
             }
 
-            response = requests.get(
+            response = self._get(
                 self.base_url,
                 params=params,
                 headers=self.headers
@@ -71,45 +95,67 @@ class DBLPBibTeX(BibTexFetcher):
             if not key:
                 return None
 
-            # 获取 BibTeX
-            url = self.bibtex_url.format(key)
-            response = requests.get(
-                url,
-                headers={'Accept': 'text/plain'}  # BibTeX 应该以纯文本格式返回
-            )
-
-            if response.status_code == 200:
-                return response.text.strip()
-
-            self.logger.error(f"Failed to fetch BibTeX. Status code: {response.status_code}")
-            return None
+            return self._get_bibtex_by_key(key)
 
         except Exception as e:
             self.logger.error(f"Error fetching from DBLP: {str(e)}")
             return None
 
+    def _get_bibtex_by_key(self, key: str) -> Optional[str]:
+        """Get BibTeX citation for a DBLP key."""
+        url = self.bibtex_url.format(key)
+        response = self._get(
+            url,
+            endpoint=ENDPOINT_TRANSFORM,
+            headers={'Accept': 'text/plain'}  # BibTeX 应该以纯文本格式返回
+        )
+
+        if response.status_code == 200:
+            return response.text.strip()
+
+        self.logger.error(f"Failed to fetch BibTeX. Status code: {response.status_code}")
+        return None
+
+    def _direct_key(self, query: str) -> Optional[str]:
+        """
+        Get the DBLP key an identifier query resolves to directly.
+
+        Returns:
+            Optional[str]: The key for DBLP keys and arXiv IDs, an empty
+                string for identifiers DBLP cannot look up (DOIs, old-style
+                arXiv IDs), None for titles that need a search
+        """
+        kind, identifier = classify_query(query)
+        if kind == QUERY_DBLP_KEY:
+            return identifier
+        if kind == QUERY_ARXIV:
+            return arxiv_to_dblp_key(identifier) or ''
+        if kind == QUERY_DOI:
+            self.logger.debug(f"Skipping DOI query on DBLP: {query}")
+            return ''
+        return None
+
     def get_multiple_bibtex(self, queries: List[str]) -> Dict[str, Optional[str]]:
         """
         Fetch multiple BibTeX citations from DBLP.
 
+        Queries that differ only in case, whitespace or a DOI prefix are
+        fetched once.
+
         Args:
             queries: List of search queries
 
         Returns:
             Dict[str, Optional[str]]: Dictionary mapping queries to their BibTeX citations
         """
+        representatives = coalesce_queries(queries)
         results = {}
         
-        for query in tqdm(queries, desc="Fetching from DBLP"):
+        for query in tqdm(dict.fromkeys(representatives.values()), desc="Fetching from DBLP"):
             bibtex = self.get_bibtex(query)
             results[query] = bibtex
-            
-            # Add small delay to be nice to the API
-            if len(queries) > 10:
-                import time
-                time.sleep(1)
-        
-        return results
+
+        return {query: results[representatives[query]] for query in queries}
 
     def search_publications(self, query: str, limit: int = 5) -> List[Dict]:
         """
@@ -122,6 +168,18 @@ class DBLPBibTeX(BibTexFetcher):
         Returns:
             List[Dict]: List of publication metadata
         """
+        return self._cached(
+            'search', f"{limit}|{query}", lambda: self._search_publications(query, limit)
+        )
+
+    def _search_publications(self, query: str, limit: int) -> List[Dict]:
+        """Search for publications in DBLP without consulting the cache."""
+        if self.offline_index is not None:
+            return [
+                self.offline_index.to_publication(record)
+                for record in self.offline_index.search(query, limit)
+            ]
+
         try:
             params = {
                 'q': query,
@@ -130,7 +188,7 @@ class DBLPBibTeX(BibTexFetcher):
                 'c': 0  # 不需要自动补全
             }
 
-            response = requests.get(
+            response = self._get(
                 self.base_url,
                 params=params,
                 headers=self.headers
@@ -143,27 +201,100 @@ class DBLPBibTeX(BibTexFetcher):
             data = response.json()
             hits = data.get('result', {}).get('hits', {}).get('hit', [])
             
-            papers = []
-            for hit in hits[:limit]:
-                info = hit.get('info', {})
-                paper = {
-                    'title': info.get('title'),
-                    'authors': self._extract_authors(info.get('authors', {})),
-                    'year': info.get('year'),
-                    'venue': info.get('venue'),
-                    'type': info.get('type'),
-                    'key': info.get('key'),
-                    'doi': info.get('doi'),
-                    'url': info.get('url')
-                }
-                papers.append(paper)
-                
-            return papers
+            return [self._to_publication(hit.get('info', {})) for hit in hits[:limit]]
 
         except Exception as e:
             self.logger.error(f"Error searching DBLP: {str(e)}")
             return []
 
+    def iter_publications(
+        self,
+        query: str,
+        page_size: int = 1000,
+        max_results: Optional[int] = None,
+        prefetch: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Lazily iterate over all DBLP publications matching a query.
+
+        Pages are requested with DBLP's ``f`` offset while the caller consumes
+        the previous page; iteration stops as soon as the caller stops
+        consuming or ``max_results`` publications have been yielded.
+
+        Args:
+            query: Search query, e.g. ``'venue:NeurIPS year:2023'``
+            page_size: Number of hits per request (DBLP allows up to 1000)
+            max_results: Maximum number of publications to yield, None for all
+            prefetch: If True, fetch the next page in the background
+
+        Yields:
+            Dict: Publication metadata in the same format as ``search_publications``
+        """
+        page_size = min(page_size, 1000)
+
+        def fetch_page(offset: int) -> Tuple[List[Dict], Optional[int]]:
+            params = {'q': query, 'format': 'json', 'h': page_size, 'f': offset, 'c': 0}
+            try:
+                response = self._get(self.base_url, params=params, headers=self.headers)
+                if response.status_code != 200:
+                    self.logger.error(f"Failed to page DBLP. Status code: {response.status_code}")
+                    return [], None
+
+                result = response.json().get('result', {}).get('hits', {})
+                hits = result.get('hit', [])
+                total = int(result.get('@total', 0))
+                next_offset = offset + len(hits)
+                if not hits or next_offset >= total:
+                    next_offset = None
+                return [self._to_publication(hit.get('info', {})) for hit in hits], next_offset
+
+            except Exception as e:
+                self.logger.error(f"Error paging DBLP: {str(e)}")
+                return [], None
+
+        return islice(iter_pages(fetch_page, 0, prefetch), max_results)
+
+    def _to_publication(self, info: Dict) -> Dict:
+        """Convert a DBLP search hit to the publication metadata format."""
+        return {
+            'title': info.get('title'),
+            'authors': self._extract_authors(info.get('authors', {})),
+            'year': info.get('year'),
+            'venue': info.get('venue'),
+            'type': info.get('type'),
+            'key': info.get('key'),
+            'doi': info.get('doi'),
+            'url': info.get('url')
+        }
+
+    def _offline_bibtex(self, query: str) -> Optional[str]:
+        """Get BibTeX citation from the local DBLP index."""
+        try:
+            key = self._direct_key(query)
+            if key is not None:
+                record = self.offline_index.get(key) if key else None
+            else:
+                records = self.offline_index.search(query, limit=1)
+                record = records[0] if records else None
+            return self.offline_index.to_bibtex(record) if record else None
+
+        except Exception as e:
+            self.logger.error(f"Error reading local DBLP index: {str(e)}")
+            return None
+
+    async def async_search_publications(self, query: str, limit: int = 5) -> List[Dict]:
+        """
+        Asynchronously search for publications in DBLP.
+
+        Args:
+            query: Search query
+            limit: Maximum number of results to return
+
+        Returns:
+            List[Dict]: List of publication metadata
+        """
+        return await asyncio.to_thread(self.search_publications, query, limit)
+
     def _extract_authors(self, authors_data: Dict) -> List[str]:
         """Extract author names from DBLP author data structure."""
         if not authors_data:
@@ -1,7 +1,14 @@
+import time
 from typing import Dict, List, Optional
 from tqdm import tqdm
 from serpapi import GoogleSearch
 from .meta_class import BibTexFetcher
+from .utils.cancellation import check_cancelled
+from .utils.deadline import DeadlineExceeded, is_deadline_timeout, request_timeout
+from .utils.metrics import ENDPOINT_SEARCH
+from .utils.query import coalesce_queries
+
+SERPAPI_URL = "https://serpapi.com/search"
 
 class GoogleScholarBibTeX(BibTexFetcher):
     """
@@ -11,14 +18,16 @@ class GoogleScholarBibTeX(BibTexFetcher):
     Requires a SerpAPI key for accessing Google Scholar data.
     """
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, **kwargs):
         """
         Initialize Google Scholar BibTeX fetcher.
 
         Args:
             api_key: SerpAPI key for accessing Google Scholar
+            **kwargs: Options forwarded to BibTexFetcher (session_pool,
+                max_concurrency, ...)
         """
-        super().__init__(api_key)
+        super().__init__(api_key, **kwargs)
         if not api_key:
             raise ValueError("SerpAPI key is required for Google Scholar access")
 
@@ -26,6 +35,10 @@ class GoogleScholarBibTeX(BibTexFetcher):
         """
         Get BibTeX citation from Google Scholar.
         """
+        return self._cached('bibtex', query, lambda: self._fetch_bibtex(query))
+
+    def _fetch_bibtex(self, query: str) -> Optional[str]:
+        """Get BibTeX citation from Google Scholar without consulting the cache."""
         try:
             # 直接搜索论文
             search_params = {
@@ -35,8 +48,7 @@ class GoogleScholarBibTeX(BibTexFetcher):
                 "hl": "en"  # 使用英文界面
             }
             
-            search = GoogleSearch(search_params)
-            results = search.get_dict()
+            results = self._search(search_params)
             if "organic_results" not in results or not results["organic_results"]:
                 self.logger.error("No results found")
                 return None
@@ -119,6 +131,48 @@ class GoogleScholarBibTeX(BibTexFetcher):
             print(f"Debug - Exception details: {str(e)}")
             return None
 
+    def _search(self, search_params: Dict) -> Dict:
+        """
+        Run a SerpAPI search, waiting for the rate limiter first and
+        reporting the outcome to the request listeners and ``metrics``. Like
+        ``_get``, the request's timeouts are capped by the current deadline.
+
+        Args:
+            search_params: SerpAPI search parameters
+
+        Returns:
+            Dict: SerpAPI response
+        """
+        # Google Scholar 限流更严格，请求前先等待令牌
+        self._acquire_rate_limit(SERPAPI_URL)
+        check_cancelled()
+        search = GoogleSearch(search_params)
+        search.timeout = request_timeout()
+        start = time.monotonic()
+        try:
+            results = search.get_dict()
+        except Exception as e:
+            elapsed = time.monotonic() - start
+            self.metrics.record_request(ENDPOINT_SEARCH, elapsed, error=e)
+            self._notify_request(SERPAPI_URL, None, e, elapsed)
+            if is_deadline_timeout(e):
+                raise DeadlineExceeded("Query deadline exceeded") from e
+            self._record_transient_failure(str(e))
+            raise
+
+        # 没有搜索结果不算失败，其他错误（如额度用尽）算失败
+        message = results.get('error')
+        error = None
+        if message and "hasn't returned any results" not in message:
+            error = RuntimeError(message)
+        # SerpAPI 客户端不暴露原始响应，无法统计传输字节数
+        elapsed = time.monotonic() - start
+        self.metrics.record_request(ENDPOINT_SEARCH, elapsed, error=error)
+        self._notify_request(SERPAPI_URL, None, error, elapsed)
+        if error is not None:
+            self._record_transient_failure(message)
+        return results
+
     def _get_entry_type(self, paper: Dict) -> str:
         """
         根据论文类型确定 BibTeX 条目类型
@@ -152,23 +206,23 @@ class GoogleScholarBibTeX(BibTexFetcher):
         """
         Fetch multiple BibTeX citations from Google Scholar.
 
+        Queries that differ only in case, whitespace or a DOI prefix are
+        fetched once.
+
         Args:
             queries: List of search queries
 
         Returns:
             Dict[str, Optional[str]]: Dictionary mapping queries to their BibTeX citations
         """
+        representatives = coalesce_queries(queries)
         results = {}
         
-        for query in tqdm(queries, desc="Fetching from Google Scholar"):
+        for query in tqdm(dict.fromkeys(representatives.values()), desc="Fetching from Google Scholar"):
             bibtex = self.get_bibtex(query)
             results[query] = bibtex
-            
-            # Add delay to comply with rate limits
-            import time
-            time.sleep(2)  # Google Scholar is more strict about rate limiting
-        
-        return results
+
+        return {query: results[representatives[query]] for query in queries}
 
     def search_papers(self, query: str, limit: int = 5) -> List[Dict]:
         """
@@ -182,8 +236,7 @@ class GoogleScholarBibTeX(BibTexFetcher):
                 "num": str(limit)  # SerpAPI 需要字符串类型的参数
             }
             
-            search = GoogleSearch(search_params)
-            results = search.get_dict()
+            results = self._search(search_params)
             
             if "organic_results" not in results:
                 return []
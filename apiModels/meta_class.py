@@ -1,8 +1,27 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, FrozenSet, List, Callable, Tuple
 from abc import ABC, abstractmethod
+import asyncio
+import contextvars
 import logging
+import threading
+import time
 from pathlib import Path
 
+import requests
+
+from .utils.cache import MemoryCache, SQLiteCache, normalize_query
+from .utils.cancellation import check_cancelled, sleep_cancellable
+from .utils.concurrency import gather_limited
+from .utils.deadline import (
+    DeadlineExceeded, current_deadline, is_deadline_timeout, request_timeout
+)
+from .utils.metrics import ENDPOINT_SEARCH, FetcherMetrics
+from .utils.query import coalesce_queries
+from .utils.rate_limit import RateLimiter, get_default_rate_limiter
+from .utils.retry import RetryPolicy
+from .utils.session import SessionPool, get_default_session_pool
+from .utils.singleflight import SingleFlight
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -10,21 +29,74 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 当前查找中出现的临时故障（连接错误、429/5xx），此类未命中不写入负缓存
+_transient_failures: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar(
+    'bibtex_transient_failures', default=None
+)
+
 class BibTexFetcher(ABC):
     """
     Abstract base class for fetching BibTeX citations from various sources.
     
     This class defines the interface that all BibTeX fetchers must implement.
     """
+
+    # 可直接查找（无需搜索）的标识符类型，见 utils.query.classify_query
+    direct_identifiers: FrozenSet[str] = frozenset()
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        session_pool: Optional[SessionPool] = None,
+        max_concurrency: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[SQLiteCache] = None,
+        memo_size: int = 1024,
+        negative_ttl: Optional[float] = 300,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
         """
         Initialize the BibTeX fetcher.
 
         Args:
             api_key: Optional API key for services that require authentication
+            session_pool: Optional connection pool for HTTP requests; the
+                process-wide shared pool is used if not given
+            max_concurrency: Maximum number of lookups that concurrent batch
+                workflows may run against this fetcher at the same time
+            rate_limiter: Optional per-host rate limiter; the process-wide
+                shared limiter is used if not given
+            cache: Optional persistent response cache; successful lookups
+                are stored and served from it without network calls, and
+                misses are remembered for the cache's ``negative_ttl`` unless
+                negative caching is disabled here
+            memo_size: Number of successful lookups remembered in memory,
+                0 disables the in-process memo
+            negative_ttl: Seconds a lookup that found nothing is remembered
+                as a miss, None or 0 disables negative caching; misses caused
+                by connection errors or 429/5xx responses are not remembered
+            retry_policy: Policy for retrying 429/5xx responses and
+                connection errors; a default ``RetryPolicy`` if not given,
+                ``RetryPolicy(attempts=1)`` disables retries
         """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+
         self.api_key = api_key
+        self.session_pool = session_pool or get_default_session_pool()
+        self.max_concurrency = max_concurrency
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.rate_limiter = rate_limiter or get_default_rate_limiter()
+        self.cache = cache
+        self.memo = MemoryCache(maxsize=memo_size)
+        self.negative_ttl = negative_ttl
+        self.negative_cache = MemoryCache(
+            maxsize=memo_size if negative_ttl else 0, ttl=negative_ttl
+        )
+        self.flights = SingleFlight()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.metrics = FetcherMetrics(self.__class__.__name__)
+        self._request_listeners: List[Callable[..., None]] = []
         self.logger = logging.getLogger(self.__class__.__name__)
 
     @abstractmethod
@@ -53,6 +125,46 @@ class BibTexFetcher(ABC):
         """
         pass
 
+    async def async_get_bibtex(self, query: str) -> Optional[str]:
+        """
+        Asynchronously fetch BibTeX citation for a given query.
+
+        Args:
+            query: Search query (DOI, title, or other identifier)
+
+        Returns:
+            Optional[str]: BibTeX citation if found, None otherwise
+        """
+        return await asyncio.to_thread(self.get_bibtex, query)
+
+    async def async_get_multiple_bibtex(
+        self,
+        queries: List[str],
+        concurrency: int = 10
+    ) -> Dict[str, Optional[str]]:
+        """
+        Asynchronously fetch multiple BibTeX citations, running up to
+        ``concurrency`` lookups at the same time. Queries that differ only in
+        case, whitespace or a DOI prefix are fetched once.
+
+        Args:
+            queries: List of search queries
+            concurrency: Maximum number of lookups in flight
+
+        Returns:
+            Dict[str, Optional[str]]: Dictionary mapping queries to their BibTeX citations
+        """
+        representatives = coalesce_queries(queries)
+        unique = list(dict.fromkeys(representatives.values()))
+        bibtexs = await gather_limited(
+            self.get_bibtex,
+            unique,
+            concurrency,
+            desc=f"Fetching from {self.__class__.__name__}"
+        )
+        results = dict(zip(unique, bibtexs))
+        return {query: results[representatives[query]] for query in queries}
+
     def save_bibtex(self, bibtex: str, output_path: str) -> bool:
         """
         Save BibTeX citation to a file.
@@ -76,6 +188,269 @@ class BibTexFetcher(ABC):
             self.logger.error(f"Error saving BibTeX: {str(e)}")
             return False
 
+    def add_request_listener(
+        self,
+        listener: Callable[[str, Optional[int], Optional[BaseException], float], None]
+    ) -> None:
+        """
+        Register a function called after every upstream request.
+
+        The listener receives the URL, the HTTP status code (None if no
+        response was received), the exception raised (if any) and the
+        duration in seconds, e.g. ``CircuitBreaker.on_request``.
+
+        Args:
+            listener: Function to call
+        """
+        self._request_listeners.append(listener)
+
+    def _notify_request(
+        self,
+        url: str,
+        status: Optional[int],
+        error: Optional[BaseException],
+        elapsed: float
+    ) -> None:
+        """Report the outcome of an upstream request to the listeners."""
+        for listener in self._request_listeners:
+            try:
+                listener(url, status, error, elapsed)
+            except Exception as e:
+                self.logger.error(f"Error in request listener: {str(e)}")
+
+    def _get(self, url: str, endpoint: str = ENDPOINT_SEARCH, **kwargs) -> requests.Response:
+        """
+        Send a GET request through the fetcher's pooled keep-alive session,
+        waiting for the host's rate limiter first, and report its outcome to
+        the request listeners. Connect and read timeouts are capped by the
+        deadline of the surrounding ``deadline_scope``. 429/5xx responses
+        and connection errors are retried according to ``retry_policy``
+        while the deadline leaves time for the wait. Raises
+        ``LookupCancelled`` instead if the lookup has been cancelled, and
+        ``DeadlineExceeded`` if its deadline passes first. Every attempt is
+        recorded in ``metrics``.
+
+        Args:
+            url: Request URL
+            endpoint: Endpoint kind for the latency metrics, ``'search'`` or
+                ``'transform'``
+            **kwargs: Extra arguments passed to ``requests.Session.get``
+
+        Returns:
+            requests.Response: Response object, the last one if all
+                attempts failed
+        """
+        fixed_timeout = 'timeout' in kwargs
+        retry = 0
+        while True:
+            check_cancelled()
+            self._acquire_rate_limit(url)
+            check_cancelled()
+            if not fixed_timeout:
+                kwargs['timeout'] = request_timeout()
+            start = time.monotonic()
+            try:
+                response = self.session_pool.get(url, **kwargs)
+            except Exception as e:
+                elapsed = time.monotonic() - start
+                self.metrics.record_request(endpoint, elapsed, error=e)
+                self._notify_request(url, None, e, elapsed)
+                if is_deadline_timeout(e):
+                    raise DeadlineExceeded("Query deadline exceeded") from e
+                delay = self.retry_policy.delay(retry)
+                if not (self._should_retry(retry, None, e) and self._can_wait(delay)):
+                    self._record_transient_failure(str(e))
+                    raise
+                self._wait_for_retry(url, retry, delay, str(e))
+                retry += 1
+                continue
+
+            elapsed = time.monotonic() - start
+            self.metrics.record_request(
+                endpoint, elapsed, response.status_code, size=len(response.content or b'')
+            )
+            self._notify_request(url, response.status_code, None, elapsed)
+            self.rate_limiter.update_from_headers(url, response.headers)
+            if not self._should_retry(retry, response.status_code, None):
+                if self.retry_policy.is_retryable(response.status_code):
+                    self._record_transient_failure(f"status {response.status_code}")
+                return response
+            delay = self.retry_policy.delay(retry, response.headers)
+            if not self._can_wait(delay):
+                self._record_transient_failure(f"status {response.status_code}")
+                return response
+            self._wait_for_retry(url, retry, delay, f"status {response.status_code}")
+            retry += 1
+
+    def _should_retry(
+        self,
+        retry: int,
+        status: Optional[int],
+        error: Optional[BaseException]
+    ) -> bool:
+        """Check whether a failed attempt is transient and attempts are left."""
+        return (
+            retry + 1 < self.retry_policy.attempts
+            and self.retry_policy.is_retryable(status, error)
+        )
+
+    def _can_wait(self, delay: float) -> bool:
+        """Check whether a retry wait fits the policy and the current deadline."""
+        if delay > self.retry_policy.max_wait:
+            return False
+        deadline = current_deadline()
+        return deadline is None or delay < deadline.remaining()
+
+    def _wait_for_retry(
+        self,
+        url: str,
+        retry: int,
+        delay: float,
+        reason: str
+    ) -> None:
+        """
+        Count a retry and sleep before it.
+
+        Args:
+            url: Request URL
+            retry: Number of retries already made
+            delay: Seconds to wait
+            reason: Why the attempt failed, for the log
+        """
+        self.metrics.record_retry()
+        self.logger.warning(
+            f"Retrying {url} in {delay:.2f}s after {reason} "
+            f"(attempt {retry + 2}/{self.retry_policy.attempts})"
+        )
+        sleep_cancellable(delay)
+
+    def _acquire_rate_limit(self, url: str) -> None:
+        """
+        Wait for the host's rate limiter, but not past the current deadline.
+
+        Args:
+            url: Request URL
+        """
+        deadline = current_deadline()
+        if deadline is None:
+            self.rate_limiter.acquire(url)
+            return
+        try:
+            self.rate_limiter.acquire(url, timeout=deadline.remaining())
+        except TimeoutError as e:
+            raise DeadlineExceeded("Query deadline exceeded while rate limited") from e
+
+    def _cached(self, kind: str, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Serve a lookup from the in-memory memo, the negative cache or the
+        persistent cache, calling ``loader`` only when none of them knows it.
+        Concurrent identical lookups share a single ``loader`` call. Cache
+        hits and misses are recorded in ``metrics``, as is the outcome of
+        ``'bibtex'`` lookups.
+
+        Args:
+            kind: Lookup type, e.g. ``'bibtex'`` or ``'search'``
+            key: Query identifying the lookup
+            loader: Function performing the actual lookup
+
+        Returns:
+            Any: Cached or freshly loaded value
+        """
+        hit, value = self._lookup_cached(kind, key)
+        if hit:
+            self.metrics.record_cache(True)
+        else:
+            value = self.flights.do(
+                (kind, normalize_query(key)), lambda: self._load(kind, key, loader)
+            )
+        if kind == 'bibtex':
+            self.metrics.record_lookup(bool(value))
+        return value
+
+    def _load(self, kind: str, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Run ``loader`` for a lookup no cache knows and store its result.
+
+        A miss is not negative-cached if any request of the lookup failed
+        with a transport error or a 429/5xx response, since the source may
+        well know the answer once it recovers.
+        """
+        # 等待期间可能已有同样的查询完成并写入缓存
+        hit, value = self._lookup_cached(kind, key)
+        self.metrics.record_cache(hit)
+        if hit:
+            return value
+
+        failures: List[str] = []
+        token = _transient_failures.set(failures)
+        try:
+            value = loader()
+        finally:
+            _transient_failures.reset(token)
+        if value or not failures:
+            self._store_cached(kind, key, value)
+        else:
+            self.logger.debug(f"Not caching miss for {key!r} after {failures[-1]}")
+        return value
+
+    @staticmethod
+    def _record_transient_failure(reason: str) -> None:
+        """Mark the current lookup as failed for a transient reason."""
+        failures = _transient_failures.get()
+        if failures is not None:
+            failures.append(reason)
+
+    def _lookup_cached(self, kind: str, key: str) -> Tuple[bool, Any]:
+        """
+        Look up a value in the memo, negative cache and persistent cache.
+
+        Args:
+            kind: Lookup type, e.g. ``'bibtex'`` or ``'search'``
+            key: Query identifying the lookup
+
+        Returns:
+            Tuple[bool, Any]: Whether any cache knows the lookup, and the
+                cached value (None for a remembered miss)
+        """
+        memo_key = (kind, normalize_query(key))
+        value = self.memo.get(memo_key)
+        if value is not None:
+            return True, value
+        if memo_key in self.negative_cache:
+            return True, None
+
+        if self.cache is not None:
+            source = f"{self.__class__.__name__}:{kind}"
+            value = self.cache.get(source, key)
+            if value is not None:
+                self.memo.set(memo_key, value)
+                return True, value
+            if self.negative_ttl and self.cache.is_miss(source, key):
+                self.negative_cache.set(memo_key, True)
+                return True, None
+
+        return False, None
+
+    def _store_cached(self, kind: str, key: str, value: Any) -> None:
+        """
+        Remember a lookup result; empty results go to the negative cache
+        and are recorded as misses in the persistent cache.
+
+        Args:
+            kind: Lookup type, e.g. ``'bibtex'`` or ``'search'``
+            key: Query identifying the lookup
+            value: Lookup result
+        """
+        memo_key = (kind, normalize_query(key))
+        if value:
+            self.memo.set(memo_key, value)
+            if self.cache is not None:
+                self.cache.set(f"{self.__class__.__name__}:{kind}", key, value)
+        else:
+            self.negative_cache.set(memo_key, True)
+            if self.cache is not None and self.negative_ttl:
+                self.cache.set_miss(f"{self.__class__.__name__}:{kind}", key)
+
     def _validate_response(self, response: Any) -> bool:
         """
         Validate API response.
@@ -0,0 +1,7 @@
+from .crossref_index import CrossRefIndex
+from .dblp_index import DBLPIndex
+
+__all__ = [
+    'CrossRefIndex',
+    'DBLPIndex'
+]
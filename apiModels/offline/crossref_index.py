@@ -0,0 +1,180 @@
+import gzip
+import json
+import logging
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, IO, Iterator, List, Optional, Union
+
+from ..utils.bibtex import CROSSREF_FIELDS, crossref_to_bibtex
+from ..utils.cache import normalize_title
+
+logger = logging.getLogger(__name__)
+
+
+class CrossRefIndex:
+    """
+    Local, on-disk index of a CrossRef metadata snapshot.
+
+    The snapshot (gzipped JSON lines, one work or one ``{"items": [...]}``
+    page per line) is ingested in a single streaming pass into a SQLite
+    database mapping each lowercase DOI to a compressed record trimmed to the
+    fields needed for BibTeX, plus a normalized-title index. BibTeX is
+    rendered locally instead of calling ``/works/{doi}/transform``.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open or create an index.
+
+        Args:
+            path: Path of the SQLite index file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS works ('
+            ' doi TEXT PRIMARY KEY,'
+            ' norm_title TEXT,'
+            ' data BLOB NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS works_norm_title ON works (norm_title)'
+        )
+        self._conn.commit()
+
+    def ingest(self, source: Union[str, IO[bytes]], batch_size: int = 10000) -> int:
+        """
+        Stream a snapshot file into the index.
+
+        Args:
+            source: Path of a ``.jsonl``/``.jsonl.gz`` file or a binary file object
+            batch_size: Number of works written per transaction
+
+        Returns:
+            int: Number of works ingested
+        """
+        batch = []
+        count = 0
+        stream = self._open(source)
+        try:
+            for item in self._iter_items(stream):
+                doi = item.get('DOI')
+                if not doi:
+                    continue
+                compact = {field: item[field] for field in CROSSREF_FIELDS if field in item}
+                title = (item.get('title') or [None])[0]
+                batch.append((
+                    doi.lower(),
+                    normalize_title(title) if title else None,
+                    zlib.compress(json.dumps(compact, separators=(',', ':')).encode('utf-8'))
+                ))
+                if len(batch) >= batch_size:
+                    self._write_batch(batch)
+                    count += len(batch)
+                    batch = []
+        finally:
+            if stream is not source:
+                stream.close()
+
+        if batch:
+            self._write_batch(batch)
+            count += len(batch)
+        logger.info(f"Ingested {count} CrossRef works into {self.path}")
+        return count
+
+    def get(self, doi: str) -> Optional[Dict]:
+        """
+        Look up a work by DOI.
+
+        Args:
+            doi: DOI, case-insensitive
+
+        Returns:
+            Optional[Dict]: Work metadata in CrossRef's format
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM works WHERE doi = ?', (doi.strip().lower(),)
+            ).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def search_title(self, title: str, limit: int = 5) -> List[Dict]:
+        """
+        Look up works whose normalized title equals the given title.
+
+        Args:
+            title: Title to look up
+            limit: Maximum number of works to return
+
+        Returns:
+            List[Dict]: Matching works in CrossRef's format
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT data FROM works WHERE norm_title = ? LIMIT ?',
+                (normalize_title(title), limit)
+            ).fetchall()
+        return [self._decode(row[0]) for row in rows]
+
+    def to_bibtex(self, item: Dict) -> Optional[str]:
+        """
+        Render a work as BibTeX.
+
+        Args:
+            item: Work returned by ``get`` or ``search_title``
+
+        Returns:
+            Optional[str]: BibTeX entry
+        """
+        return crossref_to_bibtex(item)
+
+    def close(self) -> None:
+        """Close the index database."""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM works').fetchone()[0]
+
+    def _write_batch(self, rows: List[tuple]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO works (doi, norm_title, data) VALUES (?, ?, ?)',
+                rows
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _iter_items(stream: IO[bytes]) -> Iterator[Dict]:
+        """Yield works from JSON lines holding either a work or a page of items."""
+        for number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping unreadable snapshot line {number}")
+                continue
+            data = data.get('message', data)
+            if 'items' in data:
+                yield from data['items']
+            else:
+                yield data
+
+    @staticmethod
+    def _open(source: Union[str, IO[bytes]]) -> IO[bytes]:
+        if not isinstance(source, (str, Path)):
+            return source
+        if str(source).endswith('.gz'):
+            return gzip.open(source, 'rb')
+        return open(source, 'rb')
+
+    @staticmethod
+    def _decode(data: bytes) -> Dict:
+        return json.loads(zlib.decompress(data).decode('utf-8'))
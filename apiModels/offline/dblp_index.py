@@ -0,0 +1,339 @@
+import gzip
+import html.entities
+import json
+import logging
+import re
+import sqlite3
+import threading
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Callable, Dict, IO, List, Optional, Union
+
+from ..utils.bibtex import format_bibtex, latex_escape
+from ..utils.cache import normalize_title
+
+logger = logging.getLogger(__name__)
+
+# DBLP 中表示出版物的记录类型
+RECORD_TYPES = {
+    'article', 'inproceedings', 'proceedings', 'book', 'incollection',
+    'phdthesis', 'mastersthesis'
+}
+
+# DBLP 字段在 BibTeX 中的输出顺序
+BIBTEX_FIELDS = [
+    'author', 'editor', 'title', 'booktitle', 'journal', 'volume', 'number',
+    'pages', 'publisher', 'series', 'school', 'year', 'isbn', 'url', 'doi'
+]
+
+_HOMONYM_SUFFIX = re.compile(r'\s+\d{4}$')
+
+
+class _DblpTarget:
+    """ElementTree parser target that emits one dict per DBLP record."""
+
+    def __init__(self, on_record: Callable[[Dict], None]):
+        self.on_record = on_record
+        self.record: Optional[Dict] = None
+        self.field: Optional[str] = None
+        self.depth = 0
+        self.buffer: List[str] = []
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        if self.record is None:
+            if tag in RECORD_TYPES:
+                self.record = {'type': tag, 'key': attrib.get('key'), 'fields': []}
+        elif self.field is None:
+            self.field = tag
+            self.depth = 0
+            self.buffer = []
+        else:
+            # 标题中的 <i>、<sub> 等内联标记，只保留文本
+            self.depth += 1
+
+    def end(self, tag: str) -> None:
+        if self.record is None:
+            return
+        if self.field is not None:
+            if self.depth:
+                self.depth -= 1
+                return
+            self.record['fields'].append((self.field, ' '.join(''.join(self.buffer).split())))
+            self.field = None
+        elif tag == self.record['type']:
+            if self.record['key']:
+                self.on_record(self.record)
+            self.record = None
+
+    def data(self, data: str) -> None:
+        if self.field is not None:
+            self.buffer.append(data)
+
+    def close(self) -> None:
+        pass
+
+
+class DBLPIndex:
+    """
+    Local, on-disk index of the DBLP XML dump.
+
+    The dump (``dblp.xml`` or ``dblp.xml.gz``) is ingested in a single
+    streaming pass with bounded memory into a SQLite database holding every
+    record by key, an exact normalized-title index and, when SQLite supports
+    it, an FTS5 full-text index over titles. BibTeX is rendered locally.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open or create an index.
+
+        Args:
+            path: Path of the SQLite index file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS records ('
+            ' id INTEGER PRIMARY KEY,'
+            ' key TEXT UNIQUE NOT NULL,'
+            ' type TEXT NOT NULL,'
+            ' title TEXT,'
+            ' norm_title TEXT,'
+            ' fields TEXT NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS records_norm_title ON records (norm_title)'
+        )
+        try:
+            self._conn.execute(
+                'CREATE VIRTUAL TABLE IF NOT EXISTS titles USING fts5('
+                ' title, content=records, content_rowid=id)'
+            )
+            self.full_text = True
+        except sqlite3.OperationalError:
+            logger.warning("SQLite has no FTS5 support, falling back to exact title lookup")
+            self.full_text = False
+        self._conn.commit()
+
+    def ingest(self, source: Union[str, IO[bytes]], batch_size: int = 10000) -> int:
+        """
+        Stream a DBLP XML dump into the index.
+
+        Entities such as ``&uuml;`` from ``dblp.dtd`` are resolved without
+        reading the DTD, so only the dump itself is needed.
+
+        Args:
+            source: Path of ``dblp.xml``/``dblp.xml.gz`` or a binary file object
+            batch_size: Number of records written per transaction
+
+        Returns:
+            int: Number of records ingested
+        """
+        batch: List[Dict] = []
+        count = 0
+
+        def on_record(record: Dict) -> None:
+            nonlocal count
+            batch.append(record)
+            if len(batch) >= batch_size:
+                self._write_batch(batch)
+                count += len(batch)
+                batch.clear()
+
+        parser = ET.XMLParser(target=_DblpTarget(on_record))
+        parser.entity.update(
+            (name, chr(codepoint))
+            for name, codepoint in html.entities.name2codepoint.items()
+        )
+
+        stream = self._open(source)
+        try:
+            for chunk in iter(lambda: stream.read(1 << 20), b''):
+                parser.feed(chunk)
+            parser.close()
+        finally:
+            if stream is not source:
+                stream.close()
+
+        if batch:
+            self._write_batch(batch)
+            count += len(batch)
+        logger.info(f"Ingested {count} DBLP records into {self.path}")
+        return count
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a record by DBLP key.
+
+        Args:
+            key: DBLP key, e.g. ``'conf/naacl/DevlinCLT19'``
+
+        Returns:
+            Optional[Dict]: Record with ``type``, ``key`` and ``fields``
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT type, key, fields FROM records WHERE key = ?', (key,)
+            ).fetchone()
+        return self._to_record(row) if row else None
+
+    def search(self, query: str, limit: int = 5) -> List[Dict]:
+        """
+        Search records by title, exact normalized matches first.
+
+        Args:
+            query: Title or title words
+            limit: Maximum number of records to return
+
+        Returns:
+            List[Dict]: Matching records
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT type, key, fields FROM records WHERE norm_title = ? LIMIT ?',
+                (normalize_title(query), limit)
+            ).fetchall()
+
+            terms = re.findall(r'\w+', query.lower())
+            if len(rows) < limit and self.full_text and terms:
+                match = ' '.join(f'"{term}"' for term in terms)
+                seen = {row[1] for row in rows}
+                more = self._conn.execute(
+                    'SELECT r.type, r.key, r.fields FROM titles'
+                    ' JOIN records r ON r.id = titles.rowid'
+                    ' WHERE titles MATCH ? ORDER BY rank LIMIT ?',
+                    (match, limit)
+                ).fetchall()
+                rows += [row for row in more if row[1] not in seen][:limit - len(rows)]
+
+        return [self._to_record(row) for row in rows]
+
+    def to_bibtex(self, record: Dict) -> str:
+        """
+        Render a record as BibTeX in DBLP's style.
+
+        Args:
+            record: Record returned by ``get`` or ``search``
+
+        Returns:
+            str: BibTeX entry
+        """
+        values = _group_fields(record)
+        fields = {
+            'author': ' and '.join(_HOMONYM_SUFFIX.sub('', a) for a in values.get('author', [])),
+            'editor': ' and '.join(_HOMONYM_SUFFIX.sub('', e) for e in values.get('editor', [])),
+        }
+        for name in BIBTEX_FIELDS:
+            if name not in fields and values.get(name):
+                fields[name] = values[name][0]
+        if fields.get('title'):
+            # DBLP 标题以句点结尾，BibTeX 中去掉
+            fields['title'] = fields['title'].rstrip('.')
+
+        links = values.get('ee', [])
+        doi_links = [link for link in links if 'doi.org/' in link]
+        if doi_links:
+            fields['doi'] = doi_links[0].split('doi.org/', 1)[1]
+        fields['url'] = links[0] if links else None
+        for name, value in fields.items():
+            if value and name not in ('url', 'doi'):
+                fields[name] = latex_escape(value)
+
+        return format_bibtex(
+            record['type'],
+            f"DBLP:{record['key']}",
+            ((name, fields.get(name)) for name in BIBTEX_FIELDS)
+        )
+
+    def to_publication(self, record: Dict) -> Dict:
+        """
+        Convert a record to the dict format of ``DBLPBibTeX.search_publications``.
+
+        Args:
+            record: Record returned by ``get`` or ``search``
+
+        Returns:
+            Dict: Publication metadata
+        """
+        values = _group_fields(record)
+
+        def first(name: str) -> Optional[str]:
+            return values[name][0] if values.get(name) else None
+
+        doi_links = [link for link in values.get('ee', []) if 'doi.org/' in link]
+        return {
+            'title': first('title'),
+            'authors': values.get('author', []),
+            'year': first('year'),
+            'venue': first('journal') or first('booktitle'),
+            'type': record['type'],
+            'key': record['key'],
+            'doi': doi_links[0].split('doi.org/', 1)[1] if doi_links else None,
+            'url': first('ee')
+        }
+
+    def close(self) -> None:
+        """Close the index database."""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def _write_batch(self, records: List[Dict]) -> None:
+        """Write a batch of records and their title index entries."""
+        with self._lock:
+            for record in records:
+                title = next((v for n, v in record['fields'] if n == 'title'), None)
+                old = self._conn.execute(
+                    'SELECT id, title FROM records WHERE key = ?', (record['key'],)
+                ).fetchone()
+                if old and self.full_text:
+                    self._conn.execute(
+                        "INSERT INTO titles(titles, rowid, title) VALUES ('delete', ?, ?)",
+                        old
+                    )
+                cursor = self._conn.execute(
+                    'INSERT OR REPLACE INTO records (key, type, title, norm_title, fields)'
+                    ' VALUES (?, ?, ?, ?, ?)',
+                    (
+                        record['key'],
+                        record['type'],
+                        title,
+                        normalize_title(title) if title else None,
+                        json.dumps(record['fields'], ensure_ascii=False)
+                    )
+                )
+                if self.full_text and title:
+                    self._conn.execute(
+                        'INSERT INTO titles (rowid, title) VALUES (?, ?)',
+                        (cursor.lastrowid, title)
+                    )
+            self._conn.commit()
+
+    @staticmethod
+    def _open(source: Union[str, IO[bytes]]) -> IO[bytes]:
+        if not isinstance(source, (str, Path)):
+            return source
+        if str(source).endswith('.gz'):
+            return gzip.open(source, 'rb')
+        return open(source, 'rb')
+
+    @staticmethod
+    def _to_record(row) -> Dict:
+        return {
+            'type': row[0],
+            'key': row[1],
+            'fields': [tuple(field) for field in json.loads(row[2])]
+        }
+
+
+def _group_fields(record: Dict) -> Dict[str, List[str]]:
+    """Group a record's repeated fields, e.g. all authors, by name."""
+    values: Dict[str, List[str]] = {}
+    for name, value in record['fields']:
+        values.setdefault(name, []).append(value)
+    return values
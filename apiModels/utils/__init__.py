@@ -0,0 +1,35 @@
+from .cache import MemoryCache, SQLiteCache, normalize_query, normalize_title
+from .circuit_breaker import CircuitBreaker
+from .deadline import Deadline, DeadlineExceeded, deadline_scope
+from .dedupe import DedupeIndex
+from .journal import JobJournal
+from .metrics import FetcherMetrics, to_prometheus
+from .query import canonicalize_query, classify_query, coalesce_queries
+from .rate_limit import RateLimiter, TokenBucket, get_default_rate_limiter
+from .retry import RetryPolicy
+from .session import SessionPool, get_default_session_pool, set_default_session_pool
+
+__all__ = [
+    'CircuitBreaker',
+    'Deadline',
+    'DeadlineExceeded',
+    'deadline_scope',
+    'DedupeIndex',
+    'JobJournal',
+    'FetcherMetrics',
+    'to_prometheus',
+    'MemoryCache',
+    'SQLiteCache',
+    'normalize_query',
+    'normalize_title',
+    'canonicalize_query',
+    'classify_query',
+    'coalesce_queries',
+    'RateLimiter',
+    'TokenBucket',
+    'get_default_rate_limiter',
+    'RetryPolicy',
+    'SessionPool',
+    'get_default_session_pool',
+    'set_default_session_pool'
+]
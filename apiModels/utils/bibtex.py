@@ -0,0 +1,455 @@
+import html
+import logging
+import re
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# CrossRef 作品类型到 BibTeX 条目类型的映射
+CROSSREF_ENTRY_TYPES = {
+    'journal-article': 'article',
+    'proceedings-article': 'inproceedings',
+    'book-chapter': 'incollection',
+    'book-section': 'incollection',
+    'book-part': 'incollection',
+    'book': 'book',
+    'monograph': 'book',
+    'edited-book': 'book',
+    'reference-book': 'book',
+    'proceedings': 'proceedings',
+    'dissertation': 'phdthesis',
+    'report': 'techreport',
+}
+
+# 本地渲染 CrossRef BibTeX 需要的元数据字段
+CROSSREF_FIELDS = [
+    'DOI', 'type', 'title', 'author', 'editor', 'container-title', 'volume',
+    'issue', 'page', 'published', 'issued', 'publisher', 'ISSN', 'ISBN', 'URL'
+]
+
+# CrossRef 元数据中的内联 HTML/JATS 标签对应的 LaTeX 命令，其他带命名空间的标签直接去掉
+_MARKUP_COMMANDS = {
+    'i': r'\textit', 'em': r'\emph', 'italic': r'\textit',
+    'b': r'\textbf', 'strong': r'\textbf', 'bold': r'\textbf',
+    'sub': r'\textsubscript', 'sup': r'\textsuperscript',
+    'scp': r'\textsc', 'sc': r'\textsc', 'tt': r'\texttt', 'monospace': r'\texttt',
+}
+# 只识别已知的标签和带命名空间的 JATS/MathML 标签，其余的 < > 是普通文本（如 p<q）
+_MARKUP_TAG = re.compile(
+    r'<(/?)(?:[A-Za-z][\w.-]*:([A-Za-z][\w.-]*)|('
+    + '|'.join(sorted(_MARKUP_COMMANDS, key=len, reverse=True))
+    + r'))(?![\w.:-])[^<>]*?(/?)>',
+    re.IGNORECASE
+)
+# 未转义的 LaTeX 特殊字符
+_LATEX_SPECIALS = re.compile(r'(?<!\\)([&%#_])')
+_ANGLE_BRACKETS = re.compile(r'[<>]')
+_ANGLE_COMMANDS = {'<': r'\textless{}', '>': r'\textgreater{}'}
+
+
+def format_bibtex(
+    entry_type: str,
+    key: str,
+    fields: Iterable[Tuple[str, Optional[str]]]
+) -> str:
+    """
+    Render a BibTeX entry from its type, citation key and fields.
+
+    Empty fields are skipped, and field names are aligned like DBLP's output.
+    Values are inserted as they are, so callers pass LaTeX-safe text (see
+    ``latex_escape``); only unbalanced braces are repaired, since a stray
+    ``}`` would end the field early.
+
+    Args:
+        entry_type: Entry type, e.g. ``'article'`` or ``'inproceedings'``
+        key: Citation key
+        fields: ``(name, value)`` pairs in output order
+
+    Returns:
+        str: BibTeX entry
+    """
+    lines = [
+        f"  {name:<12} = {{{balance_braces(value)}}}"
+        for name, value in fields
+        if value
+    ]
+    return f"@{entry_type}{{{key},\n" + ",\n".join(lines) + "\n}"
+
+
+def latex_escape(text: str) -> str:
+    """
+    Turn plain metadata text into a LaTeX-safe BibTeX field value.
+
+    HTML entities are decoded, inline HTML/JATS markup such as ``<i>`` or
+    ``<sub>`` becomes the matching LaTeX command (namespaced tags, e.g.
+    MathML, are dropped but keep their text), unescaped ``& % # _`` are
+    escaped and any other ``<`` or ``>`` becomes ``\\textless{}`` or
+    ``\\textgreater{}``.
+    Other TeX syntax such as ``$...$`` is left alone.
+
+    Args:
+        text: Metadata text, e.g. a CrossRef title
+
+    Returns:
+        str: Escaped text with collapsed whitespace
+    """
+    out: List[str] = []
+    open_tags: List[Tuple[str, bool]] = []
+    pos = 0
+    for tag in _MARKUP_TAG.finditer(text):
+        out.append(_escape_text(text[pos:tag.start()]))
+        pos = tag.end()
+        closing, namespaced, known, self_closing = tag.groups()
+        name = (namespaced or known).lower()
+        command = _MARKUP_COMMANDS.get(name)
+        if self_closing:
+            continue
+        if not closing:
+            open_tags.append((name, command is not None))
+            if command:
+                out.append(command + '{')
+        elif any(open_name == name for open_name, _ in open_tags):
+            # 关闭到匹配的标签为止，忽略没有配对的关闭标签
+            while open_tags:
+                open_name, has_command = open_tags.pop()
+                if has_command:
+                    out.append('}')
+                if open_name == name:
+                    break
+    out.append(_escape_text(text[pos:]))
+    out.extend('}' for _, has_command in open_tags if has_command)
+    return ' '.join(balance_braces(''.join(out)).split())
+
+
+def balance_braces(value: str) -> str:
+    """
+    Drop unmatched closing braces and close braces left open.
+
+    Args:
+        value: Field value
+
+    Returns:
+        str: Value whose braces are balanced, unchanged if they already are
+    """
+    depth = 0
+    out = []
+    for char in value:
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            if depth == 0:
+                continue
+            depth -= 1
+        out.append(char)
+    return ''.join(out) + '}' * depth
+
+
+def _escape_text(text: str) -> str:
+    """Decode HTML entities and escape LaTeX specials in plain text."""
+    text = _LATEX_SPECIALS.sub(r'\\\1', html.unescape(text))
+    return _ANGLE_BRACKETS.sub(lambda m: _ANGLE_COMMANDS[m.group(0)], text)
+
+
+def crossref_to_bibtex(item: Dict) -> Optional[str]:
+    """
+    Render BibTeX from a CrossRef work record without calling the transform API.
+
+    Text fields are passed through ``latex_escape``, so markup and LaTeX
+    special characters in CrossRef's metadata do not break the output.
+
+    Args:
+        item: Work metadata as returned by CrossRef's ``/works`` endpoints
+
+    Returns:
+        Optional[str]: BibTeX entry, or None if the record has no DOI
+    """
+    doi = item.get('DOI')
+    if not doi:
+        return None
+
+    entry_type = CROSSREF_ENTRY_TYPES.get(item.get('type'), 'misc')
+    authors = _crossref_names(item.get('author', []))
+    year = _crossref_year(item)
+    container = _escaped(_first(item.get('container-title')))
+
+    first_family = (item.get('author') or [{}])[0].get('family') or 'Unknown'
+    key = re.sub(r'[^A-Za-z0-9]', '', first_family) or 'Unknown'
+    key = f"{key}_{year}" if year else key
+
+    page = item.get('page')
+    fields: List[Tuple[str, Optional[str]]] = [
+        ('title', _escaped(_first(item.get('title')))),
+        ('author', ' and '.join(authors)),
+        ('editor', ' and '.join(_crossref_names(item.get('editor', [])))),
+        ('journal', container if entry_type == 'article' else None),
+        ('booktitle', container if entry_type in ('inproceedings', 'incollection') else None),
+        ('volume', item.get('volume')),
+        ('number', item.get('issue')),
+        ('pages', page.replace('-', '--') if page else None),
+        ('publisher', _escaped(item.get('publisher'))),
+        ('year', year),
+        ('issn', _first(item.get('ISSN'))),
+        ('isbn', _first(item.get('ISBN'))),
+        ('doi', doi),
+        ('url', item.get('URL') or f"https://doi.org/{doi}"),
+    ]
+    return format_bibtex(entry_type, key, fields)
+
+
+def _crossref_names(people: List[Dict]) -> List[str]:
+    """Format CrossRef person records as BibTeX names."""
+    names = []
+    for person in people:
+        if person.get('family'):
+            family = latex_escape(person['family'])
+            given = _escaped(person.get('given'))
+            names.append(f"{family}, {given}" if given else family)
+        elif person.get('name'):
+            names.append(f"{{{latex_escape(person['name'])}}}")
+    return names
+
+
+def _crossref_year(item: Dict) -> Optional[str]:
+    """Get the publication year from CrossRef date fields."""
+    for field in ('published', 'issued', 'published-print', 'published-online'):
+        parts = (item.get(field) or {}).get('date-parts') or [[]]
+        if parts[0] and parts[0][0]:
+            return str(parts[0][0])
+    return None
+
+
+def _escaped(value: Optional[str]) -> Optional[str]:
+    """``latex_escape`` a value that may be missing."""
+    return latex_escape(value) if value else value
+
+
+def _first(value) -> Optional[str]:
+    """Get the first element of a CrossRef list field."""
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+# 不是文献条目的 BibTeX 指令
+_DIRECTIVES = {'comment', 'preamble', 'string'}
+
+_ENTRY_START = re.compile(r'@\s*([A-Za-z]+)\s*([{(])')
+# 行首的条目开头；未闭合的条目在此处结束
+_NEXT_ENTRY = re.compile(r'\n[ \t]*(@\s*[A-Za-z]+\s*[{(])')
+# 单个条目的最大长度（字符），超过时视为未闭合并跳过
+MAX_ENTRY_CHARS = 1 << 20
+_BRACES = re.compile(r'[{}]')
+_PARENS = re.compile(r'[()]')
+_FIELD_NAME = re.compile(r'\s*,?\s*([^\s=,{}"#]+)\s*=\s*')
+_BARE_VALUE = re.compile(r'[^\s,#}]+')
+_CONCAT = re.compile(r'\s*#\s*')
+
+
+class BibEntry:
+    """
+    Compact BibTeX entry produced by ``iter_bibtex``.
+
+    Only the entry type, citation key and the raw field text are stored; the
+    fields are decoded on first access, so scanning large files for keys or
+    types never pays for field parsing.
+    """
+
+    __slots__ = ('entry_type', 'key', '_body', '_fields')
+
+    def __init__(self, entry_type: str, key: str, body: str):
+        """
+        Initialize the entry.
+
+        Args:
+            entry_type: Lowercase entry type, e.g. ``'article'``
+            key: Citation key
+            body: Raw text of the fields after the citation key
+        """
+        self.entry_type = entry_type
+        self.key = key
+        self._body = body
+        self._fields: Optional[Dict[str, str]] = None
+
+    @property
+    def fields(self) -> Dict[str, str]:
+        """Decoded fields keyed by lowercase field name."""
+        if self._fields is None:
+            self._fields = _parse_fields(self._body)
+            self._body = None
+        return self._fields
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """
+        Get a decoded field value.
+
+        Args:
+            name: Field name, case-insensitive
+            default: Value returned if the field is missing
+
+        Returns:
+            Optional[str]: Field value without outer braces or quotes
+        """
+        return self.fields.get(name.lower(), default)
+
+    def __getitem__(self, name: str) -> str:
+        return self.fields[name.lower()]
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self.fields
+
+    def to_bibtex(self) -> str:
+        """
+        Render the entry back to BibTeX.
+
+        Returns:
+            str: BibTeX entry
+        """
+        return format_bibtex(self.entry_type, self.key, self.fields.items())
+
+    def __repr__(self) -> str:
+        return f"BibEntry({self.entry_type!r}, {self.key!r})"
+
+
+def iter_bibtex(source: Union[str, IO[str]], chunk_size: int = 1 << 16) -> Iterator[BibEntry]:
+    """
+    Incrementally parse BibTeX entries from a string or text stream.
+
+    The input is read in chunks and only the entry currently being parsed is
+    kept in memory, so arbitrarily large .bib files can be streamed. Comments,
+    ``@preamble`` and ``@string`` directives are skipped; string macros are
+    kept verbatim, not expanded. Like BibTeX itself, an entry whose braces
+    are never closed is skipped with a warning when the next entry starts at
+    the beginning of a line, or once it exceeds ``MAX_ENTRY_CHARS``, and
+    parsing resumes from there.
+
+    Args:
+        source: BibTeX text, or a text file object opened for reading
+        chunk_size: Number of characters read per chunk from a stream
+
+    Yields:
+        BibEntry: Parsed entries in input order
+    """
+    if isinstance(source, str):
+        chunks: Iterator[str] = iter([source])
+    else:
+        chunks = iter(lambda: source.read(chunk_size), '')
+
+    buffer = ''
+    # 已处理文本的结束位置；只在读入新块时压缩缓冲区，避免每个条目都复制剩余文本
+    pos = 0
+    exhausted = False
+    while True:
+        match = _ENTRY_START.search(buffer, pos)
+        end = None
+        if match:
+            following = _NEXT_ENTRY.search(buffer, match.end())
+            limit = following.start(1) if following else len(buffer)
+            end = _find_entry_end(buffer, match, limit)
+            if end is None and following:
+                logger.warning(f"Skipping unterminated BibTeX entry: {buffer[match.start():limit][:80]!r}")
+                pos = limit
+                continue
+            if end is None and len(buffer) - match.start() > MAX_ENTRY_CHARS:
+                logger.warning(f"Skipping BibTeX entry longer than {MAX_ENTRY_CHARS} characters")
+                pos = match.end()
+                continue
+        if end is None:
+            if exhausted:
+                if match:
+                    logger.warning("Skipping unterminated BibTeX entry at end of input")
+                return
+            chunk = next(chunks, None)
+            if chunk is None:
+                exhausted = True
+                continue
+            # 保留未完成的条目，丢弃已处理的文本
+            start = match.start() if match else max(pos, len(buffer) - 64)
+            buffer = buffer[start:] + chunk
+            pos = 0
+            continue
+
+        entry_type = match.group(1).lower()
+        content = buffer[match.end():end]
+        pos = end + 1
+        if entry_type in _DIRECTIVES:
+            continue
+
+        key, _, body = content.partition(',')
+        yield BibEntry(entry_type, key.strip(), body)
+
+
+def parse_bibtex(text: str) -> List[BibEntry]:
+    """
+    Parse all BibTeX entries in a string.
+
+    Args:
+        text: BibTeX text
+
+    Returns:
+        List[BibEntry]: Parsed entries
+    """
+    return list(iter_bibtex(text))
+
+
+def _find_entry_end(buffer: str, match: 're.Match', limit: int) -> Optional[int]:
+    """Find the index of the delimiter closing an entry before ``limit``, None if incomplete."""
+    pattern = _BRACES if match.group(2) == '{' else _PARENS
+    opener = match.group(2)
+    depth = 1
+    for delimiter in pattern.finditer(buffer, match.end(), limit):
+        depth += 1 if delimiter.group() == opener else -1
+        if depth == 0:
+            return delimiter.start()
+    return None
+
+
+def _parse_fields(body: str) -> Dict[str, str]:
+    """Decode ``name = value`` pairs from the raw field text of an entry."""
+    fields: Dict[str, str] = {}
+    pos = 0
+    length = len(body)
+    while pos < length:
+        match = _FIELD_NAME.match(body, pos)
+        if not match:
+            break
+        name = match.group(1).lower()
+        pos = match.end()
+
+        parts = []
+        while pos < length:
+            char = body[pos]
+            if char == '{':
+                end = _matching_brace(body, pos)
+                parts.append(body[pos + 1:end])
+                pos = end + 1
+            elif char == '"':
+                end = pos + 1
+                depth = 0
+                while end < length and (body[end] != '"' or depth):
+                    depth += {'{': 1, '}': -1}.get(body[end], 0)
+                    end += 1
+                parts.append(body[pos + 1:end])
+                pos = end + 1
+            else:
+                token = _BARE_VALUE.match(body, pos)
+                if token:
+                    parts.append(token.group())
+                    pos = token.end()
+
+            concat = _CONCAT.match(body, pos)
+            if not concat:
+                break
+            pos = concat.end()
+
+        fields[name] = ' '.join(''.join(parts).split())
+    return fields
+
+
+def _matching_brace(text: str, start: int) -> int:
+    """Index of the brace closing the one at ``start``."""
+    depth = 0
+    for delimiter in _BRACES.finditer(text, start):
+        depth += 1 if delimiter.group() == '{' else -1
+        if depth == 0:
+            return delimiter.start()
+    return len(text)
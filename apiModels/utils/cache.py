@@ -0,0 +1,315 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Hashable, Optional
+
+from .query import canonicalize_query
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for use as a cache key.
+
+    Args:
+        query: Raw query string
+
+    Returns:
+        str: Canonical query, see ``canonicalize_query``
+    """
+    return canonicalize_query(query)
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalize a title for exact matching.
+
+    Args:
+        title: Raw title
+
+    Returns:
+        str: Lowercase title with punctuation removed and whitespace collapsed
+    """
+    return ' '.join(re.findall(r'\w+', title.casefold()))
+
+
+class MemoryCache:
+    """
+    Thread-safe in-process LRU cache with an optional per-entry TTL.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries, 0 disables the cache
+            ttl: Seconds an entry stays valid, None for no expiry
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a value and mark it as recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[Any]: Cached value, None if missing or expired
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and time.monotonic() > expires:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry if full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache:
+    """
+    Persistent response cache stored in a SQLite database.
+
+    Entries are keyed by ``(source, key)`` and stored as JSON. Entries older
+    than ``ttl`` seconds are treated as missing, and once the stored values
+    exceed ``max_bytes`` the least recently used entries are evicted. Lookups
+    that found nothing are remembered separately for the shorter
+    ``negative_ttl``, so a warm run does not query sources again for
+    references they do not have.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_bytes: Optional[int] = 256 * 1024 * 1024,
+        negative_ttl: Optional[float] = 24 * 3600
+    ):
+        """
+        Initialize the cache, creating the database if needed.
+
+        Args:
+            path: Path of the SQLite database file
+            ttl: Seconds an entry stays valid, None for no expiry
+            max_bytes: Byte budget for stored values, None for unbounded
+            negative_ttl: Seconds a recorded miss stays valid, None or 0
+                disables persisting misses
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' source TEXT NOT NULL,'
+            ' key TEXT NOT NULL,'
+            ' value TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' created REAL NOT NULL,'
+            ' accessed REAL NOT NULL,'
+            ' PRIMARY KEY (source, key))'
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS misses ('
+            ' source TEXT NOT NULL,'
+            ' key TEXT NOT NULL,'
+            ' created REAL NOT NULL,'
+            ' PRIMARY KEY (source, key))'
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM entries'
+        ).fetchone()[0]
+
+    def get(self, source: str, key: str) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            source: Name of the source the value came from
+            key: Query key, normalized with ``normalize_query``
+
+        Returns:
+            Optional[Any]: Cached value, None if missing or expired
+        """
+        key = normalize_query(key)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, size, created FROM entries WHERE source = ? AND key = ?',
+                (source, key)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, size, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._conn.execute(
+                    'DELETE FROM entries WHERE source = ? AND key = ?', (source, key)
+                )
+                self._conn.commit()
+                self._total_bytes -= size
+                return None
+
+            self._conn.execute(
+                'UPDATE entries SET accessed = ? WHERE source = ? AND key = ?',
+                (now, source, key)
+            )
+            self._conn.commit()
+        return json.loads(value)
+
+    def set(self, source: str, key: str, value: Any) -> None:
+        """
+        Store a value, evicting least recently used entries if over budget.
+
+        Args:
+            source: Name of the source the value came from
+            key: Query key, normalized with ``normalize_query``
+            value: JSON-serializable value
+        """
+        key = normalize_query(key)
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute(
+                'SELECT size FROM entries WHERE source = ? AND key = ?', (source, key)
+            ).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                (source, key, data, size, now, now)
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def is_miss(self, source: str, key: str) -> bool:
+        """
+        Check whether a lookup was recently recorded as finding nothing.
+
+        Args:
+            source: Name of the source that was queried
+            key: Query key, normalized with ``normalize_query``
+
+        Returns:
+            bool: True if an unexpired miss is recorded
+        """
+        if not self.negative_ttl:
+            return False
+        key = normalize_query(key)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT created FROM misses WHERE source = ? AND key = ?', (source, key)
+            ).fetchone()
+            if row is None:
+                return False
+            if time.time() - row[0] > self.negative_ttl:
+                self._conn.execute(
+                    'DELETE FROM misses WHERE source = ? AND key = ?', (source, key)
+                )
+                self._conn.commit()
+                return False
+        return True
+
+    def set_miss(self, source: str, key: str) -> None:
+        """
+        Record that a lookup found nothing.
+
+        Args:
+            source: Name of the source that was queried
+            key: Query key, normalized with ``normalize_query``
+        """
+        if not self.negative_ttl:
+            return
+        key = normalize_query(key)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO misses VALUES (?, ?, ?)', (source, key, time.time())
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove all entries and recorded misses."""
+        with self._lock:
+            self._conn.execute('DELETE FROM entries')
+            self._conn.execute('DELETE FROM misses')
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @property
+    def total_bytes(self) -> int:
+        """Total size of the stored values in bytes."""
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the byte budget is met."""
+        if self.max_bytes is None:
+            return
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                'SELECT source, key, size FROM entries ORDER BY accessed LIMIT 64'
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for source, key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    return
+                self._conn.execute(
+                    'DELETE FROM entries WHERE source = ? AND key = ?', (source, key)
+                )
+                self._total_bytes -= size
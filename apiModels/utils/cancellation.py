@@ -0,0 +1,69 @@
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Optional
+
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    'bibtex_cancel_event', default=None
+)
+
+
+class LookupCancelled(BaseException):
+    """
+    Raised inside a lookup whose result is no longer wanted.
+
+    Like ``asyncio.CancelledError`` it derives from ``BaseException`` so the
+    fetchers' ``except Exception`` handlers do not swallow it or turn it into
+    a cached miss.
+    """
+
+
+def run_cancellable(event: threading.Event, func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a function with a cancellation event visible to the HTTP layer.
+
+    Args:
+        event: Event that is set once the caller no longer needs the result
+        func: Function to run
+        *args: Positional arguments for ``func``
+
+    Returns:
+        Any: Return value of ``func``
+    """
+    def run() -> Any:
+        _cancel_event.set(event)
+        return func(*args)
+
+    return contextvars.copy_context().run(run)
+
+
+def is_cancelled() -> bool:
+    """
+    Check whether the current lookup has been cancelled.
+
+    Returns:
+        bool: True if the surrounding ``run_cancellable`` event is set
+    """
+    event = _cancel_event.get()
+    return event is not None and event.is_set()
+
+
+def check_cancelled() -> None:
+    """Raise ``LookupCancelled`` if the current lookup has been cancelled."""
+    if is_cancelled():
+        raise LookupCancelled("Lookup cancelled")
+
+
+def sleep_cancellable(seconds: float) -> None:
+    """
+    Sleep, waking up early and raising ``LookupCancelled`` on cancellation.
+
+    Args:
+        seconds: Time to sleep
+    """
+    event = _cancel_event.get()
+    if event is None:
+        time.sleep(seconds)
+    else:
+        event.wait(seconds)
+    check_cancelled()
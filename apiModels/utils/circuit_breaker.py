@@ -0,0 +1,171 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker tracking the health of one source.
+
+    The breaker is ``'closed'`` while the source is healthy. It records the
+    outcome of the last ``window_size`` requests, counting errors, 429/5xx
+    responses and calls slower than ``slow_call_duration`` as failures, and
+    opens once at least ``min_calls`` were seen and the failure rate reaches
+    ``failure_rate``. While ``'open'`` the source is skipped; after
+    ``reset_timeout`` seconds one probe lookup is let through
+    (``'half_open'``), and its first request closes the breaker again on
+    success or reopens it on failure. A probe that ends without sending a
+    request is handed back with ``release_probe``. Outcomes reported while
+    open, and those of requests started before the probe, are ignored, so
+    late answers to requests that were in flight when the breaker opened
+    cannot close it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        window_size: int = 20,
+        min_calls: int = 5,
+        slow_call_duration: Optional[float] = 10.0,
+        reset_timeout: float = 30.0,
+        name: Optional[str] = None
+    ):
+        """
+        Initialize a closed breaker.
+
+        Args:
+            failure_rate: Fraction of failed requests in the window that opens
+                the breaker
+            window_size: Number of most recent requests considered
+            min_calls: Minimum number of requests in the window before the
+                breaker may open
+            slow_call_duration: Seconds after which a successful request still
+                counts as a failure, None to ignore latency
+            reset_timeout: Seconds the breaker stays open before a probe
+            name: Name used in log messages
+        """
+        if not 0 < failure_rate <= 1:
+            raise ValueError(f"failure_rate must be in (0, 1], got {failure_rate}")
+        if min_calls < 1 or window_size < min_calls:
+            raise ValueError("window_size must be at least min_calls, which must be positive")
+
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.slow_call_duration = slow_call_duration
+        self.reset_timeout = reset_timeout
+        self.name = name or 'circuit'
+        self._outcomes = deque(maxlen=window_size)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state: ``'closed'``, ``'open'`` or ``'half_open'``."""
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        Check whether the source may be used now.
+
+        In the open state, the first call after ``reset_timeout`` is allowed
+        as a probe and moves the breaker to half-open; further calls are
+        refused until the probe reports back or times out.
+
+        Returns:
+            bool: True if the caller may send a lookup to the source
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # 探测超时未返回结果时重新允许一次探测
+            self._state = self.HALF_OPEN
+            self._opened_at = time.monotonic()
+            logger.info(f"{self.name}: half-open, probing")
+            return True
+
+    def release_probe(self) -> None:
+        """
+        Hand back a half-open probe that ended without sending a request.
+
+        The breaker returns to open with ``reset_timeout`` already elapsed,
+        so the next ``allow`` lets another probe through at once. Does
+        nothing once the probe's request has been recorded.
+        """
+        with self._lock:
+            if self._state != self.HALF_OPEN:
+                return
+            self._state = self.OPEN
+            self._opened_at = time.monotonic() - self.reset_timeout
+            logger.info(f"{self.name}: probe sent no request, released")
+
+    def record(self, success: bool, elapsed: float = 0.0) -> None:
+        """
+        Record the outcome of one request.
+
+        Args:
+            success: Whether the request succeeded
+            elapsed: Request duration in seconds
+        """
+        if self.slow_call_duration is not None and elapsed > self.slow_call_duration:
+            success = False
+
+        with self._lock:
+            if self._state == self.OPEN:
+                return
+            if self._state == self.HALF_OPEN:
+                # 忽略探测开始前就已发出的请求
+                if time.monotonic() - elapsed < self._opened_at:
+                    return
+                if success:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                    logger.info(f"{self.name}: probe succeeded, closed")
+                else:
+                    self._state = self.OPEN
+                    self._opened_at = time.monotonic()
+                    logger.warning(f"{self.name}: probe failed, open again")
+                return
+
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (
+                len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_rate
+            ):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                logger.warning(
+                    f"{self.name}: open after {failures} failures "
+                    f"in {len(self._outcomes)} requests"
+                )
+
+    def on_request(
+        self,
+        url: str,
+        status: Optional[int],
+        error: Optional[BaseException],
+        elapsed: float
+    ) -> None:
+        """
+        Request listener for ``BibTexFetcher.add_request_listener``.
+
+        Args:
+            url: Request URL
+            status: HTTP status code, None if no response was received
+            error: Exception raised by the request, if any
+            elapsed: Request duration in seconds
+        """
+        success = error is None and (status is None or (status < 500 and status != 429))
+        self.record(success, elapsed)
@@ -0,0 +1,50 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional
+
+from tqdm import tqdm
+
+
+async def gather_limited(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    concurrency: int = 10,
+    desc: Optional[str] = None
+) -> List[Any]:
+    """
+    Run a blocking function over many items concurrently on the event loop.
+
+    At most ``concurrency`` calls are in flight at any time; each call runs on
+    a dedicated thread pool of the same size so the network-bound work never
+    blocks the loop.
+
+    Args:
+        func: Blocking function applied to each item
+        items: Items to process
+        concurrency: Maximum number of calls in flight
+        desc: Optional progress bar description
+
+    Returns:
+        List[Any]: Results in the same order as the input items
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+
+    items = list(items)
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    progress = tqdm(total=len(items), desc=desc, disable=desc is None)
+
+    async def run(item: Any) -> Any:
+        async with semaphore:
+            try:
+                return await loop.run_in_executor(executor, func, item)
+            finally:
+                progress.update(1)
+
+    try:
+        return await asyncio.gather(*(run(item) for item in items))
+    finally:
+        progress.close()
+        executor.shutdown(wait=False)
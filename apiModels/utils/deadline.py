@@ -0,0 +1,133 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+import requests
+
+# 没有截止时间时每个请求的默认超时（秒）
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+
+_deadline: contextvars.ContextVar[Optional['Deadline']] = contextvars.ContextVar(
+    'bibtex_deadline', default=None
+)
+
+
+class DeadlineExceeded(BaseException):
+    """
+    Raised when a lookup runs out of its time budget.
+
+    Like ``LookupCancelled`` it derives from ``BaseException`` so the
+    fetchers' ``except Exception`` handlers do not turn it into a cached
+    miss; the workflow treats it as the end of the query.
+    """
+
+
+class Deadline:
+    """Point in time by which a query has to be resolved."""
+
+    __slots__ = ('expires',)
+
+    def __init__(self, timeout: float):
+        """
+        Initialize the deadline.
+
+        Args:
+            timeout: Seconds from now
+        """
+        self.expires = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """Seconds left, 0 once the deadline has passed."""
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return self.remaining() <= 0
+
+
+@contextmanager
+def deadline_scope(timeout: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """
+    Give all lookups in the ``with`` block a shared time budget.
+
+    The deadline is visible to the HTTP layer of every fetcher called in the
+    block, including lookups started on other threads with a copied context.
+    Nested scopes never extend an outer deadline.
+
+    Args:
+        timeout: Budget in seconds, None for no deadline
+
+    Yields:
+        Optional[Deadline]: The deadline in effect
+    """
+    outer = _deadline.get()
+    deadline = outer
+    if timeout is not None:
+        deadline = Deadline(timeout)
+        if outer is not None and outer.expires < deadline.expires:
+            deadline = outer
+
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """
+    Get the deadline of the surrounding ``deadline_scope``.
+
+    Returns:
+        Optional[Deadline]: Deadline in effect, None if there is none
+    """
+    return _deadline.get()
+
+
+def check_deadline() -> None:
+    """Raise ``DeadlineExceeded`` if the current deadline has passed."""
+    deadline = _deadline.get()
+    if deadline is not None and deadline.expired:
+        raise DeadlineExceeded("Query deadline exceeded")
+
+
+def is_deadline_timeout(error: BaseException) -> bool:
+    """
+    Check whether a request failed because the current deadline ran out.
+
+    Args:
+        error: Exception raised by the request
+
+    Returns:
+        bool: True for a timeout once the deadline has passed
+    """
+    deadline = _deadline.get()
+    return isinstance(error, requests.Timeout) and deadline is not None and deadline.expired
+
+
+def request_timeout(
+    connect: float = DEFAULT_CONNECT_TIMEOUT,
+    read: float = DEFAULT_READ_TIMEOUT
+) -> Tuple[float, float]:
+    """
+    Get ``(connect, read)`` timeouts for the next request.
+
+    Both are capped by the time left before the current deadline, so a
+    request cannot outlive its query.
+
+    Args:
+        connect: Connect timeout without a deadline, in seconds
+        read: Read timeout without a deadline, in seconds
+
+    Returns:
+        Tuple[float, float]: Connect and read timeouts in seconds
+    """
+    check_deadline()
+    deadline = _deadline.get()
+    if deadline is None:
+        return connect, read
+    remaining = deadline.remaining()
+    return min(connect, remaining), min(read, remaining)
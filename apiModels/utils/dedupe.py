@@ -0,0 +1,199 @@
+import hashlib
+from typing import Dict, List, Optional, Set, Tuple
+
+from .bibtex import BibEntry, format_bibtex, iter_bibtex
+from .cache import normalize_title
+from .query import strip_doi_prefix
+
+# 标题少于这个词数时，还要求年份相同才视为同一篇文献
+MIN_TITLE_WORDS = 4
+
+
+class DedupeIndex:
+    """
+    Index collapsing duplicate BibTeX entries across queries and sources.
+
+    Entries are keyed by a hash of their DOI and a hash of their normalized
+    title; entries sharing any key are merged with a union-find, so adding N
+    entries costs O(N) lookups instead of pairwise comparisons. Groups whose
+    entries carry different DOIs are never merged, even if their titles
+    match (e.g. two papers both called "A Survey of Deep Learning"). Each
+    group is rendered as one canonical entry: the first entry added wins, and
+    fields it lacks are filled in from the others.
+
+    With ``keep_entries=False`` only the hashed keys and each group's
+    citation key are kept, so streaming callers that just need to recognize
+    duplicates use a few dozen bytes per entry; ``groups`` is then
+    unavailable.
+    """
+
+    def __init__(self, keep_entries: bool = True):
+        """
+        Initialize an empty index.
+
+        Args:
+            keep_entries: If False, drop the parsed entries, raw BibTeX,
+                queries and sources after hashing
+        """
+        self.keep_entries = keep_entries
+        self._parent: List[int] = []
+        self._entries: List[Optional[BibEntry]] = []
+        self._raw: List[str] = []
+        self._queries: List[List[str]] = []
+        self._sources: List[List[str]] = []
+        self._keys: Dict[bytes, int] = {}
+        # 组根节点的引用 key，仅在不保留条目时使用
+        self._citation_keys: Dict[int, Optional[str]] = {}
+        # 带 DOI 的组（按根节点）包含的 DOI 哈希
+        self._dois: Dict[int, Set[bytes]] = {}
+
+    def add(
+        self,
+        bibtex: str,
+        query: Optional[str] = None,
+        source: Optional[str] = None
+    ) -> Tuple[int, bool]:
+        """
+        Add a BibTeX entry.
+
+        Args:
+            bibtex: BibTeX entry
+            query: Query the entry was found for
+            source: Name of the fetcher that returned it
+
+        Returns:
+            Tuple[int, bool]: Group id of the entry, and whether it started a
+                new group rather than duplicating an earlier entry
+        """
+        entry = next(iter_bibtex(bibtex), None)
+        entry_id = len(self._parent)
+        self._parent.append(entry_id)
+        if self.keep_entries:
+            self._entries.append(entry)
+            self._raw.append(bibtex)
+            self._queries.append([query] if query is not None else [])
+            self._sources.append([source] if source is not None else [])
+        else:
+            self._citation_keys[entry_id] = entry.key if entry else None
+        doi_key, title_key = self._dedupe_keys(entry)
+        if doi_key:
+            self._dois[entry_id] = {doi_key}
+
+        group = entry_id
+        for key in (doi_key, title_key):
+            if key is None:
+                continue
+            other = self._keys.setdefault(key, entry_id)
+            if other != entry_id and not self._conflicts(other, group):
+                group = self._union(other, group)
+        return self._find(group), self._find(group) == entry_id
+
+    def groups(self) -> List[Dict]:
+        """
+        Get the deduplicated entries in order of first appearance.
+
+        Returns:
+            List[Dict]: One dict per group with the merged ``bibtex``, the
+                ``key`` of its canonical entry, and the ``queries`` and
+                ``sources`` it was found for
+        """
+        if not self.keep_entries:
+            raise RuntimeError("groups() needs an index created with keep_entries=True")
+        members: Dict[int, List[int]] = {}
+        for entry_id in range(len(self._parent)):
+            members.setdefault(self._find(entry_id), []).append(entry_id)
+
+        groups = []
+        for ids in sorted(members.values(), key=lambda ids: ids[0]):
+            groups.append({
+                'bibtex': self._merge(ids),
+                'key': self.key(ids[0]),
+                'queries': _unique(q for i in ids for q in self._queries[i]),
+                'sources': _unique(s for i in ids for s in self._sources[i]),
+            })
+        return groups
+
+    def key(self, group: int) -> Optional[str]:
+        """
+        Get the citation key of a group's canonical entry.
+
+        Args:
+            group: Group id returned by ``add``
+
+        Returns:
+            Optional[str]: Citation key, None if the entry could not be parsed
+        """
+        root = self._find(group)
+        if not self.keep_entries:
+            return self._citation_keys.get(root)
+        entry = self._entries[root]
+        return entry.key if entry else None
+
+    def __len__(self) -> int:
+        return sum(1 for entry_id, parent in enumerate(self._parent) if entry_id == parent)
+
+    def _merge(self, ids: List[int]) -> str:
+        """Render a group as one entry, filling missing fields from duplicates."""
+        canonical = self._entries[ids[0]]
+        if canonical is None or len(ids) == 1:
+            return self._raw[ids[0]]
+
+        fields = dict(canonical.fields)
+        for entry_id in ids[1:]:
+            entry = self._entries[entry_id]
+            for name, value in (entry.fields.items() if entry else ()):
+                if value and not fields.get(name):
+                    fields[name] = value
+        return format_bibtex(canonical.entry_type, canonical.key, fields.items())
+
+    def _find(self, entry_id: int) -> int:
+        while self._parent[entry_id] != entry_id:
+            self._parent[entry_id] = self._parent[self._parent[entry_id]]
+            entry_id = self._parent[entry_id]
+        return entry_id
+
+    def _union(self, a: int, b: int) -> int:
+        """Merge two groups; the earlier entry stays the canonical one."""
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return a
+        if a > b:
+            a, b = b, a
+        self._parent[b] = a
+        if b in self._dois:
+            self._dois.setdefault(a, set()).update(self._dois.pop(b))
+        self._citation_keys.pop(b, None)
+        return a
+
+    def _conflicts(self, a: int, b: int) -> bool:
+        """Check whether two groups carry different DOIs and must stay apart."""
+        a_dois = self._dois.get(self._find(a))
+        b_dois = self._dois.get(self._find(b))
+        return bool(a_dois and b_dois and not a_dois & b_dois)
+
+    @staticmethod
+    def _dedupe_keys(entry: Optional[BibEntry]) -> Tuple[Optional[bytes], Optional[bytes]]:
+        """Hashed DOI and normalized-title keys identifying an entry."""
+        if entry is None:
+            return None, None
+
+        doi_key = None
+        doi = entry.get('doi')
+        if doi:
+            doi_key = _digest('doi', strip_doi_prefix(doi).lower())
+
+        title_key = None
+        title = normalize_title(entry.get('title') or '')
+        if title:
+            if len(title.split()) < MIN_TITLE_WORDS:
+                title = f"{title}|{entry.get('year') or ''}"
+            title_key = _digest('title', title)
+        return doi_key, title_key
+
+
+def _digest(kind: str, value: str) -> bytes:
+    return hashlib.blake2b(f"{kind}:{value}".encode('utf-8'), digest_size=12).digest()
+
+
+def _unique(values) -> List[str]:
+    return list(dict.fromkeys(values))
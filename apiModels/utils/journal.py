@@ -0,0 +1,141 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class JobJournal:
+    """
+    Append-only progress journal for resumable batch jobs.
+
+    Every finished query is appended as one JSON line recording its status
+    (``'found'``, ``'missing'`` or ``'failed'``) and results. Reopening the
+    journal replays it, so a restarted job can skip queries that were already
+    found and retry only pending, missing or failed ones. A torn last line
+    left by a crash is ignored.
+    """
+
+    def __init__(self, path: str, keep_results: bool = True, fsync: bool = False):
+        """
+        Open or create a journal.
+
+        Args:
+            path: Path of the journal file
+            keep_results: If True, keep resolved results in memory so they can
+                be returned again; if False, only remember which queries are
+                done, which keeps memory small for very large jobs
+            fsync: If True, fsync after every record for durability across
+                machine crashes, not just process crashes
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.keep_results = keep_results
+        self.fsync = fsync
+        self._resolved: Set[str] = set()
+        self._results: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+        self._replay()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if self._has_torn_tail():
+            self._file.write('\n')
+
+    def is_resolved(self, query: str) -> bool:
+        """
+        Check whether a query was already found in an earlier run.
+
+        Args:
+            query: Search query
+
+        Returns:
+            bool: True if the query does not need to be fetched again
+        """
+        return query in self._resolved
+
+    def get_results(self, query: str) -> Optional[Dict[str, str]]:
+        """
+        Get the recorded results of a resolved query.
+
+        Args:
+            query: Search query
+
+        Returns:
+            Optional[Dict[str, str]]: Results from each fetcher, None if the
+                query is unresolved or results are not kept
+        """
+        return self._results.get(query)
+
+    def record(
+        self,
+        query: str,
+        results: Dict[str, str],
+        error: Optional[str] = None
+    ) -> None:
+        """
+        Append the outcome of a query to the journal.
+
+        Args:
+            query: Search query
+            results: Results from each fetcher
+            error: Error message if the lookup failed
+        """
+        status = 'found' if results else ('failed' if error else 'missing')
+        line = {'query': query, 'status': status, 'results': results}
+        if error:
+            line['error'] = error
+
+        with self._lock:
+            self._file.write(json.dumps(line, ensure_ascii=False) + '\n')
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._remember(query, status, results)
+
+    @property
+    def resolved_count(self) -> int:
+        """Number of queries already found."""
+        return len(self._resolved)
+
+    def close(self) -> None:
+        """Close the journal file."""
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> 'JobJournal':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _replay(self) -> None:
+        """Load the outcomes recorded by earlier runs."""
+        if not self.path.exists():
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                    self._remember(entry['query'], entry['status'], entry.get('results') or {})
+                except (ValueError, KeyError):
+                    logger.warning(f"Skipping unreadable journal line {number} in {self.path}")
+
+    def _has_torn_tail(self) -> bool:
+        """Check whether the journal ends with a partially written line."""
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return False
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b'\n'
+
+    def _remember(self, query: str, status: str, results: Dict[str, str]) -> None:
+        if status == 'found':
+            self._resolved.add(query)
+            if self.keep_results:
+                self._results[query] = results
+        else:
+            self._resolved.discard(query)
+            self._results.pop(query, None)
@@ -0,0 +1,199 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# 请求延迟直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+ENDPOINT_SEARCH = 'search'
+ENDPOINT_TRANSFORM = 'transform'
+
+# 计数器名称及其 Prometheus 说明
+COUNTERS = {
+    'requests': 'HTTP requests sent to the source, including retries.',
+    'errors': 'Requests that raised or got a 429 or 5xx response.',
+    'retries': 'Requests repeated after a transient failure.',
+    'hits': 'Lookups that returned a citation.',
+    'misses': 'Lookups that found no citation.',
+    'cache_hits': 'Lookups served from the memo, negative or persistent cache.',
+    'cache_misses': 'Lookups no cache knew, sent upstream.',
+    'bytes_received': 'Response body bytes received from the source.',
+}
+
+
+class Histogram:
+    """Latency histogram with fixed, Prometheus-style cumulative buckets."""
+
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * len(self.bounds)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def to_dict(self) -> Dict:
+        buckets = {str(bound): count for bound, count in zip(self.bounds, self.counts)}
+        buckets['+Inf'] = self.count
+        return {'count': self.count, 'sum': round(self.sum, 6), 'buckets': buckets}
+
+
+class FetcherMetrics:
+    """
+    Request, lookup and cache counters of one fetcher.
+
+    Counters cover HTTP requests (including retries), errors, lookup hits and
+    misses, cache hits and misses and response bytes; request latencies are
+    kept in one histogram per endpoint, ``'search'`` for search/query APIs and
+    ``'transform'`` for fetching the BibTeX of a known record. All methods
+    are thread-safe.
+    """
+
+    def __init__(self, name: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        """
+        Initialize all counters to zero.
+
+        Args:
+            name: Fetcher name, used as the ``fetcher`` label
+            buckets: Upper bounds of the latency histogram buckets in seconds
+        """
+        self.name = name
+        self.buckets = tuple(buckets)
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._latency: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def record_request(
+        self,
+        endpoint: str,
+        elapsed: float,
+        status: Optional[int] = None,
+        error: Optional[BaseException] = None,
+        size: int = 0
+    ) -> None:
+        """
+        Record one HTTP request.
+
+        Args:
+            endpoint: Endpoint kind, ``'search'`` or ``'transform'``
+            elapsed: Request duration in seconds
+            status: HTTP status code, None if no response was received
+            error: Exception raised by the request, if any
+            size: Response body size in bytes
+        """
+        failed = error is not None or (status is not None and (status >= 500 or status == 429))
+        with self._lock:
+            self._counters['requests'] += 1
+            self._counters['errors'] += failed
+            self._counters['bytes_received'] += size
+            histogram = self._latency.get(endpoint)
+            if histogram is None:
+                histogram = self._latency[endpoint] = Histogram(self.buckets)
+            histogram.observe(elapsed)
+
+    def record_retry(self) -> None:
+        """Record that a request is about to be repeated."""
+        self._increment('retries')
+
+    def record_lookup(self, hit: bool) -> None:
+        """Record whether a lookup returned a citation."""
+        self._increment('hits' if hit else 'misses')
+
+    def record_cache(self, hit: bool) -> None:
+        """Record whether a lookup was answered by a cache."""
+        self._increment('cache_hits' if hit else 'cache_misses')
+
+    def get(self, counter: str) -> int:
+        """
+        Get the current value of a counter.
+
+        Args:
+            counter: Counter name, one of ``COUNTERS``
+
+        Returns:
+            int: Counter value
+        """
+        with self._lock:
+            return self._counters[counter]
+
+    def snapshot(self) -> Dict:
+        """
+        Get all metrics as a JSON-serializable dictionary.
+
+        Returns:
+            Dict: The counters, ``cache_hit_ratio`` (None before the first
+                lookup) and per-endpoint ``latency`` histograms
+        """
+        with self._lock:
+            data: Dict = dict(self._counters)
+            data['latency'] = {
+                endpoint: histogram.to_dict() for endpoint, histogram in self._latency.items()
+            }
+        lookups = data['cache_hits'] + data['cache_misses']
+        data['cache_hit_ratio'] = data['cache_hits'] / lookups if lookups else None
+        return data
+
+    def to_prometheus(self) -> str:
+        """Get the metrics in the Prometheus text exposition format."""
+        return to_prometheus([self])
+
+    def _increment(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+
+def to_prometheus(metrics: Iterable[FetcherMetrics], prefix: str = 'bibtex') -> str:
+    """
+    Render the metrics of several fetchers in the Prometheus text format.
+
+    Args:
+        metrics: Metrics to export, one per fetcher
+        prefix: Prefix of the metric names
+
+    Returns:
+        str: Exposition text, one metric family per counter, the cache hit
+            ratio gauge and the request duration histogram
+    """
+    snapshots = [(m.name, m.snapshot()) for m in metrics]
+    lines: List[str] = []
+
+    for counter, help_text in COUNTERS.items():
+        name = f"{prefix}_{counter}_total"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [
+            f'{name}{{fetcher="{_escape(fetcher)}"}} {data[counter]}'
+            for fetcher, data in snapshots
+        ]
+
+    name = f"{prefix}_cache_hit_ratio"
+    lines += [f"# HELP {name} Share of lookups answered by a cache.", f"# TYPE {name} gauge"]
+    lines += [
+        f'{name}{{fetcher="{_escape(fetcher)}"}} {data["cache_hit_ratio"]}'
+        for fetcher, data in snapshots if data['cache_hit_ratio'] is not None
+    ]
+
+    name = f"{prefix}_request_duration_seconds"
+    lines += [f"# HELP {name} HTTP request duration.", f"# TYPE {name} histogram"]
+    for fetcher, data in snapshots:
+        for endpoint, histogram in data['latency'].items():
+            labels = f'fetcher="{_escape(fetcher)}",endpoint="{_escape(endpoint)}"'
+            lines += [
+                f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+                for bound, count in histogram['buckets'].items()
+            ]
+            lines.append(f"{name}_sum{{{labels}}} {histogram['sum']}")
+            lines.append(f"{name}_count{{{labels}}} {histogram['count']}")
+
+    return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+
+def iter_pages(
+    fetch_page: Callable[[Any], Tuple[List[Any], Optional[Any]]],
+    start: Any,
+    prefetch: bool = True
+) -> Iterator[Any]:
+    """
+    Lazily iterate over the items of a paginated API.
+
+    While the caller consumes one page, the next page is already being
+    fetched on a background thread. Closing the generator early (e.g. by
+    breaking out of a loop) stops paging and drops the pending prefetch.
+
+    Args:
+        fetch_page: Function taking a page state (offset, cursor, ...) and
+            returning the page's items and the next state, or None at the end
+        start: State of the first page
+        prefetch: If True, fetch the next page in the background
+
+    Yields:
+        Any: Items of each page in order
+    """
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        items, state = fetch_page(start)
+        while True:
+            has_next = bool(items) and state is not None
+            upcoming = executor.submit(fetch_page, state) if has_next and executor else None
+
+            yield from items
+
+            if not has_next:
+                return
+            items, state = upcoming.result() if upcoming else fetch_page(state)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,132 @@
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+# 查询类型
+QUERY_DOI = 'doi'
+QUERY_DBLP_KEY = 'dblp_key'
+QUERY_ARXIV = 'arxiv'
+QUERY_TITLE = 'title'
+
+# DOI 前的 URL 或 "doi:" 前缀
+DOI_PREFIX = re.compile(r'^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)', re.IGNORECASE)
+DOI_PATTERN = re.compile(r'^10\.\d{4,9}/\S+$')
+
+# DBLP key，可带 "DBLP:" 前缀或写成 dblp.org/rec/ 链接
+DBLP_KEY_PATTERN = re.compile(
+    r'^(?:DBLP:|https?://dblp\.org/rec/)?'
+    r'((?:journals|conf|books|series|reference|phd|tr|ms)/[^\s/]+/[^\s/]+?)'
+    r'(?:\.(?:html|bib|xml))?$'
+)
+
+# 新式 (1810.04805) 和旧式 (hep-th/9901001) arXiv 编号，可带前缀或链接
+ARXIV_PATTERN = re.compile(
+    r'^(?:arxiv:\s*|https?://arxiv\.org/(?:abs|pdf)/)?'
+    r'(\d{4}\.\d{4,5}|[a-z][a-z-]*(?:\.[a-z]{2})?/\d{7})'
+    r'(?:v\d+)?(?:\.pdf)?$',
+    re.IGNORECASE
+)
+
+
+def strip_doi_prefix(query: str) -> str:
+    """
+    Remove a ``https://doi.org/``, ``http://dx.doi.org/`` or ``doi:`` prefix.
+
+    Args:
+        query: Raw query string
+
+    Returns:
+        str: Query without the prefix
+    """
+    return DOI_PREFIX.sub('', query.strip())
+
+
+def classify_query(query: str) -> Tuple[str, str]:
+    """
+    Recognize which kind of identifier a query is.
+
+    Args:
+        query: Raw query string
+
+    Returns:
+        Tuple[str, str]: ``QUERY_DOI``, ``QUERY_DBLP_KEY``, ``QUERY_ARXIV`` or
+            ``QUERY_TITLE``, and the bare identifier (the DOI without its URL
+            prefix, the DBLP key, the arXiv ID without version) or the title
+            with collapsed whitespace
+    """
+    query = ' '.join(query.split())
+    doi = strip_doi_prefix(query)
+    if DOI_PATTERN.match(doi):
+        return QUERY_DOI, doi
+
+    match = ARXIV_PATTERN.match(query)
+    if match:
+        return QUERY_ARXIV, match.group(1)
+
+    match = DBLP_KEY_PATTERN.match(query)
+    if match:
+        return QUERY_DBLP_KEY, match.group(1)
+
+    return QUERY_TITLE, query
+
+
+def arxiv_to_dblp_key(arxiv_id: str) -> Optional[str]:
+    """
+    Get the DBLP key of an arXiv preprint, e.g. ``journals/corr/abs-1810-04805``.
+
+    Args:
+        arxiv_id: New-style arXiv ID without version
+
+    Returns:
+        Optional[str]: DBLP key, None for old-style IDs
+    """
+    match = re.match(r'^(\d{4})\.(\d{4,5})$', arxiv_id)
+    return f"journals/corr/abs-{match.group(1)}-{match.group(2)}" if match else None
+
+
+def canonicalize_query(query: str) -> str:
+    """
+    Map equivalent queries to the same key.
+
+    DOIs lose their URL or ``doi:`` prefix and are lowercased, as DOIs are
+    case-insensitive; other queries are case-folded with collapsed whitespace.
+
+    Args:
+        query: Raw query string
+
+    Returns:
+        str: Canonical query
+    """
+    query = ' '.join(query.split())
+    doi = strip_doi_prefix(query)
+    if DOI_PATTERN.match(doi):
+        return doi.lower()
+    return query.casefold()
+
+
+def coalesce_queries(queries: Iterable[str]) -> Dict[str, str]:
+    """
+    Group the queries of a batch that canonicalize to the same key.
+
+    Each distinct query is mapped to the representative query that should be
+    resolved for it: the bare DOI for DOIs, otherwise the first spelling seen
+    with collapsed whitespace. Callers resolve every representative once and
+    fan the results back out to the original queries.
+
+    Args:
+        queries: Raw queries, possibly with duplicates
+
+    Returns:
+        Dict[str, str]: Mapping from each distinct query to its representative
+    """
+    representatives: Dict[str, str] = {}
+    by_key: Dict[str, str] = {}
+    for query in queries:
+        if query in representatives:
+            continue
+        key = canonicalize_query(query)
+        if key not in by_key:
+            collapsed = ' '.join(query.split())
+            doi = strip_doi_prefix(collapsed)
+            by_key[key] = doi if DOI_PATTERN.match(doi) else collapsed
+        representatives[query] = by_key[key]
+    return representatives
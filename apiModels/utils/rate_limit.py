@@ -0,0 +1,290 @@
+import asyncio
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket usable from both threads and asyncio.
+
+    Tokens are reserved under a lock and the caller then sleeps outside of it
+    (``time.sleep`` or ``asyncio.sleep``), so waiting never blocks other
+    callers or the event loop. Reservations may drive the token count
+    negative, which queues callers fairly in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size, defaults to ``max(1, rate)``
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        """
+        Block the calling thread until a token is available.
+
+        Args:
+            timeout: Maximum seconds to wait; if the token would only be
+                available later, it is not taken and ``TimeoutError`` is
+                raised without waiting
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        wait = self._reserve()
+        if timeout is not None and wait > timeout:
+            self._release()
+            raise TimeoutError(f"Rate limit wait of {wait:.1f}s exceeds {timeout:.1f}s")
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def async_acquire(self) -> float:
+        """
+        Wait on the event loop until a token is available.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def update(self, rate: float, capacity: Optional[float] = None) -> None:
+        """
+        Change the refill rate, e.g. after the server announced its limit.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size, defaults to ``max(1, rate)``
+        """
+        if rate <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self.capacity = capacity if capacity is not None else max(1.0, rate)
+            self._tokens = min(self._tokens, self.capacity)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hand out no tokens for the next ``seconds``, e.g. for ``Retry-After``.
+
+        Args:
+            seconds: Pause duration in seconds
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _reserve(self) -> float:
+        """Reserve one token and return how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def _release(self) -> None:
+        """Give back a reserved token that will not be used."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+
+class RateLimiter:
+    """
+    Registry of per-host token buckets shared by all fetchers.
+
+    Buckets start from ``DEFAULT_RATES`` and adapt to the limits servers
+    announce via ``X-Rate-Limit-Limit``/``X-Rate-Limit-Interval`` (CrossRef)
+    and ``Retry-After`` headers.
+    """
+
+    # host -> (requests, per seconds)
+    DEFAULT_RATES: Dict[str, Tuple[float, float]] = {
+        'api.crossref.org': (50, 1.0),
+        'dblp.org': (2, 1.0),
+        'serpapi.com': (1, 2.0),
+    }
+
+    def __init__(
+        self,
+        rates: Optional[Dict[str, Tuple[float, float]]] = None,
+        default_rate: Optional[Tuple[float, float]] = None
+    ):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            rates: Mapping of host to ``(requests, per_seconds)``; merged over
+                ``DEFAULT_RATES``
+            default_rate: Rate for hosts without an entry, unlimited if None
+        """
+        self.rates = {**self.DEFAULT_RATES, **(rates or {})}
+        self.default_rate = default_rate
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> Optional[TokenBucket]:
+        """
+        Get the token bucket for the host of a URL.
+
+        Args:
+            url: Request URL or bare host name
+
+        Returns:
+            Optional[TokenBucket]: Bucket for the host, None if unlimited
+        """
+        host = self._host(url)
+        if host in self._buckets:
+            return self._buckets[host]
+
+        with self._lock:
+            if host not in self._buckets:
+                rate = self.rates.get(host, self.default_rate)
+                self._buckets[host] = (
+                    TokenBucket(rate[0] / rate[1], capacity=max(1.0, rate[0]))
+                    if rate else None
+                )
+            return self._buckets[host]
+
+    def acquire(self, url: str, timeout: Optional[float] = None) -> float:
+        """
+        Block until a request to the URL's host is allowed.
+
+        Args:
+            url: Request URL or bare host name
+            timeout: Maximum seconds to wait, see ``TokenBucket.acquire``
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        bucket = self.bucket(url)
+        return bucket.acquire(timeout) if bucket else 0.0
+
+    async def async_acquire(self, url: str) -> float:
+        """
+        Wait on the event loop until a request to the URL's host is allowed.
+
+        Args:
+            url: Request URL or bare host name
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        bucket = self.bucket(url)
+        return await bucket.async_acquire() if bucket else 0.0
+
+    def update_from_headers(self, url: str, headers: Mapping[str, str]) -> None:
+        """
+        Adapt the host's bucket to rate-limit headers of a response.
+
+        Args:
+            url: Request URL
+            headers: Response headers
+        """
+        bucket = self.bucket(url)
+        if bucket is None:
+            return
+
+        limit = headers.get('X-Rate-Limit-Limit')
+        interval = parse_interval(headers.get('X-Rate-Limit-Interval', '1s'))
+        if limit and interval:
+            try:
+                requests_per_interval = float(limit)
+                rate = requests_per_interval / interval
+                if abs(rate - bucket.rate) > 1e-9:
+                    bucket.update(rate, capacity=max(1.0, requests_per_interval))
+            except ValueError:
+                pass
+
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+        if retry_after:
+            bucket.pause(retry_after)
+
+    @staticmethod
+    def _host(url: str) -> str:
+        host = urlsplit(url).hostname if '://' in url else url
+        return (host or url).lower()
+
+
+def parse_interval(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a CrossRef rate-limit interval such as ``"1s"`` into seconds.
+
+    Args:
+        value: Interval string
+
+    Returns:
+        Optional[float]: Interval in seconds, None if it cannot be parsed
+    """
+    if not value:
+        return None
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*', value)
+    if not match:
+        return None
+    scale = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}[match.group(2) or 's']
+    seconds = float(match.group(1)) * scale
+    return seconds or None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a ``Retry-After`` header given in seconds or as an HTTP date.
+
+    Args:
+        value: Header value
+
+    Returns:
+        Optional[float]: Seconds to wait, None if absent or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_default_rate_limiter() -> RateLimiter:
+    """
+    Get the process-wide rate limiter shared by all fetchers.
+
+    Returns:
+        RateLimiter: Shared rate limiter
+    """
+    global _default_limiter
+    if _default_limiter is None:
+        with _default_limiter_lock:
+            if _default_limiter is None:
+                _default_limiter = RateLimiter()
+    return _default_limiter
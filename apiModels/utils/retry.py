@@ -0,0 +1,94 @@
+import random
+from typing import Collection, Mapping, Optional
+
+import requests
+
+from .rate_limit import parse_retry_after
+
+# 限流和服务端临时故障，重试通常能成功
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before repeating a failed request.
+
+    Responses with a status in ``retry_statuses`` and connection errors or
+    timeouts are retried up to ``attempts - 1`` times. The wait before retry
+    ``n`` (counting from 0) is drawn uniformly from
+    ``[0, min(max_backoff, backoff * 2 ** n)]`` ("full jitter"), so clients
+    throttled together do not retry together; a ``Retry-After`` header
+    replaces the computed wait. Waits longer than ``max_wait`` are not
+    worth it and end the retries.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        max_wait: float = 60.0,
+        retry_statuses: Collection[int] = RETRY_STATUSES,
+        jitter: bool = True
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            attempts: Total number of attempts per request, 1 disables retries
+            backoff: Base wait in seconds, doubled after every retry
+            max_backoff: Upper bound for the computed wait in seconds
+            max_wait: Longest wait in seconds, including ``Retry-After``,
+                before giving up instead
+            retry_statuses: HTTP status codes worth retrying
+            jitter: If False, wait the full computed backoff
+        """
+        if attempts < 1:
+            raise ValueError(f"attempts must be at least 1, got {attempts}")
+
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_wait = max_wait
+        self.retry_statuses = frozenset(retry_statuses)
+        self.jitter = jitter
+
+    def is_retryable(
+        self,
+        status: Optional[int] = None,
+        error: Optional[BaseException] = None
+    ) -> bool:
+        """
+        Check whether a request outcome is transient.
+
+        Args:
+            status: HTTP status code of the response, if one was received
+            error: Exception raised by the request, if any
+
+        Returns:
+            bool: True for retryable status codes, connection errors and
+                timeouts
+        """
+        if error is not None:
+            return isinstance(error, (requests.ConnectionError, requests.Timeout))
+        return status in self.retry_statuses
+
+    def delay(self, retry: int, headers: Optional[Mapping[str, str]] = None) -> float:
+        """
+        Get the wait before a retry.
+
+        Args:
+            retry: Number of retries already made
+            headers: Headers of the failed response, if any
+
+        Returns:
+            float: Seconds to wait
+        """
+        retry_after = parse_retry_after((headers or {}).get('Retry-After'))
+        if retry_after is not None:
+            return retry_after
+        ceiling = min(self.max_backoff, self.backoff * 2 ** retry)
+        return random.uniform(0, ceiling) if self.jitter else ceiling
+
+
+NO_RETRY = RetryPolicy(attempts=1)
@@ -0,0 +1,133 @@
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class SessionPool:
+    """
+    Per-host pool of keep-alive ``requests.Session`` objects.
+
+    Every host gets its own session with a mounted ``HTTPAdapter``, so repeated
+    requests to CrossRef or DBLP reuse open TCP/TLS connections instead of
+    paying a fresh handshake for every query.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 20,
+        pool_block: bool = False,
+        keep_alive: bool = True
+    ):
+        """
+        Initialize the session pool.
+
+        Args:
+            pool_connections: Number of connection pools to cache per session
+            pool_maxsize: Maximum number of connections kept open per host
+            pool_block: If True, block when the pool is exhausted instead of
+                opening throwaway connections
+            keep_alive: If False, send ``Connection: close`` on every request
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def get_session(self, url: str) -> requests.Session:
+        """
+        Get the pooled session for the host of a URL.
+
+        Args:
+            url: Request URL
+
+        Returns:
+            requests.Session: Session bound to the URL's scheme and host
+        """
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._create_session(host)
+                self._sessions[host] = session
+            return session
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Send a GET request through the pooled session of the URL's host.
+
+        Args:
+            url: Request URL
+            **kwargs: Extra arguments passed to ``requests.Session.get``
+
+        Returns:
+            requests.Response: Response object
+        """
+        return self.get_session(url).get(url, **kwargs)
+
+    def close(self) -> None:
+        """Close all pooled sessions and their connections."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def _create_session(self, host: str) -> requests.Session:
+        """Create a session with a connection-pooling adapter for a host."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block
+        )
+        session.mount(host, adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def __enter__(self) -> 'SessionPool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+_default_pool: Optional[SessionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_session_pool() -> SessionPool:
+    """
+    Get the process-wide session pool shared by all fetchers.
+
+    Returns:
+        SessionPool: Shared session pool
+    """
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = SessionPool()
+    return _default_pool
+
+
+def set_default_session_pool(pool: SessionPool) -> None:
+    """
+    Replace the process-wide session pool, e.g. to change pool size.
+
+    Args:
+        pool: Session pool used by fetchers created without an explicit pool
+    """
+    global _default_pool
+    with _default_pool_lock:
+        _default_pool = pool
@@ -0,0 +1,98 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .cancellation import LookupCancelled, check_cancelled
+from .deadline import DeadlineExceeded, check_deadline, current_deadline
+
+# 等待者检查自身取消和截止时间的间隔（秒）
+WAIT_SLICE = 0.05
+
+
+class _Call:
+    """An in-flight call and the outcome shared with its waiters."""
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one.
+
+    The first caller for a key runs the function; callers arriving with the
+    same key while it is in flight wait for it and receive the same result
+    or exception instead of running the function again. Nothing is kept once
+    the call finishes, so later callers start a new call.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight."""
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Run ``func`` unless an identical call is already in flight.
+
+        If the running call was cancelled (e.g. it lost a race) or ran out of
+        its deadline, waiters are not failed with it and retry on their own.
+        Waiters still honour their own cancellation and deadline while
+        waiting, raising ``LookupCancelled`` or ``DeadlineExceeded``.
+
+        Args:
+            key: Key identifying identical calls
+            func: Function performing the call
+
+        Returns:
+            Any: Result of the shared call
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+
+            if leader:
+                return self._run(key, call, func)
+
+            self._wait(call)
+            if isinstance(call.error, (LookupCancelled, DeadlineExceeded)):
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        with self._lock:
+            return len(self._calls)
+
+    @staticmethod
+    def _wait(call: _Call) -> None:
+        """Wait for a call in short slices, checking cancellation and deadline."""
+        while True:
+            check_cancelled()
+            check_deadline()
+            timeout = WAIT_SLICE
+            deadline = current_deadline()
+            if deadline is not None:
+                timeout = min(timeout, deadline.remaining())
+            if call.done.wait(timeout):
+                return
+
+    def _run(self, key: Hashable, call: _Call, func: Callable[[], Any]) -> Any:
+        try:
+            call.value = func()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
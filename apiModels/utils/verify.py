@@ -1,26 +1,126 @@
-import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from tqdm import tqdm
 
+from .bibtex import iter_bibtex
+from .cache import normalize_title
 
-def verify_bibtex(bibtexs: list, raws: str):
+
+class CitationIndex:
+    """
+    Index of a raw citation corpus for verifying titles.
+
+    Every non-empty line of the corpus is treated as one citation. The
+    corpus is normalized once into a hash table of whole normalized lines,
+    for titles listed one per line, and an inverted index from words and
+    word n-grams to the lines containing them, for titles embedded in longer
+    references. Looking up a title then only touches the lines sharing its
+    n-grams.
+    """
+
+    def __init__(self, raws: Union[str, Iterable[str]], ngram_size: int = 3):
+        """
+        Build the index.
+
+        Args:
+            raws: Raw citation text, or an iterable of citation lines
+            ngram_size: Number of consecutive words per indexed n-gram
+        """
+        if ngram_size < 1:
+            raise ValueError(f"ngram_size must be at least 1, got {ngram_size}")
+
+        lines = raws.splitlines() if isinstance(raws, str) else raws
+        self.ngram_size = ngram_size
+        self.citations: List[str] = []
+        self._exact: Dict[str, int] = {}
+        self._postings: Dict[Tuple[str, ...], Set[int]] = defaultdict(set)
+
+        for line in lines:
+            normalized = normalize_title(line)
+            if not normalized:
+                continue
+            line_id = len(self.citations)
+            self.citations.append(line.strip())
+            self._exact.setdefault(normalized, line_id)
+            words = normalized.split()
+            # 单词索引用于短于 n 个词的标题
+            for gram in set(self._ngrams(words, 1)) | set(self._ngrams(words, ngram_size)):
+                self._postings[gram].add(line_id)
+
+    def score(self, title: str) -> Tuple[float, Optional[str]]:
+        """
+        Score how well a title is covered by the best matching citation.
+
+        Args:
+            title: Title to look up
+
+        Returns:
+            Tuple[float, Optional[str]]: Fraction of the title's n-grams found
+                in the best citation (1.0 for a full match), and that citation
+        """
+        normalized = normalize_title(title)
+        if not normalized:
+            return 0.0, None
+
+        line_id = self._exact.get(normalized)
+        if line_id is not None:
+            return 1.0, self.citations[line_id]
+
+        words = normalized.split()
+        size = self.ngram_size if len(words) >= self.ngram_size else 1
+        grams = set(self._ngrams(words, size))
+        hits: Counter = Counter()
+        for gram in grams:
+            hits.update(self._postings.get(gram, ()))
+        if not hits:
+            return 0.0, None
+
+        line_id, count = hits.most_common(1)[0]
+        return count / len(grams), self.citations[line_id]
+
+    def __len__(self) -> int:
+        return len(self.citations)
+
+    @staticmethod
+    def _ngrams(words: List[str], size: int) -> Iterable[Tuple[str, ...]]:
+        return (tuple(words[i:i + size]) for i in range(len(words) - size + 1))
+
+
+def score_bibtex(
+    bibtexs: List[str],
+    raws: Union[str, CitationIndex],
+    ngram_size: int = 3
+) -> List[Tuple[str, float]]:
+    """
+    Score the title of every BibTeX entry against the raw citations.
+
+    Args:
+        bibtexs: List of BibTeX strings, each holding one or more entries
+        raws: Raw citation text or a prebuilt ``CitationIndex``
+        ngram_size: Words per n-gram when building the index from text
+
+    Returns:
+        List[Tuple[str, float]]: ``(title, score)`` pairs in input order
+    """
+    index = raws if isinstance(raws, CitationIndex) else CitationIndex(raws, ngram_size)
+    scores = []
+    for bibtex in tqdm(bibtexs):
+        for entry in iter_bibtex(bibtex):
+            title = entry.get('title')
+            if title:
+                scores.append((title, index.score(title)[0]))
+    return scores
+
+
+def verify_bibtex(bibtexs: list, raws: str, threshold: float = 1.0):
     """
     verify bibtexs whether all in raws
     :param bibtexs: List of output bibtex
     :param raws: str for all citation, you can use f.read to get it
+    :param threshold: minimum score from ``score_bibtex`` a title needs to pass,
+        1.0 requires every word n-gram of the title to be in one citation line
     :return: the citation not in raws, means the bibtex is wrong
         but it is less likely to happen, "get_bibtex_...“ has been verified
     """
-    res = []
-    for bibtex in tqdm(bibtexs):
-        if bibtex.strip() == "":
-            continue
-        result = re.search(r"title={.*?}", bibtex).group(0)
-        # 取出title={title}中的title 正则做法
-        title = result[7:-1]
-        # 查询title是否在raws中 正则做法
-        try:
-            aa = re.search(title.lower(), raws.lower()).group()
-        except AttributeError:
-            res.append(title)
-    return res
+    return [title for title, score in score_bibtex(bibtexs, raws) if score < threshold]
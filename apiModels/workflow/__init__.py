@@ -1,7 +1,9 @@
+from .adaptive import AdaptiveOrder
 from .crossref2dblp import CrossRefToDBLP
 from .make_workflow import WorkflowBuilder
 
 __all__ = [
+    'AdaptiveOrder',
     'CrossRefToDBLP',
     'WorkflowBuilder'
 ]
@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import re
+import statistics
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from ..meta_class import BibTexFetcher
+from ..utils.query import QUERY_TITLE, classify_query
+
+logger = logging.getLogger(__name__)
+
+QUERY_CS_TITLE = 'cs_title'
+
+# 计算机领域标题中常见的词，用于区分 DBLP 更可能收录的标题
+CS_TERMS = frozenset({
+    'algorithm', 'algorithms', 'attention', 'bert', 'cache', 'clustering',
+    'compiler', 'computing', 'convolutional', 'cryptographic', 'database',
+    'databases', 'dataset', 'deep', 'distributed', 'embedding', 'embeddings',
+    'federated', 'gpu', 'graph', 'graphs', 'kernel', 'language', 'learning',
+    'llm', 'neural', 'network', 'networks', 'parallel', 'pre', 'programming',
+    'protocol', 'quantization', 'query', 'recommendation', 'reinforcement',
+    'retrieval', 'robot', 'robotic', 'scheduling', 'semantic', 'software',
+    'sql', 'supervised', 'transformer', 'transformers', 'unsupervised',
+    'vision', 'wireless'
+})
+
+# 没有观测数据时假设的命中率和延迟（秒）
+PRIOR_HITS = 1
+PRIOR_ATTEMPTS = 2
+DEFAULT_LATENCY = 1.0
+
+
+def query_class(query: str) -> str:
+    """
+    Classify a query for per-class source statistics.
+
+    Args:
+        query: Search query
+
+    Returns:
+        str: Identifier kind from ``classify_query`` for identifiers,
+            ``'cs_title'`` for titles that look like computer science
+            venues' papers, otherwise ``'title'``
+    """
+    kind, title = classify_query(query)
+    if kind != QUERY_TITLE:
+        return kind
+    words = set(re.findall(r'[a-z]+', title.lower()))
+    return QUERY_CS_TITLE if words & CS_TERMS else QUERY_TITLE
+
+
+class SourceStats:
+    """Hit rate and recent latencies of one fetcher for one query class."""
+
+    __slots__ = ('attempts', 'hits', 'latencies')
+
+    def __init__(self, window: int, attempts: int = 0, hits: int = 0, latencies=()):
+        self.attempts = attempts
+        self.hits = hits
+        self.latencies = deque(latencies, maxlen=window)
+
+    @property
+    def hit_rate(self) -> float:
+        """Hit rate smoothed towards 50% while there are few observations."""
+        return (self.hits + PRIOR_HITS) / (self.attempts + PRIOR_ATTEMPTS)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile in seconds, None without observations."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self) -> Dict:
+        return {
+            'attempts': self.attempts,
+            'hits': self.hits,
+            'latencies': [round(latency, 4) for latency in self.latencies],
+        }
+
+
+class AdaptiveOrder:
+    """
+    Learned fetcher order for the ``'adaptive'`` workflow strategy.
+
+    For every query class and fetcher, the number of lookups, hits and recent
+    latencies are recorded. Fetchers are then tried in order of expected cost
+    per hit, median latency divided by hit rate, which minimizes the expected
+    time until the first hit of a sequential fallback chain. Statistics can be
+    persisted as JSON so the learned order survives between runs.
+    """
+
+    def __init__(self, stats_path: Optional[str] = None, window: int = 200):
+        """
+        Initialize the statistics, loading earlier ones if they exist.
+
+        Args:
+            stats_path: Optional JSON file to load statistics from and save
+                them to
+            window: Number of most recent latencies kept per fetcher and class
+        """
+        self.stats_path = Path(stats_path) if stats_path else None
+        self.window = window
+        self._stats: Dict[str, Dict[str, SourceStats]] = {}
+        self._lock = threading.Lock()
+        if self.stats_path is not None and self.stats_path.exists():
+            self._load()
+
+    def order(self, query: str, fetchers: Sequence[BibTexFetcher]) -> List[BibTexFetcher]:
+        """
+        Sort fetchers by expected cost per hit for the query's class.
+
+        Fetchers with equal cost, e.g. all unobserved ones, keep their
+        configured order.
+
+        Args:
+            query: Search query
+            fetchers: Fetchers in configured order
+
+        Returns:
+            List[BibTexFetcher]: Fetchers in the order to try them
+        """
+        with self._lock:
+            stats = self._stats.get(query_class(query), {})
+            medians = [
+                s.percentile(0.5) for s in stats.values() if s.latencies
+            ]
+            default_latency = statistics.median(medians) if medians else DEFAULT_LATENCY
+
+            def cost(fetcher: BibTexFetcher) -> float:
+                source = stats.get(fetcher.__class__.__name__)
+                if source is None:
+                    return default_latency / (PRIOR_HITS / PRIOR_ATTEMPTS)
+                latency = source.percentile(0.5)
+                return (latency if latency is not None else default_latency) / source.hit_rate
+
+            return sorted(fetchers, key=cost)
+
+    def record(self, query: str, fetcher_name: str, hit: bool, elapsed: float) -> None:
+        """
+        Record the outcome of one lookup.
+
+        Args:
+            query: Search query
+            fetcher_name: Name of the fetcher's class
+            hit: Whether the fetcher returned a citation
+            elapsed: Lookup duration in seconds
+        """
+        with self._lock:
+            sources = self._stats.setdefault(query_class(query), {})
+            source = sources.get(fetcher_name)
+            if source is None:
+                source = sources[fetcher_name] = SourceStats(self.window)
+            source.attempts += 1
+            source.hits += hit
+            source.latencies.append(elapsed)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict]]:
+        """
+        Get the current statistics.
+
+        Returns:
+            Dict[str, Dict[str, Dict]]: Per query class and fetcher, the
+                number of ``attempts`` and ``hits``, the ``hit_rate`` and the
+                ``p50``/``p95`` latencies in seconds
+        """
+        with self._lock:
+            return {
+                kind: {
+                    name: {
+                        'attempts': source.attempts,
+                        'hits': source.hits,
+                        'hit_rate': source.hits / source.attempts if source.attempts else 0.0,
+                        'p50': source.percentile(0.5),
+                        'p95': source.percentile(0.95),
+                    }
+                    for name, source in sources.items()
+                }
+                for kind, sources in self._stats.items()
+            }
+
+    def save(self) -> None:
+        """Write the statistics to ``stats_path``, replacing the file atomically."""
+        if self.stats_path is None:
+            return
+        with self._lock:
+            data = {
+                kind: {name: source.to_dict() for name, source in sources.items()}
+                for kind, sources in self._stats.items()
+            }
+        self.stats_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.stats_path.with_name(self.stats_path.name + '.tmp')
+        tmp_path.write_text(json.dumps(data, indent=2), encoding='utf-8')
+        os.replace(tmp_path, self.stats_path)
+
+    def _load(self) -> None:
+        """Load statistics saved by an earlier run."""
+        try:
+            data = json.loads(self.stats_path.read_text(encoding='utf-8'))
+            self._stats = {
+                kind: {
+                    name: SourceStats(
+                        self.window, source['attempts'], source['hits'], source['latencies']
+                    )
+                    for name, source in sources.items()
+                }
+                for kind, sources in data.items()
+            }
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable source statistics {self.stats_path}: {e}")
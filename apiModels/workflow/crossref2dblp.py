@@ -1,6 +1,8 @@
 from typing import List, Dict, Optional, Tuple
 from ..get_bibtex_from_crossref import CrossRefBibTeX
 from ..get_bibtex_from_dblp import DBLPBibTeX
+from ..utils.session import SessionPool
+from .race import race_fetchers
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,15 +15,30 @@ class CrossRefToDBLP:
     and if that fails, falls back to DBLP as a backup source.
     """
 
-    def __init__(self, email: Optional[str] = None):
+    def __init__(
+        self,
+        email: Optional[str] = None,
+        session_pool: Optional[SessionPool] = None,
+        strategy: str = 'sequential',
+        hedge_delay: Optional[float] = None
+    ):
         """
         Initialize the workflow.
 
         Args:
             email: Optional email for CrossRef's polite pool
+            session_pool: Optional connection pool shared by both fetchers
+            strategy: ``'sequential'`` falls back to DBLP after a CrossRef
+                miss; ``'race'`` queries both at once and keeps the first hit
+            hedge_delay: For ``'race'``, seconds to wait for CrossRef before
+                also starting DBLP; None starts both at once
         """
-        self.crossref = CrossRefBibTeX(email)
-        self.dblp = DBLPBibTeX()
+        if strategy not in ('sequential', 'race'):
+            raise ValueError(f"Unknown strategy {strategy!r}")
+        self.crossref = CrossRefBibTeX(email, session_pool=session_pool)
+        self.dblp = DBLPBibTeX(session_pool=session_pool)
+        self.strategy = strategy
+        self.hedge_delay = hedge_delay
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def get_bibtex(self, query: str) -> Optional[str]:
@@ -35,6 +52,16 @@ class CrossRefToDBLP:
             Optional[str]: BibTeX citation if found, None otherwise
         """
         try:
+            if self.strategy == 'race':
+                winner = race_fetchers([self.crossref, self.dblp], query, self.hedge_delay)
+                if winner:
+                    self.logger.info(
+                        f"Found citation in {winner[0].__class__.__name__} for: {query}"
+                    )
+                    return winner[1]
+                self.logger.warning(f"No citation found for: {query}")
+                return None
+
             # Try CrossRef first
             bibtex = self.crossref.get_bibtex(query)
             if bibtex:
@@ -1,7 +1,21 @@
-from typing import List, Dict, Optional, Type
+from typing import Any, List, Dict, Optional, Type, Iterable, Iterator, Tuple, TextIO, Union, Callable
 from ..meta_class import BibTexFetcher
+from ..utils.circuit_breaker import CircuitBreaker
+from ..utils.concurrency import gather_limited
+from ..utils.deadline import DeadlineExceeded, deadline_scope
+from ..utils.dedupe import DedupeIndex
+from ..utils.journal import JobJournal
+from ..utils.metrics import to_prometheus
+from ..utils.query import QUERY_TITLE, classify_query, coalesce_queries
+from .adaptive import AdaptiveOrder
+from .race import race_fetchers
 from tqdm import tqdm
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
 import logging
+import time
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -14,17 +28,69 @@ class WorkflowBuilder:
     fetchers in a specified order, with configurable fallback behavior.
     """
 
-    def __init__(self):
-        """Initialize the workflow builder."""
+    STRATEGIES = ('sequential', 'race', 'adaptive')
+
+    def __init__(
+        self,
+        strategy: str = 'sequential',
+        hedge_delay: Optional[float] = None,
+        circuit_breakers: bool = True,
+        route_identifiers: bool = True,
+        stats_path: Optional[str] = None,
+        query_timeout: Optional[float] = None
+    ):
+        """
+        Initialize the workflow builder.
+
+        Args:
+            strategy: ``'sequential'`` tries fetchers one after another;
+                ``'race'`` queries them at the same time and keeps the first
+                valid BibTeX, cancelling the rest; ``'adaptive'`` tries them
+                one after another, ordered per query class by observed hit
+                rate and latency (see ``AdaptiveOrder``)
+            hedge_delay: For ``'race'``, seconds to wait for a fetcher before
+                starting the next one; None starts all fetchers at once
+            circuit_breakers: If True, give every fetcher a ``CircuitBreaker``
+                so sources that keep failing or timing out are skipped until
+                a probe lookup succeeds
+            route_identifiers: If True, send DOIs, DBLP keys and arXiv IDs
+                only to the fetchers that resolve them with a direct lookup
+                (see ``BibTexFetcher.direct_identifiers``); titles, and
+                identifiers no configured fetcher resolves directly, go
+                through the whole chain
+            stats_path: For ``'adaptive'``, optional JSON file the learned
+                statistics are loaded from and saved to after each batch
+            query_timeout: Seconds each query may take across all fetchers,
+                None for no limit. The remaining budget caps the connect and
+                read timeouts of every HTTP request; once it runs out the
+                query stops with whatever was found so far
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(
+                f"Unknown strategy {strategy!r}, expected one of {self.STRATEGIES}"
+            )
         self.fetchers: List[BibTexFetcher] = []
+        self.strategy = strategy
+        self.hedge_delay = hedge_delay
+        self.circuit_breakers = circuit_breakers
+        self.breakers: Dict[BibTexFetcher, CircuitBreaker] = {}
+        self.route_identifiers = route_identifiers
+        self.adaptive = AdaptiveOrder(stats_path) if strategy == 'adaptive' else None
+        self.query_timeout = query_timeout
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def add_fetcher(self, fetcher: BibTexFetcher) -> 'WorkflowBuilder':
+    def add_fetcher(
+        self,
+        fetcher: BibTexFetcher,
+        breaker: Optional[CircuitBreaker] = None
+    ) -> 'WorkflowBuilder':
         """
         Add a BibTeX fetcher to the workflow.
 
         Args:
             fetcher: Instance of a BibTexFetcher
+            breaker: Optional circuit breaker for the fetcher; a default one
+                is created if circuit breakers are enabled
 
         Returns:
             WorkflowBuilder: self for method chaining
@@ -33,6 +99,11 @@ class WorkflowBuilder:
             raise ValueError(
                 f"Fetcher must be an instance of BibTexFetcher, got {type(fetcher)}"
             )
+        if breaker is None and self.circuit_breakers:
+            breaker = CircuitBreaker(name=fetcher.__class__.__name__)
+        if breaker is not None:
+            fetcher.add_request_listener(breaker.on_request)
+            self.breakers[fetcher] = breaker
         self.fetchers.append(fetcher)
         return self
 
@@ -44,11 +115,32 @@ class WorkflowBuilder:
             query: Search query (DOI, title, etc.)
 
         Returns:
-            Optional[str]: First successful BibTeX citation found, or None if all fail
+            Optional[str]: First successful BibTeX citation found, or None if all
+                fail or ``query_timeout`` runs out
         """
-        for fetcher in self.fetchers:
+        with deadline_scope(self.query_timeout):
             try:
-                bibtex = fetcher.get_bibtex(query)
+                return self._get_bibtex(query)
+            except DeadlineExceeded:
+                self.logger.warning(f"Query timed out after {self.query_timeout}s: {query}")
+                return None
+
+    def _get_bibtex(self, query: str) -> Optional[str]:
+        if self.strategy == 'race':
+            winner = self._race(query)
+            if winner:
+                self.logger.info(
+                    f"Found citation using {winner[0].__class__.__name__} for: {query}"
+                )
+                return winner[1]
+            self.logger.warning(f"No citation found for: {query}")
+            return None
+
+        for fetcher in self._chain(query):
+            if not self._is_available(fetcher):
+                continue
+            try:
+                bibtex = self._lookup(fetcher, query)
                 if bibtex:
                     self.logger.info(
                         f"Found citation using {fetcher.__class__.__name__} for: {query}"
@@ -66,47 +158,211 @@ class WorkflowBuilder:
     def get_multiple_bibtex(
         self, 
         queries: List[str],
-        stop_on_first: bool = True
+        stop_on_first: bool = True,
+        max_workers: Optional[int] = None,
+        journal: Optional[Union[str, JobJournal]] = None
     ) -> Dict[str, Dict[str, str]]:
         """
         Get BibTeX citations for multiple queries using all configured fetchers.
 
+        Queries that differ only in case, whitespace or a DOI prefix are
+        resolved once and the result is returned for each of them.
+
         Args:
             queries: List of search queries
             stop_on_first: If True, stop searching once a citation is found
+            max_workers: If set, resolve queries in parallel on a thread pool
+                of this size; each fetcher still caps its own concurrency
+                with ``max_concurrency``
+            journal: Optional progress journal (or its path); queries it
+                records as found are not fetched again, and every newly
+                finished query is appended to it
 
         Returns:
             Dict[str, Dict[str, str]]: Dictionary mapping queries to results from each fetcher
         """
-        results: Dict[str, Dict[str, str]] = {
-            query: {} for query in queries
-        }
-        
-        for query in tqdm(queries, desc="Processing queries"):
-            for fetcher in self.fetchers:
-                fetcher_name = fetcher.__class__.__name__
-                
-                try:
-                    if stop_on_first and any(results[query].values()):
+        journal, owns_journal = self._open_journal(journal, keep_results=True)
+        try:
+            results: Dict[str, Dict[str, str]] = {}
+            aliases: Dict[str, List[str]] = {}
+            for query in dict.fromkeys(queries):
+                if journal is not None and journal.is_resolved(query):
+                    results[query] = journal.get_results(query) or {}
+            for query, representative in coalesce_queries(
+                query for query in queries if query not in results
+            ).items():
+                aliases.setdefault(representative, []).append(query)
+
+            pending = list(aliases)
+            resolve = self._resolver(stop_on_first, journal, aliases)
+            if max_workers is None or max_workers <= 1:
+                for representative in tqdm(pending, desc="Processing queries"):
+                    results.update(dict.fromkeys(aliases[representative], resolve(representative)))
+            else:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    fetched = executor.map(resolve, pending)
+                    for representative, result in zip(
+                        pending, tqdm(fetched, total=len(pending), desc="Processing queries")
+                    ):
+                        results.update(dict.fromkeys(aliases[representative], result))
+
+            return {query: results[query] for query in queries}
+
+        finally:
+            if owns_journal:
+                journal.close()
+            self.save_statistics()
+
+    async def async_get_bibtex(self, query: str) -> Optional[str]:
+        """
+        Asynchronously get BibTeX citation using all configured fetchers in order.
+
+        Args:
+            query: Search query (DOI, title, etc.)
+
+        Returns:
+            Optional[str]: First successful BibTeX citation found, or None if all fail
+        """
+        return await asyncio.to_thread(self.get_bibtex, query)
+
+    async def async_get_multiple_bibtex(
+        self,
+        queries: List[str],
+        stop_on_first: bool = True,
+        concurrency: int = 10
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        Asynchronously get BibTeX citations for multiple queries, resolving up
+        to ``concurrency`` queries at the same time. Queries that differ only
+        in case, whitespace or a DOI prefix are resolved once.
+
+        Args:
+            queries: List of search queries
+            stop_on_first: If True, stop searching once a citation is found
+            concurrency: Maximum number of queries in flight
+
+        Returns:
+            Dict[str, Dict[str, str]]: Dictionary mapping queries to results from each fetcher
+        """
+        representatives = coalesce_queries(queries)
+        unique = list(dict.fromkeys(representatives.values()))
+        fetched = await gather_limited(
+            self._resolver(stop_on_first),
+            unique,
+            concurrency,
+            desc="Processing queries"
+        )
+        self.save_statistics()
+        results = dict(zip(unique, fetched))
+        return {query: results[representatives[query]] for query in queries}
+
+    def _resolve_query(self, query: str, stop_on_first: bool) -> Dict[str, str]:
+        """
+        Run one query through the configured fetchers.
+
+        Args:
+            query: Search query
+            stop_on_first: If True, stop searching once a citation is found
+
+        Returns:
+            Dict[str, str]: Dictionary mapping fetcher names to BibTeX
+                citations found before ``query_timeout`` ran out
+        """
+        result: Dict[str, str] = {}
+        with deadline_scope(self.query_timeout):
+            try:
+                if stop_on_first and self.strategy == 'race':
+                    winner = self._race(query)
+                    return {winner[0].__class__.__name__: winner[1]} if winner else {}
+
+                for fetcher in self._chain(query):
+                    fetcher_name = fetcher.__class__.__name__
+
+                    try:
+                        if stop_on_first and any(result.values()):
+                            break
+                        if not self._is_available(fetcher):
+                            continue
+
+                        bibtex = self._lookup(fetcher, query)
+                        if bibtex:
+                            result[fetcher_name] = bibtex
+
+                    except Exception as e:
+                        self.logger.error(
+                            f"Error with {fetcher_name} for {query}: {str(e)}"
+                        )
                         continue
-                        
-                    bibtex = fetcher.get_bibtex(query)
-                    if bibtex:
-                        results[query][fetcher_name] = bibtex
-                        
-                except Exception as e:
-                    self.logger.error(
-                        f"Error with {fetcher_name} for {query}: {str(e)}"
-                    )
-                    continue
+            except DeadlineExceeded:
+                self.logger.warning(f"Query timed out after {self.query_timeout}s: {query}")
 
-        return results
+        return result
+
+    def iter_multiple_bibtex(
+        self,
+        queries: Iterable[str],
+        stop_on_first: bool = True,
+        max_workers: Optional[int] = None,
+        journal: Optional[JobJournal] = None
+    ) -> Iterator[Tuple[str, Dict[str, str]]]:
+        """
+        Lazily resolve queries and yield each result as soon as it is ready.
+
+        Queries are pulled from the iterable on demand and results are yielded
+        in input order, so memory stays bounded by the number of queries in
+        flight rather than the size of the input.
+
+        Args:
+            queries: Iterable of search queries, e.g. a file object
+            stop_on_first: If True, stop searching once a citation is found
+            max_workers: If set, resolve up to this many queries in parallel
+            journal: Optional progress journal; queries it records as found
+                are skipped. A finished query is appended to it only once the
+                consumer asks for the next result, i.e. after it has handled
+                (e.g. written out) this one, so a crash never leaves queries
+                journaled that were not written
+
+        Yields:
+            Tuple[str, Dict[str, str]]: Query and its results from each fetcher
+        """
+        if journal is not None:
+            queries = (query for query in queries if not journal.is_resolved(query))
+        resolve = self._resolver(stop_on_first)
+
+        def results() -> Iterator[Tuple[str, Dict[str, str]]]:
+            if max_workers is None or max_workers <= 1:
+                for query in queries:
+                    yield query, resolve(query)
+                return
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                window = deque()
+                for query in queries:
+                    window.append((query, executor.submit(resolve, query)))
+                    # 限制在途查询数量，保证内存占用恒定
+                    if len(window) >= max_workers * 2:
+                        done_query, future = window.popleft()
+                        yield done_query, future.result()
+
+                while window:
+                    done_query, future = window.popleft()
+                    yield done_query, future.result()
+
+        for query, result in results():
+            yield query, result
+            # 调用方处理完（如已写入输出）后才记录到日志
+            if journal is not None:
+                journal.record(query, result)
 
     def process_file(
         self, 
         input_path: str, 
         output_path: str,
-        stop_on_first: bool = True
+        stop_on_first: bool = True,
+        max_workers: Optional[int] = None,
+        stream: bool = False,
+        journal_path: Optional[str] = None,
+        dedupe: bool = False
     ) -> bool:
         """
         Process queries from a file and save results.
@@ -115,6 +371,18 @@ class WorkflowBuilder:
             input_path: Path to input file containing queries
             output_path: Path to save results
             stop_on_first: If True, stop searching once a citation is found
+            max_workers: If set, resolve queries in parallel on a thread pool
+            stream: If True, read queries lazily and write each entry to the
+                output as soon as it is resolved, keeping memory flat and
+                preserving finished work if the run is interrupted
+            journal_path: Optional path of a progress journal. A restarted
+                job skips queries the journal records as found and retries
+                only pending, missing or failed ones; in stream mode new
+                entries are appended to the existing output
+            dedupe: If True, write every paper once, merging the entries
+                that different queries and fetchers returned for it; in
+                stream mode later duplicates are replaced by a comment
+                pointing to the entry already written
 
         Returns:
             bool: True if successful, False otherwise
@@ -124,27 +392,59 @@ class WorkflowBuilder:
             input_file = Path(input_path)
             if not input_file.exists():
                 raise FileNotFoundError(f"Input file not found: {input_path}")
-                
+
+            output_file = Path(output_path)
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+
+            if stream:
+                journal = (
+                    JobJournal(journal_path, keep_results=False) if journal_path else None
+                )
+                try:
+                    resumed = journal is not None and journal.resolved_count > 0
+                    mode = 'a' if resumed else 'w'
+                    total = found = 0
+                    index = DedupeIndex(keep_entries=False) if dedupe else None
+                    with open(output_file, mode, encoding='utf-8') as f:
+                        for query, fetcher_results in self.iter_multiple_bibtex(
+                            self._iter_queries(input_file), stop_on_first, max_workers, journal
+                        ):
+                            duplicates: List[str] = []
+                            if index is not None:
+                                fetcher_results, duplicates = self._split_duplicates(
+                                    index, query, fetcher_results
+                                )
+                            self._write_entry(f, query, fetcher_results, duplicates)
+                            f.flush()
+                            total += 1
+                            found += bool(fetcher_results or duplicates)
+                finally:
+                    if journal is not None:
+                        journal.close()
+                    self.save_statistics()
+
+                self.logger.info(f"Processed {total} queries, found {found} citations")
+                return True
+
             with open(input_file, 'r', encoding='utf-8') as f:
                 queries = [line.strip() for line in f if line.strip()]
 
             # Get citations
-            results = self.get_multiple_bibtex(queries, stop_on_first)
+            results = self.get_multiple_bibtex(
+                queries, stop_on_first, max_workers, journal=journal_path
+            )
 
             # Save results
-            output_file = Path(output_path)
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-            
             with open(output_file, 'w', encoding='utf-8') as f:
-                for query, fetcher_results in results.items():
-                    f.write(f"% Query: {query}\n")
-                    if not fetcher_results:
-                        f.write("% No citations found\n\n")
-                        continue
-                        
-                    for fetcher_name, bibtex in fetcher_results.items():
-                        f.write(f"% Source: {fetcher_name}\n")
-                        f.write(f"{bibtex}\n\n")
+                if dedupe:
+                    for group in self.deduplicate(results):
+                        self._write_group(f, group)
+                    for query, fetcher_results in results.items():
+                        if not fetcher_results:
+                            self._write_entry(f, query, fetcher_results)
+                else:
+                    for query, fetcher_results in results.items():
+                        self._write_entry(f, query, fetcher_results)
 
             # Log statistics
             total = len(queries)
@@ -157,19 +457,220 @@ class WorkflowBuilder:
             self.logger.error(f"Error processing file: {str(e)}")
             return False
 
-    def get_statistics(self) -> Dict[str, Dict[str, int]]:
+    @staticmethod
+    def deduplicate(results: Dict[str, Dict[str, str]]) -> List[Dict]:
+        """
+        Collapse the entries of batch results that describe the same paper.
+
+        Entries are matched by DOI and normalized title across all queries
+        and fetchers, and each paper's entries are merged into one.
+
+        Args:
+            results: Results as returned by ``get_multiple_bibtex``
+
+        Returns:
+            List[Dict]: One dict per paper with the merged ``bibtex``, its
+                citation ``key``, and the ``queries`` and ``sources`` it was
+                found for
+        """
+        index = DedupeIndex()
+        for query, fetcher_results in results.items():
+            for fetcher_name, bibtex in fetcher_results.items():
+                index.add(bibtex, query, fetcher_name)
+        return index.groups()
+
+    def route(self, query: str) -> List[BibTexFetcher]:
+        """
+        Get the fetchers a query is sent to, in order.
+
+        Args:
+            query: Search query
+
+        Returns:
+            List[BibTexFetcher]: Fetchers resolving the query's identifier
+                directly if routing is enabled and any exist, otherwise all
+        """
+        if not self.route_identifiers:
+            return self.fetchers
+        kind, _ = classify_query(query)
+        if kind == QUERY_TITLE:
+            return self.fetchers
+        direct = [fetcher for fetcher in self.fetchers if kind in fetcher.direct_identifiers]
+        return direct or self.fetchers
+
+    def _chain(self, query: str) -> List[BibTexFetcher]:
+        """Routed fetchers in the order a sequential lookup tries them."""
+        fetchers = self.route(query)
+        if self.adaptive is not None:
+            return self.adaptive.order(query, fetchers)
+        return fetchers
+
+    def _lookup(self, fetcher: BibTexFetcher, query: str) -> Optional[str]:
+        """
+        Run one fetcher within its concurrency cap, recording the outcome.
+
+        If the lookup is its circuit breaker's half-open probe and ends
+        without sending a request, e.g. on a cache hit or when cancelled,
+        the probe is handed back so the next lookup can take it.
+        """
+        breaker = self.breakers.get(fetcher)
+        probe = breaker is not None and breaker.state == CircuitBreaker.HALF_OPEN
+        start = None
+        bibtex = None
+        try:
+            with fetcher.semaphore:
+                # 排队等待并发名额的时间不计入来源的延迟
+                start = time.monotonic()
+                bibtex = fetcher.get_bibtex(query)
+            return bibtex
+        finally:
+            if probe:
+                breaker.release_probe()
+            if self.adaptive is not None and start is not None:
+                self.adaptive.record(
+                    query, fetcher.__class__.__name__, bool(bibtex), time.monotonic() - start
+                )
+
+    def save_statistics(self) -> None:
+        """Persist the adaptive strategy's learned statistics to ``stats_path``."""
+        if self.adaptive is not None:
+            self.adaptive.save()
+
+    def _is_available(self, fetcher: BibTexFetcher) -> bool:
+        """Check whether a fetcher's circuit breaker lets a lookup through."""
+        breaker = self.breakers.get(fetcher)
+        if breaker is None or breaker.allow():
+            return True
+        self.logger.debug(f"Skipping {fetcher.__class__.__name__}: circuit open")
+        return False
+
+    def _race(self, query: str) -> Optional[Tuple[BibTexFetcher, str]]:
+        """Race the routed fetchers, checking each breaker only when it is launched."""
+        return race_fetchers(
+            self.route(query), query, self.hedge_delay,
+            is_available=self._is_available, lookup=self._lookup
+        )
+
+    def _resolver(
+        self,
+        stop_on_first: bool,
+        journal: Optional[JobJournal] = None,
+        aliases: Optional[Dict[str, List[str]]] = None
+    ) -> Callable[[str], Dict[str, str]]:
+        """
+        Build a function resolving one query and recording it in the journal,
+        under each of its original spellings if ``aliases`` maps them.
+        """
+        def resolve(query: str) -> Dict[str, str]:
+            result = self._resolve_query(query, stop_on_first)
+            if journal is not None:
+                for original in (aliases or {}).get(query, [query]):
+                    journal.record(original, result)
+            return result
+
+        return resolve
+
+    @staticmethod
+    def _open_journal(
+        journal: Optional[Union[str, JobJournal]],
+        keep_results: bool
+    ) -> Tuple[Optional[JobJournal], bool]:
+        """Open a journal given by path; returns it and whether the caller owns it."""
+        if journal is None or isinstance(journal, JobJournal):
+            return journal, False
+        return JobJournal(journal, keep_results=keep_results), True
+
+    @staticmethod
+    def _iter_queries(input_file: Path) -> Iterator[str]:
+        """Lazily yield the non-empty lines of an input file."""
+        with open(input_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line
+
+    @staticmethod
+    def _write_entry(
+        f: TextIO,
+        query: str,
+        fetcher_results: Dict[str, str],
+        duplicates: Iterable[str] = ()
+    ) -> None:
+        """Write the results of one query to an output file."""
+        f.write(f"% Query: {query}\n")
+        duplicates = list(duplicates)
+        for key in duplicates:
+            f.write(f"% Duplicate of {key}\n")
+        if not fetcher_results:
+            f.write("\n" if duplicates else "% No citations found\n\n")
+            return
+
+        for fetcher_name, bibtex in fetcher_results.items():
+            f.write(f"% Source: {fetcher_name}\n")
+            f.write(f"{bibtex}\n\n")
+
+    @staticmethod
+    def _write_group(f: TextIO, group: Dict) -> None:
+        """Write one deduplicated entry to an output file."""
+        for query in group['queries']:
+            f.write(f"% Query: {query}\n")
+        f.write(f"% Source: {', '.join(group['sources'])}\n")
+        f.write(f"{group['bibtex']}\n\n")
+
+    @staticmethod
+    def _split_duplicates(
+        index: DedupeIndex,
+        query: str,
+        fetcher_results: Dict[str, str]
+    ) -> Tuple[Dict[str, str], List[str]]:
+        """Split results into new entries and keys of entries already seen."""
+        unique: Dict[str, str] = {}
+        duplicates: List[str] = []
+        for fetcher_name, bibtex in fetcher_results.items():
+            group, is_new = index.add(bibtex, query, fetcher_name)
+            if is_new:
+                unique[fetcher_name] = bibtex
+            else:
+                duplicates.append(index.key(group))
+        return unique, duplicates
+
+    def get_statistics(self) -> Dict[str, Dict[str, Any]]:
         """
         Get usage statistics for each fetcher.
 
         Returns:
-            Dict[str, Dict[str, int]]: Statistics for each fetcher
+            Dict[str, Dict[str, Any]]: Statistics for each fetcher: the
+                request totals, the full ``FetcherMetrics.snapshot`` (lookup
+                hits and misses, retries, cache hit ratio, bytes received and
+                latency histograms) and the circuit breaker state
         """
         stats = {}
         for fetcher in self.fetchers:
             name = fetcher.__class__.__name__
+            metrics = fetcher.metrics.snapshot()
             stats[name] = {
-                'total_requests': getattr(fetcher, '_request_count', 0),
-                'successful_requests': getattr(fetcher, '_success_count', 0),
-                'failed_requests': getattr(fetcher, '_error_count', 0)
+                'total_requests': metrics['requests'],
+                'successful_requests': metrics['requests'] - metrics['errors'],
+                'failed_requests': metrics['errors'],
+                **metrics
             }
+            if fetcher in self.breakers:
+                stats[name]['circuit_state'] = self.breakers[fetcher].state
         return stats
+
+    def export_metrics(self, fmt: str = 'json') -> str:
+        """
+        Export the fetchers' metrics.
+
+        Args:
+            fmt: ``'json'`` for a snapshot of ``get_statistics``,
+                ``'prometheus'`` for the Prometheus text exposition format
+
+        Returns:
+            str: Exported metrics
+        """
+        if fmt == 'json':
+            return json.dumps(self.get_statistics(), indent=2)
+        if fmt == 'prometheus':
+            return to_prometheus(fetcher.metrics for fetcher in self.fetchers)
+        raise ValueError(f"Unknown metrics format {fmt!r}, expected 'json' or 'prometheus'")
@@ -0,0 +1,120 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+import contextvars
+import logging
+import threading
+
+from ..meta_class import BibTexFetcher
+from ..utils.cancellation import LookupCancelled, run_cancellable
+from ..utils.deadline import DeadlineExceeded, current_deadline
+
+logger = logging.getLogger(__name__)
+
+
+def race_fetchers(
+    fetchers: List[BibTexFetcher],
+    query: str,
+    hedge_delay: Optional[float] = None,
+    is_available: Optional[Callable[[BibTexFetcher], bool]] = None,
+    lookup: Optional[Callable[[BibTexFetcher, str], Optional[str]]] = None
+) -> Optional[Tuple[BibTexFetcher, str]]:
+    """
+    Query several fetchers at the same time and return the first valid BibTeX.
+
+    Without ``hedge_delay`` all fetchers start at once. With it, fetchers start
+    in order and the next one is only launched if nothing has answered within
+    ``hedge_delay`` seconds or the running ones all missed. Once a winner is
+    found the losers are cancelled and stop before their next HTTP request.
+    Lookups share the caller's deadline, and ``DeadlineExceeded`` is raised
+    if it passes before any fetcher answers.
+
+    Args:
+        fetchers: Fetchers in order of preference
+        query: Search query (DOI, title, etc.)
+        hedge_delay: Seconds to wait before starting the next fetcher
+        is_available: Checked just before a fetcher is launched; fetchers it
+            rejects are skipped, so those never launched are not checked
+        lookup: Runs one fetcher, by default ``get_bibtex`` within the
+            fetcher's concurrency cap
+
+    Returns:
+        Optional[Tuple[BibTexFetcher, str]]: Winning fetcher and its BibTeX,
+            or None if every fetcher missed
+    """
+    if not fetchers:
+        return None
+
+    cancel = threading.Event()
+    remaining = list(fetchers)
+    pending: Dict[Future, BibTexFetcher] = {}
+    executor = ThreadPoolExecutor(max_workers=len(fetchers))
+
+    def launch() -> None:
+        while remaining:
+            fetcher = remaining.pop(0)
+            # 启动前才检查熔断器，没有启动的来源不会占用半开状态的探测机会
+            if is_available is not None and not is_available(fetcher):
+                continue
+            # 复制调用方的上下文，让工作线程中的请求也遵守截止时间
+            future = executor.submit(
+                contextvars.copy_context().run,
+                run_cancellable, cancel, _lookup, lookup or _fetch, fetcher, query
+            )
+            pending[future] = fetcher
+            return
+
+    deadline = current_deadline()
+    try:
+        launch()
+        while remaining and hedge_delay is None:
+            launch()
+
+        while pending:
+            timeout = hedge_delay if remaining else None
+            if deadline is not None:
+                left = deadline.remaining()
+                timeout = left if timeout is None else min(timeout, left)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if deadline is not None and not done and deadline.expired:
+                raise DeadlineExceeded("Query deadline exceeded")
+            if not done:
+                # 对冲：首个请求超过 hedge_delay 仍未返回，启动下一个来源
+                launch()
+                continue
+
+            for future in done:
+                fetcher = pending.pop(future)
+                bibtex = future.result()
+                if bibtex:
+                    return fetcher, bibtex
+
+            if remaining and not pending:
+                launch()
+
+        return None
+
+    finally:
+        cancel.set()
+        # 不丢弃尚未开始的查询：它们在第一个 HTTP 请求前停止，并能正常收尾（如交还探测）
+        executor.shutdown(wait=False)
+
+
+def _fetch(fetcher: BibTexFetcher, query: str) -> Optional[str]:
+    """Run one fetcher within its concurrency cap."""
+    with fetcher.semaphore:
+        return fetcher.get_bibtex(query)
+
+
+def _lookup(
+    lookup: Callable[[BibTexFetcher, str], Optional[str]],
+    fetcher: BibTexFetcher,
+    query: str
+) -> Optional[str]:
+    """Run one fetcher, treating errors and cancellation as a miss."""
+    try:
+        return lookup(fetcher, query)
+    except (LookupCancelled, DeadlineExceeded):
+        return None
+    except Exception as e:
+        logger.error(f"Error with {fetcher.__class__.__name__}: {str(e)}")
+        return None
@@ -1,10 +1,40 @@
+import asyncio
+import gzip
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import pytest
+import requests
 from apiModels import (
+    BibTexFetcher,
     CrossRefBibTeX,
     DBLPBibTeX,
     GoogleScholarBibTeX,
-    WorkflowBuilder
+    WorkflowBuilder,
+    SessionPool,
+    RateLimiter,
+    SQLiteCache
+)
+from apiModels.offline import CrossRefIndex, DBLPIndex
+from apiModels.utils.bibtex import (
+    balance_braces, crossref_to_bibtex, iter_bibtex, latex_escape, parse_bibtex
 )
+from apiModels.utils.dedupe import DedupeIndex
+from apiModels.utils.journal import JobJournal
+from apiModels.utils.metrics import FetcherMetrics
+from apiModels.utils.query import canonicalize_query, classify_query, coalesce_queries
+from apiModels.utils.cancellation import LookupCancelled, run_cancellable
+from apiModels.utils.circuit_breaker import CircuitBreaker
+from apiModels.utils.deadline import DeadlineExceeded, deadline_scope, request_timeout
+from apiModels.utils.rate_limit import TokenBucket
+from apiModels.utils.retry import RetryPolicy
+from apiModels.utils.singleflight import SingleFlight
+from apiModels.utils.verify import CitationIndex, score_bibtex, verify_bibtex
+from apiModels.workflow.adaptive import query_class
 
 # 测试数据
 TEST_DOI = "10.1145/3292500.3330919"
@@ -12,9 +42,62 @@ TEST_TITLE = "BERT: Pre-training of Deep Bidirectional Transformers for Language
 TEST_EMAIL = "test@example.com"
 TEST_SERPAPI_KEY = "cbb23f2e312f9f3e3ea272c4903781db4540cb36afee4063b4ad8df3421edee7"  # 仅用于测试
 
+INPUT_DIR = Path(__file__).parent / "inputfile"
+
 # DBLP 专用测试数据
 TEST_DBLP_KEY = "conf/naacl/DevlinCLT19"  # BERT 论文的 DBLP key
 
+class FakeFetcher(BibTexFetcher):
+    """离线测试用的 fetcher，按字典返回结果并记录并发情况"""
+
+    def __init__(self, answers=None, delay=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.answers = answers or {}
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def get_bibtex(self, query):
+        with self._lock:
+            self.calls.append(query)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            return self.answers.get(query)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def get_multiple_bibtex(self, queries):
+        return {query: self.get_bibtex(query) for query in queries}
+
+class FakeResponse:
+    """离线测试用的 HTTP 响应"""
+
+    def __init__(self, status_code=200, data=None, text="", headers=None):
+        self.status_code = status_code
+        self._data = data
+        self.text = text
+        self.headers = headers or {}
+        self.content = text.encode('utf-8')
+
+    def json(self):
+        return self._data
+
+def load_crossref_sample():
+    lines = (INPUT_DIR / "crossref_sample.jsonl").read_text(encoding='utf-8').splitlines()
+    return [json.loads(lines[0])] + json.loads(lines[1])["items"][:1]
+
+def fake_bibtex(key, title="A Title", doi=None):
+    doi_field = f"  doi = {{{doi}}},\n" if doi else ""
+    return (
+        f"@article{{{key},\n  title = {{{title}}},\n  author = {{Doe, Jane}},\n"
+        f"{doi_field}  year = {{2020}}\n}}"
+    )
+
 @pytest.fixture
 def crossref_fetcher():
     return CrossRefBibTeX(email=TEST_EMAIL)
@@ -160,6 +243,1106 @@ class TestWorkflowBuilder:
         assert isinstance(stats, dict)
         assert len(stats) == len(workflow.fetchers)
 
+class TestAsyncAPI:
+    def test_fetcher_async_get_multiple_bibtex(self):
+        queries = [f"q{i}" for i in range(8)]
+        fetcher = FakeFetcher({q: fake_bibtex(q) for q in queries}, delay=0.05)
+        results = asyncio.run(fetcher.async_get_multiple_bibtex(queries, concurrency=4))
+        assert list(results) == queries
+        assert all(results.values())
+        assert 1 < fetcher.max_in_flight <= 4
+
+    def test_workflow_async_get_multiple_bibtex(self):
+        first = FakeFetcher({"a": fake_bibtex("a")})
+        second = FakeFetcher({"b": fake_bibtex("b")})
+        workflow = WorkflowBuilder().add_fetcher(first).add_fetcher(second)
+        results = asyncio.run(workflow.async_get_multiple_bibtex(["a", "b", "c"]))
+        assert list(results["a"]) == ["FakeFetcher"]
+        assert results["b"]["FakeFetcher"] == fake_bibtex("b")
+        assert results["c"] == {}
+        assert second.calls.count("a") == 0
+
+class TestThreadPoolBatch:
+    def test_get_multiple_bibtex_keeps_order_and_caps_fetcher(self):
+        queries = [f"q{i}" for i in range(10)]
+        fetcher = FakeFetcher(
+            {q: fake_bibtex(q) for q in queries}, delay=0.05, max_concurrency=2
+        )
+        workflow = WorkflowBuilder().add_fetcher(fetcher)
+        results = workflow.get_multiple_bibtex(queries, max_workers=6)
+        assert list(results) == queries
+        assert all(results[q]["FakeFetcher"] == fake_bibtex(q) for q in queries)
+        assert fetcher.max_in_flight == 2
+
+    def test_invalid_max_concurrency(self):
+        with pytest.raises(ValueError):
+            FakeFetcher(max_concurrency=0)
+
+class TestCircuitBreaker:
+    def test_opens_probes_and_closes(self):
+        breaker = CircuitBreaker(failure_rate=0.5, window_size=4, min_calls=2, reset_timeout=0.05)
+        breaker.record(True)
+        breaker.on_request("u", 503, None, 0.1)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+        time.sleep(0.06)
+        assert breaker.allow()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow()
+        breaker.on_request("u", 429, None, 0.0)
+        assert breaker.state == CircuitBreaker.OPEN
+
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.on_request("u", 404, None, 0.0)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_late_successes_do_not_close(self):
+        breaker = CircuitBreaker(min_calls=2, reset_timeout=0.05)
+        breaker.on_request("u", 503, None, 0.1)
+        breaker.on_request("u", 503, None, 0.1)
+        assert breaker.state == CircuitBreaker.OPEN
+        # 打开前已发出的请求晚到的成功结果
+        breaker.on_request("u", 200, None, 0.1)
+        assert breaker.state == CircuitBreaker.OPEN
+
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.on_request("u", 200, None, 1.0)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        breaker.on_request("u", 200, None, 0.0)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_unused_probe_is_released(self):
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=0.05)
+        breaker.record(False)
+        time.sleep(0.06)
+        assert breaker.allow() and not breaker.allow()
+        breaker.release_probe()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow()
+        breaker.on_request("u", 200, None, 0.0)
+        breaker.release_probe()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_race_only_probes_launched_fetchers(self):
+        first = FakeFetcher({"q": fake_bibtex("first")}, delay=0.01)
+        second = FakeFetcher({"q": fake_bibtex("second")})
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=0.05)
+        workflow = WorkflowBuilder(strategy='race', hedge_delay=0.5)
+        workflow.add_fetcher(first).add_fetcher(second, breaker)
+        breaker.record(False)
+        time.sleep(0.06)
+
+        assert workflow.get_bibtex("q") == fake_bibtex("first")
+        assert second.calls == []
+        assert breaker.allow()
+
+    def test_probe_without_request_is_handed_back(self):
+        # FakeFetcher 不发 HTTP 请求，探测结束后应交还
+        fetcher = FakeFetcher()
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=0.05)
+        workflow = WorkflowBuilder().add_fetcher(fetcher, breaker)
+        breaker.record(False)
+        time.sleep(0.06)
+
+        assert workflow.get_bibtex("q") is None
+        assert fetcher.calls == ["q"]
+        assert breaker.allow()
+
+    def test_slow_requests_count_as_failures(self):
+        breaker = CircuitBreaker(min_calls=1, slow_call_duration=1.0)
+        breaker.on_request("u", 200, None, 2.0)
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_workflow_skips_open_fetchers(self, monkeypatch):
+        dblp = DBLPBibTeX(negative_ttl=0, retry_policy=RetryPolicy(attempts=1))
+        failures = []
+
+        def down(url, **kwargs):
+            failures.append(url)
+            raise requests.ConnectionError("down")
+
+        monkeypatch.setattr(dblp.session_pool, "get", down)
+        backup = FakeFetcher({f"q{i}": fake_bibtex(f"q{i}") for i in range(10)})
+        workflow = WorkflowBuilder()
+        workflow.add_fetcher(dblp, CircuitBreaker(min_calls=2, reset_timeout=60))
+        workflow.add_fetcher(backup)
+
+        results = workflow.get_multiple_bibtex([f"q{i}" for i in range(10)])
+        assert all(results.values())
+        assert len(failures) == 2
+        assert workflow.get_statistics()["DBLPBibTeX"]["circuit_state"] == "open"
+
+class TestRaceStrategy:
+    def test_fastest_valid_answer_wins(self):
+        slow = FakeFetcher({"q": fake_bibtex("slow")}, delay=0.5)
+        fast = FakeFetcher({"q": fake_bibtex("fast")}, delay=0.01)
+        workflow = WorkflowBuilder(strategy='race').add_fetcher(slow).add_fetcher(fast)
+        start = time.monotonic()
+        assert workflow.get_bibtex("q") == fake_bibtex("fast")
+        assert time.monotonic() - start < 0.4
+
+    def test_hedge_delay_skips_next_fetcher(self):
+        first = FakeFetcher({"q": fake_bibtex("first")}, delay=0.01)
+        second = FakeFetcher({"q": fake_bibtex("second")})
+        workflow = WorkflowBuilder(strategy='race', hedge_delay=0.5)
+        workflow.add_fetcher(first).add_fetcher(second)
+        assert workflow.get_multiple_bibtex(["q"])["q"] == {"FakeFetcher": fake_bibtex("first")}
+        assert second.calls == []
+
+    def test_miss_starts_next_fetcher(self):
+        first = FakeFetcher()
+        second = FakeFetcher({"q": fake_bibtex("second")})
+        workflow = WorkflowBuilder(strategy='race', hedge_delay=5)
+        workflow.add_fetcher(first).add_fetcher(second)
+        start = time.monotonic()
+        assert workflow.get_bibtex("q") == fake_bibtex("second")
+        assert time.monotonic() - start < 1
+
+    def test_unknown_strategy(self):
+        with pytest.raises(ValueError):
+            WorkflowBuilder(strategy='fastest')
+
+class TestStreamingProcessFile:
+    def test_iter_multiple_bibtex_is_lazy(self):
+        fetcher = FakeFetcher({f"q{i}": fake_bibtex(f"q{i}") for i in range(100)})
+        workflow = WorkflowBuilder().add_fetcher(fetcher)
+        stream = workflow.iter_multiple_bibtex((f"q{i}" for i in range(100)), max_workers=2)
+        first = [next(stream) for _ in range(3)]
+        stream.close()
+        assert [query for query, _ in first] == ["q0", "q1", "q2"]
+        assert len(fetcher.calls) <= 3 + 2 * 2
+
+    def test_process_file_stream(self, tmp_path):
+        queries = [f"q{i}" for i in range(20)]
+        input_file = tmp_path / "input.txt"
+        input_file.write_text("\n".join(queries + ["", "missing"]), encoding='utf-8')
+        output_file = tmp_path / "out" / "refs.bib"
+        fetcher = FakeFetcher({q: fake_bibtex(q) for q in queries})
+        workflow = WorkflowBuilder().add_fetcher(fetcher)
+
+        assert workflow.process_file(
+            str(input_file), str(output_file), max_workers=4, stream=True
+        )
+        content = output_file.read_text(encoding='utf-8')
+        assert content.index("% Query: q0") < content.index("% Query: q19")
+        assert content.count("@article") == 20
+        assert "% Query: missing\n% No citations found" in content
+
+class TestJobJournal:
+    def test_resume_skips_found_queries(self, tmp_path):
+        journal_path = str(tmp_path / "job.jsonl")
+        first = FakeFetcher({"a": fake_bibtex("a")})
+        WorkflowBuilder().add_fetcher(first).get_multiple_bibtex(
+            ["a", "b"], journal=journal_path
+        )
+
+        second = FakeFetcher({"a": fake_bibtex("a2"), "b": fake_bibtex("b")})
+        results = WorkflowBuilder().add_fetcher(second).get_multiple_bibtex(
+            ["a", "b"], journal=journal_path
+        )
+        assert second.calls == ["b"]
+        assert results["a"] == {"FakeFetcher": fake_bibtex("a")}
+        assert results["b"] == {"FakeFetcher": fake_bibtex("b")}
+
+    def test_torn_tail_is_ignored(self, tmp_path):
+        journal_path = tmp_path / "job.jsonl"
+        journal_path.write_text(
+            '{"query": "a", "status": "found", "results": {"X": "@a{}"}}\n{"query": "b", "sta',
+            encoding='utf-8'
+        )
+        with JobJournal(str(journal_path)) as journal:
+            assert journal.is_resolved("a")
+            assert not journal.is_resolved("b")
+            journal.record("b", {})
+        with JobJournal(str(journal_path)) as journal:
+            assert journal.resolved_count == 1
+
+    def test_stream_resume_appends(self, tmp_path):
+        input_file = tmp_path / "input.txt"
+        input_file.write_text("a\nb\n", encoding='utf-8')
+        output_file = tmp_path / "refs.bib"
+        journal_path = str(tmp_path / "job.jsonl")
+
+        workflow = WorkflowBuilder().add_fetcher(FakeFetcher({"a": fake_bibtex("a")}))
+        workflow.process_file(str(input_file), str(output_file), stream=True, journal_path=journal_path)
+        fetcher = FakeFetcher({"b": fake_bibtex("b")})
+        workflow = WorkflowBuilder().add_fetcher(fetcher)
+        workflow.process_file(str(input_file), str(output_file), stream=True, journal_path=journal_path)
+
+        assert fetcher.calls == ["b"]
+        content = output_file.read_text(encoding='utf-8')
+        assert fake_bibtex("a") in content and fake_bibtex("b") in content
+
+    def test_stream_journals_only_handled_queries(self, tmp_path):
+        class SlowFirst(FakeFetcher):
+            def get_bibtex(self, query):
+                if query == "a":
+                    time.sleep(0.2)
+                return super().get_bibtex(query)
+
+        queries = ["a", "b", "c", "d"]
+        fetcher = SlowFirst({q: fake_bibtex(q) for q in queries})
+        workflow = WorkflowBuilder().add_fetcher(fetcher)
+        with JobJournal(str(tmp_path / "job.jsonl"), keep_results=False) as journal:
+            results = workflow.iter_multiple_bibtex(queries, max_workers=4, journal=journal)
+            assert next(results)[0] == "a"
+            # b、c、d 已经查完，但调用方还没处理，不能记为完成
+            assert len(fetcher.calls) == 4
+            assert journal.resolved_count == 0
+            assert next(results)[0] == "b"
+            assert journal.is_resolved("a") and not journal.is_resolved("b")
+            list(results)
+            assert journal.resolved_count == 4
+
+@pytest.fixture
+def dblp_index(tmp_path):
+    index = DBLPIndex(str(tmp_path / "dblp.db"))
+    index.ingest(str(INPUT_DIR / "dblp_sample.xml"), batch_size=2)
+    return index
+
+class TestDBLPOffline:
+    def test_ingest_skips_person_pages(self, dblp_index):
+        assert len(dblp_index) == 3
+        assert dblp_index.get("homepages/v/AshishVaswani") is None
+
+    def test_key_lookup_renders_bibtex(self, dblp_index):
+        fetcher = DBLPBibTeX(offline_index=dblp_index)
+        bibtex = fetcher.get_bibtex(TEST_DBLP_KEY)
+        assert bibtex.startswith("@inproceedings{DBLP:conf/naacl/DevlinCLT19,")
+        assert "Jacob Devlin and Ming-Wei Chang" in bibtex
+        assert "10.18653/v1/n19-1423" in bibtex
+
+    def test_title_search(self, dblp_index):
+        fetcher = DBLPBibTeX(offline_index=dblp_index)
+        bibtex = fetcher.get_bibtex("attention is all you need")
+        assert "DBLP:conf/nips/VaswaniSPUJGKP17" in bibtex
+        assert "{Attention is All you Need}" in bibtex
+        results = fetcher.search_publications("video classification", limit=5)
+        assert [r['key'] for r in results] == ["journals/pami/WangXLG20"]
+
+    def test_entities_and_markup(self, dblp_index):
+        bibtex = dblp_index.to_bibtex(dblp_index.get("journals/pami/WangXLG20"))
+        assert "Wei Wang and Jürgen Schmidhuber" in bibtex
+        assert "Non-Local Networks for Video Classification" in bibtex
+
+@pytest.fixture
+def crossref_index(tmp_path):
+    snapshot = tmp_path / "snapshot.jsonl.gz"
+    snapshot.write_bytes(gzip.compress((INPUT_DIR / "crossref_sample.jsonl").read_bytes()))
+    index = CrossRefIndex(str(tmp_path / "crossref.db"))
+    index.ingest(str(snapshot))
+    return index
+
+class TestCrossRefSnapshot:
+    def test_ingest_skips_works_without_doi(self, crossref_index):
+        assert len(crossref_index) == 2
+        assert 'reference-count' not in crossref_index.get(TEST_DOI.upper())
+
+    def test_doi_lookup_renders_bibtex(self, crossref_index):
+        fetcher = CrossRefBibTeX(TEST_EMAIL, snapshot_index=crossref_index)
+        bibtex = fetcher.get_bibtex(TEST_DOI)
+        assert bibtex.startswith("@inproceedings{Akiba_2019,")
+        assert "Akiba, Takuya and Sano, Shotaro" in bibtex
+        assert "2623--2631" in bibtex
+
+    def test_title_lookup(self, crossref_index):
+        fetcher = CrossRefBibTeX(TEST_EMAIL, snapshot_index=crossref_index)
+        bibtex = fetcher.get_bibtex("FedMSA: a model selection and adaptation system for federated learning")
+        assert "journal      = {Sensors}" in bibtex
+        works = fetcher.search_works("FedMSA A Model Selection and Adaptation System for Federated Learning")
+        assert works[0]['DOI'] == "10.3390/s22197244"
+
+class TestCrossRefLocalRendering:
+    def test_title_lookup_is_one_request(self, monkeypatch):
+        requests_made = []
+
+        def fake_get(url, **kwargs):
+            requests_made.append((url, kwargs.get('params')))
+            return FakeResponse(data={'message': {'items': load_crossref_sample()[1:]}})
+
+        fetcher = CrossRefBibTeX(TEST_EMAIL, render_locally=True)
+        monkeypatch.setattr(fetcher, "_get", fake_get)
+        bibtex = fetcher.get_bibtex("FedMSA model selection federated learning")
+        assert bibtex.startswith("@article{Sun_2022,")
+        assert len(requests_made) == 1
+        assert 'volume' in requests_made[0][1]['select']
+
+    def test_escapes_specials_and_markup(self):
+        item = {
+            'DOI': '10.1016/j.datak.2020.101805',
+            'type': 'journal-article',
+            'title': [
+                'Mining <i>k</i>-most_similar pairs in 99% of '
+                'CH<sub>3</sub>NH<sub>3</sub>PbI<sub>3</sub> }data'
+            ],
+            'container-title': ['Data &amp; Knowledge Engineering'],
+            'publisher': 'AT&T Bell Laboratories',
+            'author': [{'family': "O'Neil", 'given': 'P.'}, {'name': 'R&D Group #1'}],
+            'issued': {'date-parts': [[2020]]},
+        }
+        entry = parse_bibtex(crossref_to_bibtex(item))[0]
+        assert entry.get("title") == (
+            r"Mining \textit{k}-most\_similar pairs in 99\% of "
+            r"CH\textsubscript{3}NH\textsubscript{3}PbI\textsubscript{3} data"
+        )
+        assert entry.get("journal") == r"Data \& Knowledge Engineering"
+        assert entry.get("publisher") == r"AT\&T Bell Laboratories"
+        assert entry.get("author") == r"O'Neil, P. and {R\&D Group \#1}"
+        assert entry.get("doi") == "10.1016/j.datak.2020.101805"
+
+    def test_latex_escape_keeps_escaped_text(self):
+        assert latex_escape(r"Already \& escaped, $O(n^2)$") == r"Already \& escaped, $O(n^2)$"
+        assert latex_escape(
+            "<jats:italic>E. coli</jats:italic> <mml:math>x</mml:math>"
+        ) == r"\textit{E. coli} x"
+        assert balance_braces("a } b { c") == "a  b { c}"
+
+    def test_latex_escape_keeps_comparisons(self):
+        assert latex_escape("Bounds for p<q and q>r in graphs") == (
+            r"Bounds for p\textless{}q and q\textgreater{}r in graphs"
+        )
+        assert latex_escape("x &lt; <i>y</i>") == r"x \textless{} \textit{y}"
+
+class TestCrossRefDOIBatch:
+    def test_dois_share_one_request(self, monkeypatch):
+        requests_made = []
+        items = load_crossref_sample()
+
+        def fake_get(url, **kwargs):
+            requests_made.append(kwargs.get('params'))
+            if url.endswith("/works"):
+                return FakeResponse(data={'message': {'items': items}})
+            return FakeResponse(status_code=404)
+
+        fetcher = CrossRefBibTeX(TEST_EMAIL)
+        monkeypatch.setattr(fetcher, "_get", fake_get)
+        queries = [TEST_DOI, "10.3390/S22197244", "10.1000/missing", TEST_DOI]
+        results = fetcher.get_multiple_bibtex(queries, batch_size=10)
+
+        assert requests_made[0]['filter'].count('doi:') == 3
+        assert len(requests_made) == 2  # 一次批量请求 + 一次缺失 DOI 的 transform 请求
+        assert results[TEST_DOI].startswith("@inproceedings{Akiba_2019,")
+        assert results["10.3390/S22197244"].startswith("@article{Sun_2022,")
+        assert results["10.1000/missing"] is None
+
+class TestPagedSearch:
+    def test_dblp_pages_with_offsets(self, monkeypatch):
+        offsets = []
+
+        def fake_get(url, **kwargs):
+            offset = kwargs['params']['f']
+            offsets.append(offset)
+            hits = [{'info': {'title': f"Paper {i}", 'key': f"k/{i}"}}
+                    for i in range(offset, min(offset + 2, 5))]
+            return FakeResponse(data={'result': {'hits': {'@total': '5', 'hit': hits}}})
+
+        fetcher = DBLPBibTeX()
+        monkeypatch.setattr(fetcher, "_get", fake_get)
+        titles = [p['title'] for p in fetcher.iter_publications("venue:X", page_size=2)]
+        assert titles == [f"Paper {i}" for i in range(5)]
+        assert offsets == [0, 2, 4]
+
+    def test_crossref_cursor_stops_early(self, monkeypatch):
+        cursors = []
+
+        def fake_get(url, **kwargs):
+            cursor = kwargs['params']['cursor']
+            cursors.append(cursor)
+            page = int(cursor) if cursor != '*' else 0
+            items = [{'DOI': f"10.1/{page}.{i}", 'title': [f"W{page}.{i}"]} for i in range(2)]
+            return FakeResponse(data={'message': {'items': items, 'next-cursor': str(page + 1)}})
+
+        fetcher = CrossRefBibTeX(TEST_EMAIL)
+        monkeypatch.setattr(fetcher, "_get", fake_get)
+        works = list(fetcher.iter_works("deep learning", page_size=2, max_results=3, prefetch=False))
+        assert [w['DOI'] for w in works] == ["10.1/0.0", "10.1/0.1", "10.1/1.0"]
+        assert cursors == ['*', '1']
+
+class TestSessionPool:
+    def test_session_reused_per_host(self):
+        pool = SessionPool(pool_maxsize=4)
+        first = pool.get_session("https://api.crossref.org/works")
+        second = pool.get_session("https://api.crossref.org/works/10.1/x")
+        other = pool.get_session("https://dblp.org/search/publ/api")
+        assert first is second
+        assert first is not other
+        pool.close()
+
+    def test_fetchers_share_default_pool(self):
+        assert CrossRefBibTeX(TEST_EMAIL).session_pool is DBLPBibTeX().session_pool
+
+    def test_keep_alive_disabled(self):
+        with SessionPool(keep_alive=False) as pool:
+            session = pool.get_session("https://dblp.org/rec/x.bib")
+            assert session.headers['Connection'] == 'close'
+
+class TestRateLimiter:
+    def test_token_bucket_spaces_requests(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+        start = time.monotonic()
+        for _ in range(3):
+            bucket.acquire()
+        assert time.monotonic() - start >= 0.09
+
+    def test_async_acquire(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+
+        async def acquire_all():
+            await asyncio.gather(*(bucket.async_acquire() for _ in range(3)))
+
+        start = time.monotonic()
+        asyncio.run(acquire_all())
+        assert time.monotonic() - start >= 0.09
+
+    def test_reads_crossref_headers(self):
+        limiter = RateLimiter()
+        url = "https://api.crossref.org/works"
+        limiter.update_from_headers(url, {
+            'X-Rate-Limit-Limit': '10',
+            'X-Rate-Limit-Interval': '2s'
+        })
+        assert limiter.bucket(url).rate == 5
+        assert limiter.bucket("https://example.org") is None
+
+    def test_retry_after_pauses_host(self):
+        limiter = RateLimiter(rates={'dblp.org': (100, 1.0)})
+        limiter.update_from_headers("https://dblp.org/rec/x.bib", {'Retry-After': '0.1'})
+        assert limiter.acquire("dblp.org") >= 0.05
+
+class TestSQLiteCache:
+    def test_roundtrip_with_normalized_key(self, tmp_path):
+        cache = SQLiteCache(str(tmp_path / "cache.db"))
+        cache.set("DBLPBibTeX:bibtex", "Attention  Is All You Need", "@x{y}")
+        assert cache.get("DBLPBibTeX:bibtex", "attention is all you need") == "@x{y}"
+        assert cache.get("CrossRefBibTeX:bibtex", "attention is all you need") is None
+
+    def test_ttl_expiry(self, tmp_path):
+        cache = SQLiteCache(str(tmp_path / "cache.db"), ttl=0.05)
+        cache.set("s", "k", [{"title": "t"}])
+        assert cache.get("s", "k") == [{"title": "t"}]
+        time.sleep(0.1)
+        assert cache.get("s", "k") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self, tmp_path):
+        cache = SQLiteCache(str(tmp_path / "cache.db"), max_bytes=250)
+        for i in range(3):
+            cache.set("s", f"k{i}", "x" * 100)
+            time.sleep(0.01)
+        assert cache.get("s", "k0") is None
+        assert cache.get("s", "k2") is not None
+        assert cache.total_bytes <= 250
+
+    def test_warm_fetcher_makes_no_lookups(self, tmp_path, monkeypatch):
+        cache_path = str(tmp_path / "cache.db")
+        calls = []
+
+        def fetch(query):
+            calls.append(query)
+            return fake_bibtex("k")
+
+        cold = DBLPBibTeX(cache=SQLiteCache(cache_path))
+        monkeypatch.setattr(cold, "_fetch_bibtex", fetch)
+        assert cold.get_bibtex(TEST_TITLE) == fake_bibtex("k")
+
+        warm = DBLPBibTeX(cache=SQLiteCache(cache_path))
+        monkeypatch.setattr(warm, "_fetch_bibtex", fetch)
+        assert warm.get_bibtex(TEST_TITLE.upper()) == fake_bibtex("k")
+        assert calls == [TEST_TITLE]
+
+    def test_warm_run_remembers_misses(self, tmp_path, monkeypatch):
+        cache_path = str(tmp_path / "cache.db")
+        calls = []
+        cold = DBLPBibTeX(cache=SQLiteCache(cache_path))
+        monkeypatch.setattr(cold, "_fetch_bibtex", lambda q: calls.append(q))
+        assert cold.get_bibtex("unknown paper") is None
+
+        warm = DBLPBibTeX(cache=SQLiteCache(cache_path))
+        monkeypatch.setattr(warm, "_fetch_bibtex", lambda q: calls.append(q))
+        assert warm.get_bibtex("Unknown  Paper") is None
+        assert calls == ["unknown paper"]
+
+        # 未命中有更短的独立有效期
+        expired = DBLPBibTeX(cache=SQLiteCache(cache_path, negative_ttl=0.01))
+        monkeypatch.setattr(expired, "_fetch_bibtex", lambda q: calls.append(q))
+        time.sleep(0.02)
+        assert expired.get_bibtex("unknown paper") is None
+        assert len(calls) == 2
+
+class TestSingleFlight:
+    def test_concurrent_identical_lookups_share_one_call(self, monkeypatch):
+        calls = []
+
+        def fetch(query):
+            calls.append(query)
+            time.sleep(0.1)
+            return fake_bibtex("k")
+
+        fetcher = DBLPBibTeX(memo_size=0)
+        monkeypatch.setattr(fetcher, "_fetch_bibtex", fetch)
+        queries = ["Deep Learning", "deep  learning", "DEEP LEARNING"] * 3
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            results = list(executor.map(fetcher.get_bibtex, queries))
+        assert results == [fake_bibtex("k")] * len(queries)
+        assert len(calls) == 1
+        assert fetcher.flights.in_flight() == 0
+
+    def test_cancelled_leader_does_not_cancel_waiters(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        attempts = []
+
+        def cancelled():
+            attempts.append("leader")
+            started.set()
+            time.sleep(0.05)
+            raise LookupCancelled()
+
+        def follower():
+            started.wait()
+            return flights.do("k", lambda: attempts.append("follower") or "ok")
+
+        leader = threading.Thread(target=lambda: pytest.raises(LookupCancelled, flights.do, "k", cancelled))
+        leader.start()
+        assert follower() == "ok"
+        leader.join()
+        assert attempts == ["leader", "follower"]
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            flights.do("k", fail)
+
+    def test_waiters_honour_their_own_deadline_and_cancellation(self):
+        flights = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return "late"
+
+        leader = threading.Thread(target=flights.do, args=("k", slow))
+        leader.start()
+        started.wait()
+        try:
+            start = time.monotonic()
+            with deadline_scope(0.1), pytest.raises(DeadlineExceeded):
+                flights.do("k", lambda: "unused")
+            assert time.monotonic() - start < 1.0
+
+            cancel = threading.Event()
+            threading.Timer(0.1, cancel.set).start()
+            with pytest.raises(LookupCancelled):
+                run_cancellable(cancel, flights.do, "k", lambda: "unused")
+        finally:
+            release.set()
+            leader.join()
+
+class TestMemoCache:
+    def test_hits_and_misses_are_remembered(self, monkeypatch):
+        calls = []
+
+        def fetch(query):
+            calls.append(query)
+            return fake_bibtex("k") if query == "found" else None
+
+        fetcher = DBLPBibTeX()
+        monkeypatch.setattr(fetcher, "_fetch_bibtex", fetch)
+        for _ in range(3):
+            assert fetcher.get_bibtex("found") == fake_bibtex("k")
+            assert fetcher.get_bibtex("missing") is None
+        assert calls == ["found", "missing"]
+
+    def test_negative_cache_expires(self, monkeypatch):
+        calls = []
+        fetcher = DBLPBibTeX(negative_ttl=0.05)
+        monkeypatch.setattr(fetcher, "_fetch_bibtex", lambda q: calls.append(q))
+        fetcher.get_bibtex("missing")
+        fetcher.get_bibtex("missing")
+        time.sleep(0.1)
+        fetcher.get_bibtex("missing")
+        assert len(calls) == 2
+
+    def test_transient_failures_are_not_negative_cached(self, monkeypatch):
+        fetcher = DBLPBibTeX(retry_policy=RetryPolicy(attempts=1))
+        outcomes = [
+            FakeResponse(503),
+            requests.ConnectionError("down"),
+            FakeResponse(data={"result": {"hits": {"hit": []}}}),
+            FakeResponse(200, text="unused"),
+        ]
+
+        def fake_get(url, **kwargs):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        monkeypatch.setattr(fetcher.session_pool, "get", fake_get)
+        title = "Some paper that is not indexed"
+        assert fetcher.get_bibtex(title) is None
+        assert fetcher.get_bibtex(title) is None
+        # 真正的未命中才写入负缓存
+        assert fetcher.get_bibtex(title) is None
+        assert fetcher.get_bibtex(title) is None
+        assert len(outcomes) == 1
+
+class TestBibTeXParser:
+    BIB = (
+        "% header\n@string{nips = \"NeurIPS\"}\n"
+        "@article{Vaswani_2017, title = {Attention is {All} You Need},\n"
+        "  author = \"Vaswani, A. and Shazeer, N.\", year = 2017,\n"
+        "  journal = nips # \" 2017\"}\n"
+        "@inproceedings(Devlin_2019, title={BERT}, year={2019})\n"
+    )
+
+    def test_parses_entries_and_fields(self):
+        entries = parse_bibtex(self.BIB)
+        assert [(e.entry_type, e.key) for e in entries] == [
+            ("article", "Vaswani_2017"), ("inproceedings", "Devlin_2019")
+        ]
+        article = entries[0]
+        assert article["TITLE"] == "Attention is {All} You Need"
+        assert article.get("author") == "Vaswani, A. and Shazeer, N."
+        assert article.get("year") == "2017"
+        assert article.get("journal") == "nips 2017"
+        assert "doi" not in article
+
+    def test_streams_across_chunk_boundaries(self):
+        entries = list(iter_bibtex(io.StringIO(self.BIB * 50), chunk_size=7))
+        assert len(entries) == 100
+        assert entries[-1].get("title") == "BERT"
+
+    def test_large_string_parses_in_linear_time(self):
+        text = "\n".join(fake_bibtex(f"k{i}") for i in range(40000))
+        start = time.monotonic()
+        entries = parse_bibtex(text)
+        # 逐条复制剩余缓冲区时需要数秒
+        assert time.monotonic() - start < 3.0
+        assert len(entries) == 40000 and entries[-1].key == "k39999"
+
+    def test_skips_unterminated_entry(self):
+        text = "@article{x, title={oops}\n\n@article{y, title={ok}}\n@misc(z, title={fine})\n"
+        assert [e.key for e in parse_bibtex(text)] == ["y", "z"]
+        assert [e.key for e in iter_bibtex(io.StringIO(text), chunk_size=5)] == ["y", "z"]
+        assert [e.key for e in parse_bibtex(text.replace("oops}", "oops"))] == ["y", "z"]
+
+    def test_round_trips_through_format(self):
+        entry = parse_bibtex(fake_bibtex("k", doi="10.1/x"))[0]
+        assert parse_bibtex(entry.to_bibtex())[0].fields == entry.fields
+
+    def test_crossref_validation_needs_non_empty_fields(self):
+        fetcher = CrossRefBibTeX(email=TEST_EMAIL)
+        assert fetcher._validate_bibtex(fake_bibtex("k"))
+        assert not fetcher._validate_bibtex("@article{k, title={Authors of year}}")
+
+class TestVerify:
+    RAWS = (
+        "[1] A. Vaswani et al. Attention is all you need (c++). In NeurIPS, 2017.\n"
+        "\n"
+        "BERT\n"
+        "[3] K. He et al. Deep residual learning for image recognition. In CVPR, 2016.\n"
+    )
+
+    def test_scores_titles_against_citations(self):
+        index = CitationIndex(self.RAWS)
+        assert len(index) == 3
+        assert index.score("Attention Is All You Need (C++)")[0] == 1.0
+        assert index.score("BERT") == (1.0, "BERT")
+        assert index.score("Deep residual learning for video")[0] == pytest.approx(2 / 3)
+        assert index.score("Graph neural networks") == (0.0, None)
+
+    def test_verify_reports_missing_titles_and_is_regex_safe(self):
+        bibtexs = [
+            fake_bibtex("a", title="Attention is all you need (C++"),
+            fake_bibtex("b", title="Deep Residual Learning for Image Recognition"),
+            fake_bibtex("c", title="Unknown paper [*?"),
+            "",
+        ]
+        assert verify_bibtex(bibtexs, self.RAWS) == ["Unknown paper [*?"]
+        assert [s for _, s in score_bibtex(bibtexs, CitationIndex(self.RAWS))] == [1.0, 1.0, 0.0]
+
+class TestDedupe:
+    def test_merges_by_doi_and_title(self):
+        index = DedupeIndex()
+        assert index.add(fake_bibtex("a", title="Deep Residual Learning", doi="10.1/X"), "q1", "A") == (0, True)
+        # 同一 DOI，标题不同
+        assert index.add(fake_bibtex("b", title="ResNet", doi="https://doi.org/10.1/x"), "q2", "B") == (0, False)
+        # 标题相同，没有 DOI
+        assert index.add(fake_bibtex("c", title="deep residual learning."), "q3", "B") == (0, False)
+        assert index.add(fake_bibtex("d", title="Other Paper Entirely Here"), "q3", "A") == (3, True)
+        assert len(index) == 2
+
+        groups = index.groups()
+        assert [g['key'] for g in groups] == ["a", "d"]
+        assert groups[0]['queries'] == ["q1", "q2", "q3"]
+        assert groups[0]['sources'] == ["A", "B"]
+
+    def test_short_titles_need_matching_year(self):
+        index = DedupeIndex()
+        index.add("@article{a, title={BERT}, year={2019}}")
+        index.add("@article{b, title={BERT}, year={2020}}")
+        assert len(index) == 2
+
+    def test_same_title_different_dois_stay_apart(self):
+        index = DedupeIndex()
+        smith = (
+            "@article{smith, title={A Survey of Deep Learning}, author={Smith, A.},"
+            " year={2019}, doi={10.1/aaa}}"
+        )
+        jones = (
+            "@article{jones, title={A Survey of Deep Learning}, author={Jones, B.},"
+            " year={2021}, doi={10.2/bbb}}"
+        )
+        assert index.add(smith, "q1") == (0, True)
+        assert index.add(jones, "q2") == (1, True)
+        # 没有 DOI 的同名条目仍会并入已有的组
+        assert index.add("@article{c, title={A survey of deep learning}}", "q3")[1] is False
+        # 同一 DOI 的条目只并入自己的组
+        assert index.add("@article{d, title={DL Survey}, doi={10.2/BBB}}", "q4") == (1, False)
+        assert [g['key'] for g in index.groups()] == ["smith", "jones"]
+        assert index.groups()[1]['queries'] == ["q2", "q4"]
+
+    def test_keys_only_mode_keeps_no_entries(self):
+        index = DedupeIndex(keep_entries=False)
+        assert index.add(fake_bibtex("a", "Deep Residual Learning", "10.1/x"), "q1") == (0, True)
+        assert index.add(fake_bibtex("b", "Other Paper Entirely Here", "10.1/X"), "q2") == (0, False)
+        assert index.add(fake_bibtex("c", "Yet Another Different Paper"), "q3") == (2, True)
+        assert index.key(1) == "a" and index.key(2) == "c"
+        assert not index._entries and not index._raw and not index._queries
+        with pytest.raises(RuntimeError):
+            index.groups()
+
+    def test_fills_missing_fields(self):
+        index = DedupeIndex()
+        index.add("@article{a, title={Deep Residual Learning for Images}, year={2016}}")
+        index.add("@inproceedings{b, title={Deep residual learning for images}, doi={10.1/x}, year={2015}}")
+        merged = parse_bibtex(index.groups()[0]['bibtex'])[0]
+        assert (merged.entry_type, merged.key) == ("article", "a")
+        assert merged.get("year") == "2016"
+        assert merged.get("doi") == "10.1/x"
+
+    def test_process_file_dedupe(self, tmp_path):
+        input_file = tmp_path / "input.txt"
+        input_file.write_text("10.1/x\nDeep Residual Learning\nmissing", encoding='utf-8')
+        first = FakeFetcher({"10.1/x": fake_bibtex("a", "Deep Residual Learning", "10.1/x")})
+        class SecondFetcher(FakeFetcher):
+            pass
+
+        second = SecondFetcher({
+            "10.1/x": fake_bibtex("b", "Deep Residual Learning", "10.1/x"),
+            "Deep Residual Learning": fake_bibtex("c", "Deep Residual Learning", "10.1/x"),
+        })
+        workflow = WorkflowBuilder().add_fetcher(first).add_fetcher(second)
+
+        output_file = tmp_path / "refs.bib"
+        assert workflow.process_file(
+            str(input_file), str(output_file), stop_on_first=False, dedupe=True
+        )
+        content = output_file.read_text(encoding='utf-8')
+        assert content.count("@article") == 1
+        assert "% Query: 10.1/x\n% Query: Deep Residual Learning\n" in content
+        assert "% Query: missing\n% No citations found" in content
+
+        stream_file = tmp_path / "stream.bib"
+        assert workflow.process_file(
+            str(input_file), str(stream_file), stop_on_first=False, stream=True, dedupe=True
+        )
+        content = stream_file.read_text(encoding='utf-8')
+        assert content.count("@article") == 1
+        assert "% Query: Deep Residual Learning\n% Duplicate of a\n" in content
+
+class TestQueryCoalescing:
+    DUPLICATES = [
+        "10.1145/3292500.3330919",
+        "https://doi.org/10.1145/3292500.3330919",
+        " doi:10.1145/3292500.3330919",
+        "Attention  is all you need",
+        "attention is ALL you need ",
+    ]
+
+    def test_canonicalize_query(self):
+        assert canonicalize_query("http://dx.doi.org/10.1145/ABC") == "10.1145/abc"
+        assert canonicalize_query("DOI: 10.1145/ABC") == "10.1145/abc"
+        assert canonicalize_query("  Deep   Learning ") == "deep learning"
+        assert canonicalize_query("doi: is not a DOI") == "doi: is not a doi"
+
+    def test_coalesce_queries(self):
+        representatives = coalesce_queries(self.DUPLICATES)
+        assert set(representatives.values()) == {
+            "10.1145/3292500.3330919", "Attention is all you need"
+        }
+
+    def test_fetcher_batches_fan_out(self, monkeypatch):
+        calls = []
+        fetcher = DBLPBibTeX(memo_size=0, negative_ttl=0)
+        monkeypatch.setattr(fetcher, "_fetch_bibtex", lambda q: calls.append(q) or fake_bibtex("k"))
+        results = fetcher.get_multiple_bibtex(self.DUPLICATES)
+        assert list(results) == self.DUPLICATES
+        assert all(results.values())
+        assert calls == ["10.1145/3292500.3330919", "Attention is all you need"]
+
+        fake = FakeFetcher({"10.1145/3292500.3330919": fake_bibtex("k")})
+        results = asyncio.run(fake.async_get_multiple_bibtex(self.DUPLICATES))
+        assert sum(1 for r in results.values() if r) == 3
+        assert len(fake.calls) == 2
+
+    def test_workflow_batches_fan_out(self, tmp_path):
+        fetcher = FakeFetcher({"10.1145/3292500.3330919": fake_bibtex("k")})
+        workflow = WorkflowBuilder().add_fetcher(fetcher)
+        journal_path = str(tmp_path / "job.jsonl")
+        results = workflow.get_multiple_bibtex(self.DUPLICATES, max_workers=2, journal=journal_path)
+        assert list(results) == self.DUPLICATES
+        assert [bool(r) for r in results.values()] == [True, True, True, False, False]
+        assert len(fetcher.calls) == 2
+        with JobJournal(journal_path) as journal:
+            assert journal.is_resolved("https://doi.org/10.1145/3292500.3330919")
+
+class TestIdentifierRouting:
+    def test_classify_query(self):
+        assert classify_query("https://doi.org/10.1007/978-3-030-58452-8_13") == (
+            "doi", "10.1007/978-3-030-58452-8_13"
+        )
+        assert classify_query("DBLP:conf/naacl/DevlinCLT19") == ("dblp_key", "conf/naacl/DevlinCLT19")
+        assert classify_query("https://dblp.org/rec/conf/naacl/DevlinCLT19.html")[0] == "dblp_key"
+        assert classify_query("arXiv:1810.04805v2") == ("arxiv", "1810.04805")
+        assert classify_query("https://arxiv.org/abs/hep-th/9901001") == ("arxiv", "hep-th/9901001")
+        assert classify_query("A/B  testing at scale") == ("title", "A/B testing at scale")
+
+    def test_crossref_accepts_multi_slash_dois(self):
+        fetcher = CrossRefBibTeX(email=TEST_EMAIL)
+        assert fetcher._is_doi("10.1007/978-3-030-58452-8_13/abc")
+        assert not fetcher._is_doi("conf/naacl/DevlinCLT19")
+
+    def test_dblp_direct_lookups(self, monkeypatch):
+        fetcher = DBLPBibTeX()
+        urls = []
+
+        def get(url, **kwargs):
+            urls.append(url)
+            return FakeResponse(text=fake_bibtex("k"))
+
+        monkeypatch.setattr(fetcher, "_get", get)
+        assert fetcher.get_bibtex(TEST_DOI) is None
+        assert fetcher.get_bibtex("arXiv:1810.04805") == fake_bibtex("k")
+        assert fetcher.get_bibtex("DBLP:" + TEST_DBLP_KEY) == fake_bibtex("k")
+        assert urls == [
+            "https://dblp.org/rec/journals/corr/abs-1810-04805.bib",
+            f"https://dblp.org/rec/{TEST_DBLP_KEY}.bib",
+        ]
+
+    def test_workflow_routes_identifiers(self):
+        class DoiFetcher(FakeFetcher):
+            direct_identifiers = frozenset({"doi"})
+
+        doi_fetcher = DoiFetcher()
+        search_fetcher = FakeFetcher()
+        workflow = WorkflowBuilder().add_fetcher(search_fetcher).add_fetcher(doi_fetcher)
+        workflow.get_multiple_bibtex([TEST_DOI, TEST_TITLE, TEST_DBLP_KEY])
+        # DOI 只发给能直接查找的 fetcher，其余查询走完整链
+        assert search_fetcher.calls == [TEST_TITLE, TEST_DBLP_KEY]
+        assert doi_fetcher.calls == [TEST_DOI, TEST_TITLE, TEST_DBLP_KEY]
+
+        unrouted = WorkflowBuilder(route_identifiers=False)
+        assert unrouted.add_fetcher(search_fetcher).add_fetcher(doi_fetcher).route(TEST_DOI) == [
+            search_fetcher, doi_fetcher
+        ]
+
+class TestAdaptiveStrategy:
+    def test_query_class(self):
+        assert query_class(TEST_DOI) == "doi"
+        assert query_class(TEST_TITLE) == "cs_title"
+        assert query_class("The history of the Roman empire") == "title"
+
+    def test_learns_order_and_persists(self, tmp_path):
+        class SlowMiss(FakeFetcher):
+            pass
+
+        titles = [f"Graph neural networks part {i}" for i in range(6)]
+        slow = SlowMiss(delay=0.02)
+        fast = FakeFetcher({t: fake_bibtex(t) for t in titles})
+        stats_path = tmp_path / "stats.json"
+        workflow = WorkflowBuilder(strategy="adaptive", stats_path=str(stats_path))
+        workflow.add_fetcher(slow).add_fetcher(fast)
+
+        workflow.get_multiple_bibtex(titles)
+        # 前几次查询后 SlowMiss 的期望代价更高，之后被排到后面
+        assert len(slow.calls) < len(titles)
+        stats = workflow.adaptive.snapshot()["cs_title"]
+        assert stats["FakeFetcher"]["hit_rate"] == 1.0
+        assert stats["SlowMiss"]["p95"] >= 0.02
+
+        reloaded = WorkflowBuilder(strategy="adaptive", stats_path=str(stats_path))
+        reloaded.add_fetcher(slow).add_fetcher(fast)
+        assert reloaded._chain("Graph attention networks") == [fast, slow]
+        # 其他查询类别没有数据，保持配置顺序
+        assert reloaded._chain("The history of the Roman empire") == [slow, fast]
+
+    def test_queueing_is_not_counted_as_latency(self):
+        titles = [f"Graph neural networks part {i}" for i in range(4)]
+        fetcher = FakeFetcher({t: fake_bibtex(t) for t in titles}, delay=0.05, max_concurrency=1)
+        workflow = WorkflowBuilder(strategy="adaptive").add_fetcher(fetcher)
+        workflow.get_multiple_bibtex(titles, max_workers=4)
+        stats = workflow.adaptive.snapshot()["cs_title"]["FakeFetcher"]
+        # 并发上限为 1 时后面的查询要排队，但延迟只按实际查询时间计
+        assert stats["attempts"] == 4 and stats["p95"] < 0.1
+
+class TestDeadlines:
+    def test_nested_scope_never_extends_deadline(self):
+        assert request_timeout() == (5.0, 30.0)
+        with deadline_scope(0.5) as outer:
+            with deadline_scope(10) as inner:
+                assert inner is outer
+            connect, read = request_timeout()
+            assert connect <= 0.5 and read <= 0.5
+
+    def test_rate_limit_wait_respects_timeout(self):
+        bucket = TokenBucket(rate=1, capacity=1)
+        bucket.acquire()
+        with pytest.raises(TimeoutError):
+            bucket.acquire(timeout=0.1)
+        # 超时时不占用令牌，下一个请求仍只需等待约 1 秒
+        assert bucket.acquire() <= 1.0
+
+    def test_query_stops_within_budget(self, monkeypatch):
+        dblp = DBLPBibTeX(negative_ttl=60)
+        timeouts = []
+
+        def hang(url, **kwargs):
+            timeouts.append(kwargs["timeout"])
+            time.sleep(kwargs["timeout"][1])
+            raise requests.ReadTimeout("read timed out")
+
+        monkeypatch.setattr(dblp.session_pool, "get", hang)
+        backup = FakeFetcher({"Some paper title": fake_bibtex("backup")})
+        workflow = WorkflowBuilder(query_timeout=0.2, circuit_breakers=False)
+        workflow.add_fetcher(dblp).add_fetcher(backup)
+
+        start = time.monotonic()
+        assert workflow.get_bibtex("Some paper title") is None
+        assert time.monotonic() - start < 1.0
+        assert timeouts[0][1] <= 0.2
+        assert backup.calls == []
+
+        # 超时不会被当作未命中缓存，之后的查询仍会发出请求
+        retried = []
+
+        def empty(url, **kwargs):
+            retried.append(url)
+            return FakeResponse(data={"result": {"hits": {"hit": []}}})
+
+        monkeypatch.setattr(dblp.session_pool, "get", empty)
+        assert dblp.get_bibtex("Some paper title") is None
+        assert retried
+
+    def test_race_raises_when_deadline_passes(self):
+        slow = FakeFetcher({"q": fake_bibtex("slow")}, delay=0.5)
+        workflow = WorkflowBuilder(strategy='race', query_timeout=0.1).add_fetcher(slow)
+        start = time.monotonic()
+        assert workflow.get_multiple_bibtex(["q"]) == {"q": {}}
+        assert time.monotonic() - start < 0.4
+
+    def test_check_deadline_inside_scope(self):
+        with deadline_scope(0.01):
+            time.sleep(0.02)
+            with pytest.raises(DeadlineExceeded):
+                request_timeout()
+
+class TestRetry:
+    def test_backoff_with_jitter_and_retry_after(self):
+        policy = RetryPolicy(backoff=0.5, max_backoff=2.0)
+        assert all(0 <= policy.delay(3) <= 2.0 for _ in range(20))
+        assert RetryPolicy(backoff=0.5, jitter=False).delay(2) == 2.0
+        assert policy.delay(0, {'Retry-After': '1.5'}) == 1.5
+        assert policy.is_retryable(503) and not policy.is_retryable(404)
+        assert policy.is_retryable(error=requests.ConnectionError())
+
+    def test_retries_throttled_requests(self, monkeypatch):
+        dblp = DBLPBibTeX(retry_policy=RetryPolicy(attempts=3, backoff=0.01))
+        responses = [
+            FakeResponse(429, headers={'Retry-After': '0.01'}),
+            FakeResponse(503),
+            FakeResponse(200, text=fake_bibtex("DBLP:x")),
+        ]
+        monkeypatch.setattr(dblp.session_pool, "get", lambda url, **kwargs: responses.pop(0))
+        workflow = WorkflowBuilder().add_fetcher(dblp)
+        assert workflow.get_bibtex(TEST_DBLP_KEY) == fake_bibtex("DBLP:x")
+        assert workflow.get_statistics()["DBLPBibTeX"]["retries"] == 2
+
+    def test_gives_up_after_attempts_and_within_deadline(self, monkeypatch):
+        calls = []
+
+        def unavailable(url, **kwargs):
+            calls.append(url)
+            return FakeResponse(503)
+
+        dblp = DBLPBibTeX(retry_policy=RetryPolicy(attempts=2, backoff=0.01))
+        monkeypatch.setattr(dblp.session_pool, "get", unavailable)
+        assert dblp._get("https://dblp.org/rec/x.bib").status_code == 503
+        assert len(calls) == 2
+
+        # Retry-After 超过剩余时间时不再等待
+        slow = DBLPBibTeX(retry_policy=RetryPolicy(attempts=5))
+        monkeypatch.setattr(slow.session_pool, "get", lambda url, **kwargs: FakeResponse(
+            429, headers={'Retry-After': '5'}
+        ))
+        with deadline_scope(1.0):
+            assert slow._get("https://example.org/x").status_code == 429
+        assert slow.metrics.get("retries") == 0
+
+class TestMetrics:
+    def test_counters_and_histograms(self):
+        metrics = FetcherMetrics("Fake", buckets=(0.1, 1.0))
+        metrics.record_request("search", 0.05, 200, size=100)
+        metrics.record_request("transform", 0.5, 503)
+        metrics.record_request("search", 2.0, error=requests.ConnectionError())
+        metrics.record_cache(True)
+        metrics.record_cache(False)
+        snapshot = metrics.snapshot()
+        assert snapshot["requests"] == 3
+        assert snapshot["errors"] == 2
+        assert snapshot["bytes_received"] == 100
+        assert snapshot["cache_hit_ratio"] == 0.5
+        assert snapshot["latency"]["search"]["buckets"] == {"0.1": 1, "1.0": 1, "+Inf": 2}
+        json.dumps(snapshot)
+
+        text = metrics.to_prometheus()
+        assert 'bibtex_requests_total{fetcher="Fake"} 3' in text
+        assert (
+            'bibtex_request_duration_seconds_bucket{fetcher="Fake",endpoint="transform",le="1.0"} 1'
+            in text
+        )
+        assert "# TYPE bibtex_request_duration_seconds histogram" in text
+
+    def test_fetcher_instrumentation(self, monkeypatch):
+        dblp = DBLPBibTeX()
+        responses = {
+            "https://dblp.org/search/publ/api": FakeResponse(data={
+                "result": {"hits": {"hit": [{"info": {"key": "conf/x/Doe20"}}]}}
+            }),
+            "https://dblp.org/rec/conf/x/Doe20.bib": FakeResponse(text=fake_bibtex("DBLP:x")),
+        }
+        monkeypatch.setattr(dblp.session_pool, "get", lambda url, **kwargs: responses[url])
+        workflow = WorkflowBuilder().add_fetcher(dblp)
+
+        title = "A paper title about something"
+        assert workflow.get_bibtex(title)
+        assert workflow.get_bibtex(title)
+        stats = workflow.get_statistics()["DBLPBibTeX"]
+        assert stats["total_requests"] == 2
+        assert stats["hits"] == 2
+        assert stats["cache_hits"] == 1 and stats["cache_misses"] == 1
+        assert stats["bytes_received"] == len(fake_bibtex("DBLP:x"))
+        assert set(stats["latency"]) == {"search", "transform"}
+
+        assert json.loads(workflow.export_metrics())["DBLPBibTeX"]["hits"] == 2
+        assert 'bibtex_hits_total{fetcher="DBLPBibTeX"} 2' in workflow.export_metrics("prometheus")
+
 def test_integration():
     """集成测试：测试完整工作流程"""
     workflow = WorkflowBuilder()